@@ -0,0 +1,148 @@
+"""
+Local embedding backend benchmark: sentence-transformers (PyTorch) vs int8 ONNX.
+
+Embeds the same synthetic corpus with ``HFSentenceEmbedder`` and ``OnnxSentenceEmbedder`` and
+reports batch throughput, single-query latency and how well the ONNX vectors preserve the PyTorch
+nearest neighbours (mean recall@k over a sample of queries). Needs the ``hf`` and ``onnx`` extras;
+the first run exports and quantizes the model.
+
+Usage::
+
+    python -m tests.embedding_backend_benchmark --texts 2000 --queries 100 --k 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from tests.ingest_benchmark import _sentence
+
+
+@dataclass
+class BackendReport:
+    backend: str
+    dim: int
+    texts_per_sec: float
+    query_p50_ms: float
+    query_p95_ms: float
+
+
+@dataclass
+class EmbeddingBackendBenchmarkReport:
+    model: str
+    texts: int
+    queries: int
+    k: int
+    backends: list[BackendReport]
+    recall_at_k: float
+    mean_cosine: float
+
+
+def generate_texts(count: int, seed: int = 0) -> list[str]:
+    """Return *count* short synthetic passages (two to four sentences each)."""
+    rng = random.Random(seed)
+    return [" ".join(_sentence(rng) for _ in range(rng.randint(2, 4))) for _ in range(count)]
+
+
+def _measure(name: str, embedder, texts: list[str], queries: list[str]) -> tuple[BackendReport, np.ndarray]:
+    embedder.embed_batch(texts[:8])  # warm-up
+    start = time.perf_counter()
+    vectors = np.asarray(embedder.embed_batch(texts), dtype=np.float32)
+    seconds = time.perf_counter() - start
+
+    latencies = []
+    for query in queries:
+        t0 = time.perf_counter()
+        embedder.embed(query)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    report = BackendReport(
+        backend=name,
+        dim=int(embedder.dim),
+        texts_per_sec=round(len(texts) / seconds, 2) if seconds else 0.0,
+        query_p50_ms=round(float(np.percentile(latencies, 50)), 3),
+        query_p95_ms=round(float(np.percentile(latencies, 95)), 3),
+    )
+    return report, vectors
+
+
+def neighbour_recall(reference: np.ndarray, candidate: np.ndarray, query_ids: list[int], k: int) -> float:
+    """Mean overlap of each query's top-*k* neighbours under *candidate* vs *reference* (self excluded)."""
+    overlaps = []
+    for qid in query_ids:
+        ref_scores = reference @ reference[qid]
+        cand_scores = candidate @ candidate[qid]
+        ref_scores[qid] = cand_scores[qid] = -np.inf
+        ref_top = set(np.argpartition(-ref_scores, k)[:k].tolist())
+        cand_top = set(np.argpartition(-cand_scores, k)[:k].tolist())
+        overlaps.append(len(ref_top & cand_top) / k)
+    return float(np.mean(overlaps)) if overlaps else 0.0
+
+
+def run_embedding_backend_benchmark(
+    model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+    texts: int = 1000,
+    queries: int = 50,
+    k: int = 10,
+    batch_size: int = 32,
+    seed: int = 0,
+) -> EmbeddingBackendBenchmarkReport:
+    """Embed a synthetic corpus with both backends and compare speed and neighbour agreement."""
+    from webly.embedder.hf_sentence_embedder import HFSentenceEmbedder
+    from webly.embedder.onnx_embedder import OnnxSentenceEmbedder
+
+    corpus = generate_texts(texts, seed=seed)
+    rng = random.Random(seed + 1)
+    query_ids = rng.sample(range(len(corpus)), min(queries, len(corpus)))
+    query_texts = [corpus[i] for i in query_ids]
+    k = max(1, min(k, len(corpus) - 1))
+
+    torch_report, torch_vectors = _measure(
+        "pytorch", HFSentenceEmbedder(model_name, batch_size=batch_size), corpus, query_texts
+    )
+    onnx_report, onnx_vectors = _measure(
+        "onnx-int8", OnnxSentenceEmbedder(model_name, batch_size=batch_size), corpus, query_texts
+    )
+
+    return EmbeddingBackendBenchmarkReport(
+        model=model_name,
+        texts=len(corpus),
+        queries=len(query_ids),
+        k=k,
+        backends=[torch_report, onnx_report],
+        recall_at_k=round(neighbour_recall(torch_vectors, onnx_vectors, query_ids, k), 4),
+        # both backends L2-normalize, so the row-wise dot product is the cosine
+        mean_cosine=round(float(np.mean(np.sum(torch_vectors * onnx_vectors, axis=1))), 4),
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare PyTorch and int8 ONNX local embedding backends.")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--texts", type=int, default=1000, help="corpus size")
+    parser.add_argument("--queries", type=int, default=50, help="queries for latency and recall")
+    parser.add_argument("--k", type=int, default=10, help="neighbours compared for recall@k")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = run_embedding_backend_benchmark(
+        model_name=args.model,
+        texts=args.texts,
+        queries=args.queries,
+        k=args.k,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
+    print(json.dumps(asdict(report), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
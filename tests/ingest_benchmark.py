@@ -0,0 +1,201 @@
+"""
+Ingest throughput benchmark.
+
+Generates a synthetic crawl (``results.jsonl`` + ``graph.json``), runs ``IngestPipeline.transform``
+and ``load`` end to end against a real FAISS index with a deterministic local embedder, and reports
+pages/sec, chunks/sec, per-stage timings and peak RSS. No network or API key is needed.
+
+Usage::
+
+    python -m tests.ingest_benchmark --pages 500 --latency-ms 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from webly.pipeline.ingest_pipeline import IngestPipeline
+from webly.vector_index.faiss_db import FaissDatabase
+
+_WORDS = (
+    "index vector query page crawl chunk embed token graph link section heading anchor search "
+    "result score model cache batch store field value record source target metric latency"
+).split()
+
+
+class BenchmarkCrawler:
+    """Crawler stand-in: only exposes where the synthetic results live."""
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.results_filename = "results.jsonl"
+
+    def crawl(self, *args, **kwargs):
+        raise RuntimeError("BenchmarkCrawler does not crawl; generate a corpus instead.")
+
+
+class StubEmbedder:
+    """Deterministic hash-seeded vectors with optional artificial per-call latency."""
+
+    max_input_tokens = 8192
+
+    def __init__(self, dim: int = 64, latency_s: float = 0.0):
+        self.dim = dim
+        self.latency_s = latency_s
+        self.calls = 0
+
+    def embed(self, text: str) -> list[float]:
+        self.calls += 1
+        if self.latency_s > 0:
+            time.sleep(self.latency_s)
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+        rng = random.Random(seed)
+        return [rng.uniform(-1.0, 1.0) for _ in range(self.dim)]
+
+    def count_tokens(self, text: str) -> int:
+        return max(1, len(text) // 4)
+
+
+@dataclass
+class IngestBenchmarkReport:
+    pages: int
+    chunks: int
+    embed_calls: int
+    seconds: float
+    pages_per_sec: float
+    chunks_per_sec: float
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+    peak_rss_mb: float | None = None
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 18))]
+    return " ".join(words).capitalize() + "."
+
+
+def generate_corpus(
+    out_dir: str | Path,
+    pages: int = 100,
+    sections_per_page: int = 4,
+    paragraphs_per_section: int = 3,
+    links_per_page: int = 5,
+    seed: int = 0,
+) -> Path:
+    """Write a synthetic ``results.jsonl`` and ``graph.json`` into *out_dir* and return the results path."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    urls = [f"https://bench.example.com/page-{i}" for i in range(pages)]
+    graph: dict[str, list[dict]] = {}
+
+    results_path = out_dir / "results.jsonl"
+    with open(results_path, "w", encoding="utf-8") as f:
+        for i, url in enumerate(urls):
+            targets = rng.sample(urls, min(links_per_page, len(urls)))
+            graph[url] = [{"target": t, "anchor_text": f"see {t.rsplit('/', 1)[-1]}"} for t in targets if t != url]
+
+            body = [f"<nav><a href='/'>Home</a> <a href='/docs'>Docs</a></nav><h1>Page {i}</h1>"]
+            for s in range(sections_per_page):
+                body.append(f"<h2 id='s{s}'>Section {s}</h2>")
+                for _ in range(paragraphs_per_section):
+                    body.append(f"<p>{' '.join(_sentence(rng) for _ in range(rng.randint(3, 6)))}</p>")
+            body.append("".join(f"<a href='{link['target']}'>{link['anchor_text']}</a>" for link in graph[url]))
+            body.append("<footer>Copyright Bench Example</footer>")
+            html = f"<html><head><title>Page {i}</title></head><body>{''.join(body)}</body></html>"
+            f.write(json.dumps({"url": url, "html": html, "crawled_at": "2026-01-01T00:00:00+00:00"}) + "\n")
+
+    with open(out_dir / "graph.json", "w", encoding="utf-8") as f:
+        json.dump(graph, f)
+    return results_path
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_ingest_benchmark(
+    workdir: str | Path,
+    pages: int = 100,
+    dim: int = 64,
+    latency_s: float = 0.0,
+    seed: int = 0,
+    **corpus_options,
+) -> IngestBenchmarkReport:
+    """Generate a corpus under *workdir*, index it, and return throughput and per-stage timings."""
+    workdir = Path(workdir)
+    out_dir = workdir / "out"
+    generate_corpus(out_dir, pages=pages, seed=seed, **corpus_options)
+
+    embedder = StubEmbedder(dim=dim, latency_s=latency_s)
+    pipeline = IngestPipeline(
+        crawler=BenchmarkCrawler(str(out_dir)),
+        index_path=str(workdir / "index"),
+        embedder=embedder,
+        db=FaissDatabase(),
+        summarizer=None,
+        use_summary=False,
+    )
+
+    start = time.perf_counter()
+    records = pipeline.transform()
+    pipeline.load(records)
+    seconds = time.perf_counter() - start
+
+    return IngestBenchmarkReport(
+        pages=pages,
+        chunks=len(records),
+        embed_calls=embedder.calls,
+        seconds=round(seconds, 4),
+        pages_per_sec=round(pages / seconds, 2) if seconds else 0.0,
+        chunks_per_sec=round(len(records) / seconds, 2) if seconds else 0.0,
+        stage_seconds={k: round(v, 4) for k, v in sorted(pipeline.stage_timings.items())},
+        peak_rss_mb=_peak_rss_mb(),
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark IngestPipeline transform/load on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--sections", type=int, default=4, help="sections per page")
+    parser.add_argument("--paragraphs", type=int, default=3, help="paragraphs per section")
+    parser.add_argument("--links", type=int, default=5, help="outgoing links per page")
+    parser.add_argument("--dim", type=int, default=64, help="embedding dimension")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="artificial latency per embed call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=None, help="keep artifacts here instead of a temp dir")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="webly-bench-") as tmp:
+        report = run_ingest_benchmark(
+            args.workdir or tmp,
+            pages=args.pages,
+            dim=args.dim,
+            latency_s=args.latency_ms / 1000.0,
+            seed=args.seed,
+            sections_per_page=args.sections,
+            paragraphs_per_section=args.paragraphs,
+            links_per_page=args.links,
+        )
+    print(json.dumps(asdict(report), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -108,6 +108,15 @@ def test_openai_prefix_without_model_name_raises():
         validate_pipeline_config(cfg(embedding_model="openai:"))
 
 
+def test_onnx_embedding_model_passes():
+    validate_pipeline_config(cfg(embedding_model="onnx:sentence-transformers/all-MiniLM-L6-v2"))
+
+
+def test_onnx_prefix_without_model_name_raises():
+    with pytest.raises(ValueError, match="embedding_model"):
+        validate_pipeline_config(cfg(embedding_model="onnx:"))
+
+
 def test_embedding_model_with_spaces_raises():
     with pytest.raises(ValueError, match="embedding_model"):
         validate_pipeline_config(cfg(embedding_model="some invalid model"))
@@ -185,6 +194,93 @@ def test_rate_limit_delay_bool_raises():
         validate_pipeline_config(cfg(rate_limit_delay=True))
 
 
+# ── summary_concurrency ───────────────────────────────────────────────────────
+
+def test_summary_concurrency_zero_raises():
+    with pytest.raises(ValueError, match="summary_concurrency"):
+        validate_pipeline_config(cfg(summary_concurrency=0))
+
+
+def test_summary_concurrency_bool_raises():
+    with pytest.raises(ValueError, match="summary_concurrency"):
+        validate_pipeline_config(cfg(summary_concurrency=True))
+
+
+# ── boilerplate_threshold ─────────────────────────────────────────────────────
+
+def test_boilerplate_threshold_in_range_passes():
+    validate_pipeline_config(cfg(boilerplate_threshold=0.0))
+    validate_pipeline_config(cfg(boilerplate_threshold=0.5))
+
+
+def test_boilerplate_threshold_one_raises():
+    with pytest.raises(ValueError, match="boilerplate_threshold"):
+        validate_pipeline_config(cfg(boilerplate_threshold=1.0))
+
+
+# ── embedding_cache_dtype ─────────────────────────────────────────────────────
+
+def test_embedding_cache_dtype_invalid_raises():
+    with pytest.raises(ValueError, match="embedding_cache_dtype"):
+        validate_pipeline_config(cfg(embedding_cache_dtype="float64"))
+
+
+def test_embedding_cache_limits_negative_raises():
+    with pytest.raises(ValueError, match="embedding_cache_max_mb"):
+        validate_pipeline_config(cfg(embedding_cache_max_mb=-1))
+
+
+# ── embedding_dimensions ──────────────────────────────────────────────────────
+
+def test_embedding_dimensions_for_text_embedding_3_passes():
+    validate_pipeline_config(cfg(embedding_model="openai:text-embedding-3-large", embedding_dimensions=1024))
+
+
+def test_embedding_dimensions_negative_raises():
+    with pytest.raises(ValueError, match="embedding_dimensions"):
+        validate_pipeline_config(cfg(embedding_dimensions=-1))
+
+
+def test_embedding_dimensions_for_local_model_raises():
+    with pytest.raises(ValueError, match="embedding_dimensions"):
+        validate_pipeline_config(
+            cfg(embedding_model="sentence-transformers/all-MiniLM-L6-v2", embedding_dimensions=256)
+        )
+
+
+# ── index_type / index parameters ─────────────────────────────────────────────
+
+def test_auto_index_type_passes():
+    validate_pipeline_config(cfg(index_type="auto", index_nprobe=32, index_nlist=0))
+
+
+def test_unknown_index_type_raises():
+    with pytest.raises(ValueError, match="index_type"):
+        validate_pipeline_config(cfg(index_type="annoy"))
+
+
+def test_negative_index_nprobe_raises():
+    with pytest.raises(ValueError, match="index_nprobe"):
+        validate_pipeline_config(cfg(index_nprobe=-1))
+
+
+def test_zero_index_shards_raises():
+    with pytest.raises(ValueError, match="index_shards"):
+        validate_pipeline_config(cfg(index_shards=0))
+
+
+# ── embedding_batch_size / embedding_workers ──────────────────────────────────
+
+def test_embedding_batch_size_zero_raises():
+    with pytest.raises(ValueError, match="embedding_batch_size"):
+        validate_pipeline_config(cfg(embedding_batch_size=0))
+
+
+def test_embedding_workers_negative_raises():
+    with pytest.raises(ValueError, match="embedding_workers"):
+        validate_pipeline_config(cfg(embedding_workers=-1))
+
+
 # ── Multiple violations reported together ─────────────────────────────────────
 
 def test_multiple_violations_reported_together():
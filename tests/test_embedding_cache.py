@@ -80,4 +80,261 @@ def test_embedder_cache_avoids_second_api_call(tmp_path: Path):
     v2 = embedder.embed("unique test text for cache test")
 
     assert call_count == 1
-    assert v1 == v2
+    # cached vectors are stored as float32
+    assert v2 == pytest.approx(v1, rel=1e-6)
+
+
+def test_embedder_dimensions_reach_the_api_and_the_cache_key(tmp_path: Path):
+    from webly.embedder.openai_embedder import OpenAIEmbedder
+
+    requests = []
+
+    class _Item:
+        embedding = [0.5, 0.5]
+
+    class _FakeEmbeddings:
+        def create(self, **kwargs):
+            requests.append(kwargs)
+            return type("Resp", (), {"data": [_Item()], "usage": None})()
+
+    full = OpenAIEmbedder(model_name="text-embedding-3-large", api_key="fake-key", cache_dir=str(tmp_path))
+    short = OpenAIEmbedder(
+        model_name="text-embedding-3-large", api_key="fake-key", cache_dir=str(tmp_path), dimensions=256
+    )
+    for embedder in (full, short):
+        embedder.client = type("Client", (), {"embeddings": _FakeEmbeddings()})()
+
+    assert (full.dim, short.dim) == (3072, 256)
+    full.embed("same text")
+    short.embed("same text")
+
+    # the shortened vector is not served from the full-size cache entry
+    assert requests == [
+        {"model": "text-embedding-3-large", "input": "same text"},
+        {"model": "text-embedding-3-large", "input": "same text", "dimensions": 256},
+    ]
+
+
+def test_embedder_rejects_unsupported_dimensions():
+    from webly.embedder.openai_embedder import OpenAIEmbedder
+
+    with pytest.raises(ValueError, match="between 1 and 1536"):
+        OpenAIEmbedder(model_name="text-embedding-3-small", api_key="fake-key", dimensions=2048)
+    with pytest.raises(ValueError, match="does not support"):
+        OpenAIEmbedder(model_name="text-embedding-ada-002", api_key="fake-key", dimensions=512)
+
+
+def test_failed_encoding_lookup_is_retried(monkeypatch):
+    import sys
+    import types
+
+    from webly.embedder import openai_embedder
+
+    attempts = []
+
+    def _encoding_for_model(model_name):
+        attempts.append(model_name)
+        if len(attempts) == 1:
+            raise OSError("transient download failure")
+        return "encoding"
+
+    fake = types.ModuleType("tiktoken")
+    fake.encoding_for_model = _encoding_for_model
+    monkeypatch.setitem(sys.modules, "tiktoken", fake)
+    monkeypatch.setattr(openai_embedder, "_ENCODINGS", {})
+
+    assert openai_embedder._get_encoding("retry-model") is None
+    assert openai_embedder._get_encoding("retry-model") == "encoding"
+    assert openai_embedder._get_encoding("retry-model") == "encoding"
+    assert len(attempts) == 2
+
+
+def test_vectors_are_stored_as_float32_blobs(tmp_path: Path):
+    import sqlite3
+
+    db_path = str(tmp_path / ".embedding_cache.db")
+    cache = EmbeddingCache(db_path)
+    cache.put("k", [0.25, -1.5, 3.0])
+    cache.close()
+
+    blob, dtype = sqlite3.connect(db_path).execute("SELECT vector, dtype FROM embeddings").fetchone()
+    assert dtype == "float32"
+    assert isinstance(blob, bytes) and len(blob) == 12
+
+
+def test_float16_storage_roundtrip(tmp_path: Path):
+    cache = EmbeddingCache(str(tmp_path / ".embedding_cache.db"), dtype="float16")
+    cache.put("k", [0.5, -0.25, 1.0])
+    assert cache.get("k") == [0.5, -0.25, 1.0]
+    cache.close()
+
+
+def test_get_many_and_put_many(tmp_path: Path):
+    cache = EmbeddingCache(str(tmp_path / ".embedding_cache.db"))
+    cache.put_many([(f"k{i}", [float(i), 0.0]) for i in range(1000)])
+
+    found = cache.get_many(["k1", "k999", "missing"])
+
+    assert set(found) == {"k1", "k999"}
+    assert found["k999"] == [999.0, 0.0]
+    assert len(cache.get_many(f"k{i}" for i in range(1000))) == 1000
+    cache.close()
+
+
+def test_legacy_json_rows_remain_readable(tmp_path: Path):
+    import sqlite3
+
+    db_path = str(tmp_path / ".embedding_cache.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE embeddings (key TEXT PRIMARY KEY, vector TEXT NOT NULL, created_at TEXT NOT NULL)")
+    conn.execute("INSERT INTO embeddings VALUES ('old', '[0.1, 0.2]', '2026-01-01')")
+    conn.commit()
+    conn.close()
+
+    cache = EmbeddingCache(db_path)
+    assert cache.get("old") == pytest.approx([0.1, 0.2])
+    cache.put("new", [1.0])
+    assert set(cache.get_many(["old", "new"])) == {"old", "new"}
+    cache.close()
+
+
+def test_invalid_dtype_raises(tmp_path: Path):
+    with pytest.raises(ValueError, match="dtype"):
+        EmbeddingCache(str(tmp_path / ".embedding_cache.db"), dtype="int8")
+
+
+def test_memory_tier_serves_repeat_lookups_and_counts_hits(tmp_path: Path):
+    cache = EmbeddingCache(str(tmp_path / ".embedding_cache.db"))
+    cache.put("k", [1.0, 2.0])
+    cache.close()
+
+    cache = EmbeddingCache(str(tmp_path / ".embedding_cache.db"))
+    assert cache.get("k") == [1.0, 2.0]
+    assert cache.get("k") == [1.0, 2.0]
+    assert cache.get("missing") is None
+
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["memory_entries"] == 1
+    cache.close()
+
+
+def test_memory_tier_respects_byte_budget(tmp_path: Path):
+    # 4 floats * 4 bytes = 16 bytes per vector; room for two
+    cache = EmbeddingCache(str(tmp_path / ".embedding_cache.db"), memory_bytes=32)
+    for i in range(3):
+        cache.put(f"k{i}", [float(i)] * 4)
+
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.stats()["memory_bytes"] <= 32
+    assert cache.get("k0") == [0.0] * 4  # still on disk
+    cache.close()
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path: Path):
+    import time
+
+    db_path = str(tmp_path / ".embedding_cache.db")
+    cache = EmbeddingCache(db_path, memory_bytes=0, max_bytes=72)
+    cache.put("old", [0.0] * 4)
+    time.sleep(0.01)
+    cache.put("recent", [1.0] * 4)
+    time.sleep(0.01)
+    cache.get("old")  # touching "old" makes "recent" the LRU row
+    cache.put_many([("a", [2.0] * 4), ("b", [3.0] * 4)])
+    cache.put("c", [4.0] * 4)
+
+    assert cache.get("recent") is None
+    assert cache.get("old") == [0.0] * 4
+    assert cache.stats()["stored_bytes"] <= 72
+    cache.close()
+
+
+def test_ttl_eviction_and_compact(tmp_path: Path):
+    import sqlite3
+
+    db_path = str(tmp_path / ".embedding_cache.db")
+    cache = EmbeddingCache(db_path)
+    cache.put_many([("stale", [1.0]), ("fresh", [2.0])])
+    cache.close()
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE embeddings SET last_used = 0 WHERE key = 'stale'")
+    conn.commit()
+    conn.close()
+
+    cache = EmbeddingCache(db_path, ttl_seconds=3600)
+    assert cache.get("stale") is None
+    assert cache.get("fresh") == [2.0]
+    assert cache.compact() == 0
+    cache.close()
+
+
+def test_shared_cache_is_one_instance_per_file(tmp_path: Path):
+    from webly.embedder.embedding_cache import shared_embedding_cache
+
+    a = shared_embedding_cache(str(tmp_path / "shared" / ".embedding_cache.db"))
+    b = shared_embedding_cache(str(tmp_path / "shared" / ".." / "shared" / ".embedding_cache.db"))
+    other = shared_embedding_cache(str(tmp_path / "other" / ".embedding_cache.db"))
+
+    assert a is b
+    assert a is not other
+
+
+def test_shared_cache_warns_about_ignored_options(tmp_path: Path, caplog):
+    from webly.embedder.embedding_cache import shared_embedding_cache
+
+    path = str(tmp_path / ".embedding_cache.db")
+    first = shared_embedding_cache(path, memory_bytes=1024)
+    with caplog.at_level("WARNING", logger="webly.embedder.embedding_cache"):
+        assert shared_embedding_cache(path, memory_bytes=1024) is first
+        assert not caplog.records
+        assert shared_embedding_cache(path, memory_bytes=4096, dtype="float16") is first
+    assert "already open" in caplog.text
+
+
+def test_embedders_with_same_cache_dir_share_the_cache(tmp_path: Path):
+    from webly.embedder.openai_embedder import OpenAIEmbedder
+
+    first = OpenAIEmbedder(api_key="fake-key", cache_dir=str(tmp_path))
+    second = OpenAIEmbedder(api_key="fake-key", cache_dir=str(tmp_path))
+
+    assert first._cache is second._cache
+
+
+def test_buffered_writes_are_visible_locally_and_to_other_processes_after_flush(tmp_path: Path):
+    db_path = str(tmp_path / ".embedding_cache.db")
+    writer = EmbeddingCache(db_path, write_batch_size=10)
+    other_process = EmbeddingCache(db_path, memory_bytes=0)
+
+    writer.put("k", [1.0, 2.0])
+    assert writer.get("k") == [1.0, 2.0]
+    assert other_process.get("k") is None
+
+    writer.flush()
+    assert other_process.get("k") == [1.0, 2.0]
+    writer.close()
+    other_process.close()
+
+
+def test_concurrent_writers_share_one_file(tmp_path: Path):
+    import threading
+
+    db_path = str(tmp_path / ".embedding_cache.db")
+    caches = [EmbeddingCache(db_path, write_batch_size=16) for _ in range(4)]
+
+    def _write(worker: int):
+        cache = caches[worker % len(caches)]
+        for i in range(50):
+            cache.put(f"w{worker}-{i}", [float(worker), float(i)])
+
+    threads = [threading.Thread(target=_write, args=(w,)) for w in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for cache in caches:
+        cache.close()
+
+    reader = EmbeddingCache(db_path)
+    assert len(reader.get_many(f"w{w}-{i}" for w in range(8) for i in range(50))) == 400
+    reader.close()
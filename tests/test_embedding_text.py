@@ -0,0 +1,71 @@
+import re
+
+from webly.pipeline.embedding_text import chunk_text_for_embedding, segment_by_token_budget
+
+
+class _WordTokenEmbedder:
+    """One token per whitespace-delimited word; counts offset and count passes."""
+
+    max_input_tokens = 10
+    safety_ratio = 1.0
+
+    def __init__(self):
+        self.offset_calls = 0
+        self.count_calls = 0
+
+    def token_offsets(self, text: str) -> list[int]:
+        self.offset_calls += 1
+        return [m.start() for m in re.finditer(r"\S+", text)]
+
+    def count_tokens(self, text: str) -> int:
+        self.count_calls += 1
+        return len(text.split())
+
+
+def test_short_text_is_returned_unchanged():
+    embedder = _WordTokenEmbedder()
+    assert chunk_text_for_embedding(embedder, "just a few words") == ["just a few words"]
+    assert embedder.offset_calls == 0
+
+
+def test_long_text_is_encoded_once_and_cut_at_paragraphs():
+    embedder = _WordTokenEmbedder()
+    text = "one two three four five six.\n\nseven eight nine ten eleven twelve.\n\nthirteen fourteen."
+
+    segments = chunk_text_for_embedding(embedder, text)
+
+    assert embedder.offset_calls == 1
+    assert segments == [
+        "one two three four five six.",
+        "seven eight nine ten eleven twelve.\n\nthirteen fourteen.",
+    ]
+
+
+def test_sentence_boundary_used_when_paragraph_exceeds_budget():
+    embedder = _WordTokenEmbedder()
+    text = "a b c d e f. g h i j k l. m n"
+
+    segments = segment_by_token_budget(embedder, text, max_tokens=8)
+
+    assert segments == ["a b c d e f.", "g h i j k l. m n"]
+
+
+def test_hard_cut_at_token_limit_without_boundaries():
+    embedder = _WordTokenEmbedder()
+    text = " ".join(f"w{i}" for i in range(25))
+
+    segments = segment_by_token_budget(embedder, text, max_tokens=10)
+
+    assert [len(s.split()) for s in segments] == [10, 10, 5]
+    assert " ".join(segments) == text
+
+
+def test_estimated_offsets_without_tokenizer():
+    class _CharEmbedder:
+        pass
+
+    text = "x" * 100
+    segments = segment_by_token_budget(_CharEmbedder(), text, max_tokens=10)
+
+    assert "".join(segments) == text
+    assert all(len(s) <= 40 for s in segments)
@@ -1,5 +1,6 @@
 import json
 import logging
+import sqlite3
 from pathlib import Path
 
 import pytest
@@ -8,6 +9,7 @@ np = pytest.importorskip("numpy", exc_type=ImportError)
 faiss_db_mod = pytest.importorskip("webly.vector_index.faiss_db", exc_type=ImportError)
 FaissDatabase = faiss_db_mod.FaissDatabase
 INDEX_VERSION = faiss_db_mod.INDEX_VERSION
+SearchFilter = faiss_db_mod.SearchFilter
 
 
 def test_faiss_add_search_save_load(tmp_path: Path):
@@ -27,7 +29,8 @@ def test_faiss_add_search_save_load(tmp_path: Path):
 
     path = tmp_path / "index"
     db.save(str(path))
-    assert (path / "metadata.json").is_file()
+    assert (path / "metadata.db").is_file()
+    assert not (path / "metadata.json").exists()
     assert not (path / "metadata.meta").exists()
 
     db2 = FaissDatabase()
@@ -47,32 +50,416 @@ def _save_one_record_index(tmp_path: Path) -> Path:
     return path
 
 
+def _stored_config(path: Path) -> dict:
+    with sqlite3.connect(path / "metadata.db") as conn:
+        return json.loads(conn.execute("SELECT value FROM info WHERE name = 'config'").fetchone()[0])
+
+
+def _write_stored_config(path: Path, config: dict) -> None:
+    with sqlite3.connect(path / "metadata.db") as conn:
+        conn.execute("UPDATE info SET value = ? WHERE name = 'config'", (json.dumps(config),))
+    conn.close()
+
+
+def _convert_to_json_format(path: Path, version=1) -> None:
+    """Rewrite a saved index's metadata in the format v1 ``metadata.json`` layout."""
+    db = FaissDatabase(str(path))
+    config = _stored_config(path)
+    if version is None:
+        config.pop("index_version")
+    else:
+        config["index_version"] = version
+    payload = {
+        "metadata": db.metadata,
+        "page_links": {},
+        "config": config,
+    }
+    (path / "metadata.json").write_text(json.dumps(payload), encoding="utf-8")
+    (path / "metadata.db").unlink()
+
+
 def test_index_version_present_in_saved_metadata(tmp_path: Path):
     path = _save_one_record_index(tmp_path)
-    data = json.loads((path / "metadata.json").read_text(encoding="utf-8"))
-    assert data["config"]["index_version"] == INDEX_VERSION
+    assert _stored_config(path)["index_version"] == INDEX_VERSION
 
 
 def test_index_version_mismatch_raises_runtime_error(tmp_path: Path):
     path = _save_one_record_index(tmp_path)
-    meta_path = path / "metadata.json"
-    data = json.loads(meta_path.read_text(encoding="utf-8"))
-    data["config"]["index_version"] = 99
-    meta_path.write_text(json.dumps(data), encoding="utf-8")
+    _write_stored_config(path, {**_stored_config(path), "index_version": 99})
 
     with pytest.raises(RuntimeError, match="version mismatch"):
         FaissDatabase(str(path))
 
 
+def test_v1_json_metadata_is_migrated_on_load(tmp_path: Path):
+    path = _save_one_record_index(tmp_path)
+    fid = FaissDatabase(str(path)).get_id_by_key("a")
+    _convert_to_json_format(path)
+
+    db = FaissDatabase(str(path))
+
+    assert db.get_id_by_key("a") == fid
+    assert db.search([1, 0, 0, 0], top_k=1)[0]["id"] == fid
+    assert _stored_config(path)["index_version"] == INDEX_VERSION
+    # the next save drops the superseded JSON file
+    db.save(str(path))
+    assert not (path / "metadata.json").exists()
+
+
+def test_v1_records_sharing_a_fid_are_reported_on_migration(tmp_path: Path, caplog):
+    path = _save_one_record_index(tmp_path)
+    _convert_to_json_format(path)
+    payload = json.loads((path / "metadata.json").read_text(encoding="utf-8"))
+    payload["metadata"].append({**payload["metadata"][0], "text": "duplicate"})
+    (path / "metadata.json").write_text(json.dumps(payload), encoding="utf-8")
+
+    with caplog.at_level(logging.WARNING):
+        db = FaissDatabase(str(path))
+
+    assert "sharing a FAISS id" in caplog.text
+    assert len(db.metadata) == 1
+
+
+def test_loaded_store_is_not_modified_until_saved(tmp_path: Path):
+    path = _save_one_record_index(tmp_path)
+
+    db = FaissDatabase(str(path))
+    db.add([{"id": "b", "url": "https://b", "text": "x", "embedding": [0, 1, 0, 0]}])
+    db.delete([db.get_id_by_key("a")])
+
+    assert [r["id"] for r in db.metadata] == ["b"]
+    assert [r["id"] for r in FaissDatabase(str(path)).metadata] == ["a"]
+
+
+def test_copy_on_write_closes_the_read_only_store(tmp_path: Path):
+    path = _save_one_record_index(tmp_path)
+    db = FaissDatabase(str(path))
+    read_only_store = db._store
+
+    db.add([{"id": "b", "url": "https://b", "text": "x", "embedding": [0, 1, 0, 0]}])
+
+    assert db._store is not read_only_store
+    with pytest.raises(sqlite3.ProgrammingError):
+        read_only_store._conn.execute("SELECT 1")
+    assert len(db.metadata) == 2
+
+
+def test_load_rejects_index_of_another_dimension(tmp_path: Path):
+    path = _save_one_record_index(tmp_path)
+
+    db = FaissDatabase()
+    with pytest.raises(RuntimeError, match="4-dimensional"):
+        db.load(str(path), expected_dim=8)
+    assert db.index is None
+
+    db.load(str(path), expected_dim=4)
+    assert db.dim == 4
+
+
+def test_mmap_load_searches_and_is_read_only(tmp_path: Path):
+    path = _save_one_record_index(tmp_path)
+
+    db = FaissDatabase(mmap=True)
+    db.load(str(path))
+    assert db.read_only
+    assert db.search([1, 0, 0, 0], top_k=1)[0]["url"] == "https://a"
+    with pytest.raises(RuntimeError, match="read-only"):
+        db.add([{"id": "b", "url": "https://b", "text": "x", "embedding": [0, 1, 0, 0]}])
+    with pytest.raises(RuntimeError, match="read-only"):
+        db.delete([db.get_id_by_key("a")])
+
+    # an explicit mmap=False load (as incremental ingest does) is writable again
+    db.load(str(path), mmap=False)
+    assert not db.read_only
+    db.add([{"id": "b", "url": "https://b", "text": "x", "embedding": [0, 1, 0, 0]}])
+    assert db.index.ntotal == 2
+
+
+def test_save_replaces_a_mapped_index_without_disturbing_readers(tmp_path: Path):
+    path = _save_one_record_index(tmp_path)
+    reader = FaissDatabase(str(path), mmap=True)
+
+    writer = FaissDatabase(str(path))
+    writer.add([{"id": "b", "url": "https://b", "text": "x", "embedding": [0, 1, 0, 0]}])
+    writer.save(str(path))
+
+    assert reader.search([1, 0, 0, 0], top_k=2)[0]["url"] == "https://a"
+    assert reader.index.ntotal == 1
+    assert FaissDatabase(str(path), mmap=True).index.ntotal == 2
+    assert not list(path.glob("*.tmp"))
+
+
 def test_missing_version_warns_but_loads(tmp_path: Path, caplog):
     path = _save_one_record_index(tmp_path)
-    meta_path = path / "metadata.json"
-    data = json.loads(meta_path.read_text(encoding="utf-8"))
-    del data["config"]["index_version"]
-    meta_path.write_text(json.dumps(data), encoding="utf-8")
+    _convert_to_json_format(path, version=None)
 
     with caplog.at_level(logging.WARNING):
         db = FaissDatabase(str(path))
 
     assert db.index is not None
     assert any("index_version" in record.message for record in caplog.records)
+
+
+def test_segments_sharing_a_url_get_distinct_ids():
+    db = FaissDatabase()
+    db.create(dim=2)
+    db.add(
+        [
+            {"id": "page#chunk_0__seg_0", "url": "https://a", "text": "x", "embedding": [1, 0]},
+            {"id": "page#chunk_1__seg_0", "url": "https://a", "text": "y", "embedding": [0, 1]},
+        ]
+    )
+
+    results = db.search([0, 1], top_k=1)
+    assert results[0]["text"] == "y"
+    assert len(db.ids_for_page_urls(["https://a"])) == 2
+
+
+def test_search_batch_matches_per_query_search():
+    db = FaissDatabase()
+    db.create(dim=3)
+    db.add(
+        [
+            {"id": "x", "url": "https://x", "text": "x", "embedding": [1, 0, 0]},
+            {"id": "y", "url": "https://y", "text": "y", "embedding": [0, 1, 0]},
+            {"id": "z", "url": "https://z", "text": "z", "embedding": [0.7, 0.7, 0]},
+        ]
+    )
+    queries = [[1, 0, 0], [0, 1, 0], [0, 0.2, 1]]
+
+    batched = db.search_batch(queries, top_k=2)
+
+    assert batched == [db.search(q, top_k=2) for q in queries]
+    assert [r["text"] for r in batched[0]] == ["x", "z"]
+    assert db.search_batch([], top_k=2) == []
+
+
+def test_auto_index_type_is_sized_by_expected_count():
+    db = FaissDatabase()
+    db.create(dim=32, index_type="auto", expected_count=1_000)
+    assert db._index_type == "flat"
+
+    db.create(dim=32, index_type="auto", expected_count=2_000_000)
+    assert db._index_type == "ivf_pq"
+    assert db._pq_m == 2 and 32 % db._pq_m == 0
+    assert db._ivf_nlist == int(4 * np.sqrt(2_000_000))
+    assert not db.is_trained
+
+    with pytest.raises(ValueError, match="pq_m"):
+        db.create(dim=32, index_type="ivf_pq", pq_m=5)
+
+
+def test_ivf_index_trained_on_a_sample_then_searched(tmp_path: Path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(400, 8)).astype("float32")
+    records = [{"id": f"r{i}", "url": f"https://r/{i}", "text": str(i), "embedding": v} for i, v in enumerate(vectors)]
+
+    db = FaissDatabase()
+    db.create(dim=8, index_type="ivf_flat", expected_count=len(records))
+    assert db._ivf_nlist == 400 // 39
+    assert db.training_size() == db._ivf_nlist * 64
+    db.train(vectors[:200])
+    assert db.is_trained
+    db.add(records)
+
+    db.set_search_params(nprobe=db._ivf_nlist)  # scan every list: exact results
+    assert db.search(vectors[7], top_k=1)[0]["text"] == "7"
+    db.save(str(tmp_path / "index"))
+
+    loaded = FaissDatabase(str(tmp_path / "index"), nprobe=3)
+    assert faiss_db_mod.faiss.try_extract_index_ivf(loaded.index).nprobe == 3
+    assert loaded.search(vectors[7], top_k=1)[0]["text"] == "7"
+
+
+def _page_records(pages: int, per_page: int, dim: int = 8):
+    rng = np.random.default_rng(1)
+    return [
+        {
+            "id": f"p{p}-s{s}",
+            "url": f"https://site/{p}",
+            "text": f"p{p}-s{s}",
+            "metadata": {"page_url": f"https://site/{p}"},
+            "embedding": rng.normal(size=dim).astype("float32"),
+        }
+        for p in range(pages)
+        for s in range(per_page)
+    ]
+
+
+def test_deletes_are_tombstoned_until_the_compaction_threshold(tmp_path: Path):
+    records = _page_records(pages=20, per_page=5)
+    db = FaissDatabase()
+    db.create(dim=8)
+    db.add(records)
+
+    assert db.delete_by_page_url(["https://site/0", "https://site/1"]) == 10
+    assert db.index.ntotal == 100  # tombstoned, not removed yet
+    assert db.delete_many([db.get_id_by_key("p0-s0"), 12345]) == 0
+    hits = db.search(records[0]["embedding"], top_k=95)
+    assert len(hits) == 90
+    assert not {h["text"] for h in hits} & {f"p{p}-s{s}" for p in (0, 1) for s in range(5)}
+
+    db.save(str(tmp_path / "index"))
+    loaded = FaissDatabase(str(tmp_path / "index"), mmap=True)
+    assert len(loaded.search(records[0]["embedding"], top_k=95)) == 90
+
+    # Crossing the dead fraction compacts in one pass
+    db.delete_by_page_url([f"https://site/{p}" for p in range(2, 5)])
+    assert db.index.ntotal == 75
+    assert db._tombstones == set()
+
+
+def test_readding_a_deleted_record_replaces_its_dead_vector():
+    records = _page_records(pages=10, per_page=2)
+    db = FaissDatabase()
+    db.create(dim=8)
+    db.add(records)
+    db.delete_by_page_url(["https://site/3"])
+
+    db.add(records[6:8])
+
+    assert db.index.ntotal == 20
+    hits = db.search(records[6]["embedding"], top_k=20)
+    assert len(hits) == 20
+    assert hits[0]["text"] == "p3-s0"
+
+
+def test_hnsw_compaction_rebuilds_from_live_vectors():
+    records = _page_records(pages=10, per_page=4)
+    db = FaissDatabase(ef_search=80)
+    db.create(dim=8, index_type="hnsw")
+    db.add(records)
+
+    db.delete_by_page_url([f"https://site/{p}" for p in range(3)])
+
+    assert db.index.ntotal == 28
+    assert faiss_db_mod.faiss.downcast_index(db.index.index).hnsw.efSearch == 80
+    assert db.search(records[20]["embedding"], top_k=1)[0]["text"] == "p5-s0"
+
+
+def _site_records(count: int = 300, dim: int = 8):
+    rng = np.random.default_rng(2)
+    records = []
+    for i in range(count):
+        area = "api" if i % 10 == 0 else "guide"
+        records.append(
+            {
+                "id": f"r{i}",
+                "url": f"https://docs.example.com/{area}/{i}",
+                "text": f"r{i}",
+                "hierarchy": ["Reference" if area == "api" else "Guides", f"Topic {i}"],
+                "metadata": {
+                    "page_url": f"https://docs.example.com/{area}/{i}",
+                    "crawled_at": f"2026-0{1 + i % 6}-15T08:00:00+00:00",
+                },
+                "embedding": rng.normal(size=dim).astype("float32"),
+            }
+        )
+    return records
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf_flat"])
+def test_filtered_search_returns_top_k_matching_records(index_type, tmp_path: Path):
+    records = _site_records()
+    db = FaissDatabase(nprobe=64)
+    db.create(dim=8, index_type=index_type, nlist=4)
+    if index_type == "ivf_flat":
+        db.train(np.stack([r["embedding"] for r in records]))
+    db.add(records)
+    query = records[1]["embedding"]  # a guide page: its nearest neighbours are mostly guides
+
+    api = SearchFilter(url_prefix="/api/")
+    hits = db.search(query, top_k=10, search_filter=api)
+    assert len(hits) == 10
+    assert all("/api/" in h["url"] for h in hits)
+    expected = sorted(
+        (r for r in records if "/api/" in r["url"]),
+        key=lambda r: -float(np.dot(r["embedding"], query) / np.linalg.norm(r["embedding"])),
+    )
+    assert [h["text"] for h in hits] == [r["text"] for r in expected[:10]]
+
+    db._EXACT_FILTER_MAX = 0  # force the IDSelector path
+    db._filter_cache.clear()
+    selected = db.search_batch([query], top_k=10, search_filter=api)[0]
+    assert {h["text"] for h in selected} <= {r["text"] for r in expected}
+
+
+def test_filter_by_section_crawl_date_and_absolute_url_prefix():
+    records = _site_records(60)
+    db = FaissDatabase()
+    db.create(dim=8)
+    db.add(records)
+    query = records[0]["embedding"]
+
+    by_section = db.search(query, top_k=100, search_filter=SearchFilter(section="Reference"))
+    assert {h["text"] for h in by_section} == {f"r{i}" for i in range(0, 60, 10)}
+
+    window = SearchFilter(crawled_after="2026-02-01", crawled_before="2026-04-01")
+    in_window = db.search(query, top_k=100, search_filter=window)
+    assert len(in_window) == 20
+    assert all("2026-02" <= h["metadata"]["crawled_at"] < "2026-04" for h in in_window)
+
+    combined = SearchFilter(url_prefix="https://docs.example.com/api/", crawled_after="2026-05-01")
+    assert {h["text"] for h in db.search(query, top_k=100, search_filter=combined)} == {"r10", "r40"}
+    assert db.search(query, top_k=5, search_filter=SearchFilter(section="Missing")) == []
+
+
+def test_filter_cache_follows_deletes_and_adds():
+    records = _site_records(40)
+    db = FaissDatabase()
+    db.create(dim=8)
+    db.add(records[:30])
+    api = SearchFilter(url_prefix="/api/")
+    assert len(db.search(records[0]["embedding"], top_k=10, search_filter=api)) == 3
+
+    db.delete_by_page_url([records[0]["url"]])
+    db.add(records[30:])
+    hits = db.search(records[0]["embedding"], top_k=10, search_filter=api)
+    assert {h["text"] for h in hits} == {"r10", "r20", "r30"}
+
+
+def test_search_hits_share_records_without_copying():
+    records = _page_records(pages=3, per_page=2)
+    db = FaissDatabase()
+    db.create(dim=8)
+    db.add(records)
+    queries = [records[0]["embedding"], records[0]["embedding"] * 2]
+
+    first, second = db.search_hits(queries, top_k=3)
+
+    assert [h.fid for h in first] == [h.fid for h in second]
+    assert first[0].record is second[0].record
+    assert db.search_hits(queries[:1], top_k=1)[0][0].record is first[0].record  # cached across searches
+
+    hit = first[0]
+    hit.setdefault("_origin", "initial")
+    hit["_boost_reason"] = "anchor"
+    assert hit["text"] == "p0-s0" and hit["id"] == hit.fid and hit.get("_origin") == "initial"
+    assert "_boost_reason" not in hit.record and "_origin" not in second[0]
+    assert hit.to_dict() == {**db.search(queries[0], top_k=1)[0], "_origin": "initial", "_boost_reason": "anchor"}
+
+    db.delete_by_page_url(["https://site/0"])
+    assert db.search_hits(queries[:1], top_k=1)[0][0].record is not hit.record
+
+
+def test_page_links_saved_once_per_page(tmp_path: Path):
+    db = FaissDatabase()
+    db.create(dim=4)
+    db.add([{"id": "a", "url": "https://a", "text": "hi", "embedding": [1, 0, 0, 0]}])
+    links = {"https://a": {"outgoing_links": [], "incoming_links": [{"from_page": "https://b", "anchor_text": "A"}]}}
+    db.set_page_links(links)
+    db.save(str(tmp_path / "index"))
+
+    db2 = FaissDatabase(str(tmp_path / "index"))
+    assert db2.get_page_links("https://a") == links["https://a"]
+    assert db2.get_page_links("https://missing") == {}
+
+
+def test_corpus_key_identifies_an_unmodified_saved_store(tmp_path: Path):
+    path = _save_one_record_index(tmp_path)
+    db = FaissDatabase(str(path))
+
+    assert db.corpus_key is not None
+    assert db.corpus_key == FaissDatabase(str(path)).corpus_key
+    db.add([{"id": "b", "url": "https://b", "text": "new", "embedding": [0, 1, 0, 0]}])
+    assert db.corpus_key is None
@@ -0,0 +1,129 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+
+class _FakeTokenizer:
+    def __call__(self, text, add_special_tokens=True, truncation=False, return_offsets_mapping=False):
+        words = [(i, i + len(w)) for i, w in _word_spans(text)]
+        out = {"input_ids": [0] * (len(words) + (2 if add_special_tokens else 0))}
+        if return_offsets_mapping:
+            out["offset_mapping"] = words
+        return out
+
+
+def _word_spans(text):
+    pos = 0
+    for word in text.split():
+        pos = text.index(word, pos)
+        yield pos, word
+        pos += len(word)
+
+
+class _FakeSentenceTransformer:
+    def __init__(self, name):
+        self.name = name
+        self.max_seq_length = 128
+        self.tokenizer = _FakeTokenizer()
+        self.encode_calls = []
+        self.pool_calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def _vectors(self, texts):
+        return np.array([[float(len(t)), 1.0] for t in texts])
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False):
+        if isinstance(texts, str):
+            return self._vectors([texts])[0]
+        self.encode_calls.append((list(texts), batch_size))
+        return self._vectors(texts)
+
+    def start_multi_process_pool(self, target_devices):
+        return {"devices": target_devices}
+
+    def encode_multi_process(self, texts, pool, batch_size=32, normalize_embeddings=False):
+        self.pool_calls.append((list(texts), pool["devices"]))
+        return self._vectors(texts)
+
+    def stop_multi_process_pool(self, pool):
+        pool["stopped"] = True
+
+
+@pytest.fixture
+def hf_embedder_cls(monkeypatch):
+    fake = types.ModuleType("sentence_transformers")
+    fake.SentenceTransformer = _FakeSentenceTransformer
+    monkeypatch.setitem(sys.modules, "sentence_transformers", fake)
+    monkeypatch.delitem(sys.modules, "webly.embedder.hf_sentence_embedder", raising=False)
+    import webly.embedder.hf_sentence_embedder as module
+
+    # drop the module bound to the fake sentence_transformers once the test is done
+    monkeypatch.setitem(sys.modules, "webly.embedder.hf_sentence_embedder", module)
+    return module.HFSentenceEmbedder
+
+
+def test_embed_batch_encodes_length_sorted_and_restores_order(hf_embedder_cls):
+    embedder = hf_embedder_cls("fake-model", batch_size=8)
+    texts = ["a much longer text here", "short", "mid length"]
+
+    vectors = embedder.embed_batch(texts)
+
+    assert [v[0] for v in vectors] == [float(len(t)) for t in texts]
+    assert embedder.model.encode_calls == [(["short", "mid length", "a much longer text here"], 8)]
+
+
+def test_large_batches_use_multi_process_pool(hf_embedder_cls):
+    embedder = hf_embedder_cls("fake-model", workers=2)
+    texts = [f"text {i}" for i in range(embedder._POOL_MIN_TEXTS)]
+
+    assert len(embedder.embed_batch(texts)) == len(texts)
+    assert embedder.model.pool_calls and embedder.model.pool_calls[0][1] == ["cpu", "cpu"]
+    assert embedder.model.encode_calls == []
+    embedder.close()
+    assert embedder._pool is None
+
+
+def test_token_limits_come_from_model_tokenizer(hf_embedder_cls):
+    embedder = hf_embedder_cls("fake-model")
+
+    assert embedder.max_input_tokens == 128
+    assert embedder.count_tokens("three small words") == 5
+    assert embedder.token_offsets("three small words") == [0, 6, 12]
+
+
+def test_ingest_run_feeds_the_pool_and_closes_it(hf_embedder_cls, tmp_path):
+    import json
+
+    pytest.importorskip("faiss")
+    from webly.pipeline.ingest_pipeline import IngestPipeline
+    from webly.vector_index.faiss_db import FaissDatabase
+
+    class _ResultsOnlyCrawler:
+        output_dir = str(tmp_path / "out")
+        results_filename = "results.jsonl"
+
+    (tmp_path / "out").mkdir()
+    with open(tmp_path / "out" / "results.jsonl", "w", encoding="utf-8") as f:
+        for i in range(300):
+            html = f"<html><body><p>Page {i} has its own sentence number {i * 7}.</p></body></html>"
+            f.write(json.dumps({"url": f"https://example.com/p{i}", "html": html}) + "\n")
+
+    embedder = hf_embedder_cls("fake-model", batch_size=8, workers=2)
+    assert embedder.preferred_batch_size == embedder._POOL_MIN_TEXTS
+    pipe = IngestPipeline(
+        crawler=_ResultsOnlyCrawler(),
+        index_path=str(tmp_path / "idx"),
+        embedder=embedder,
+        db=FaissDatabase(),
+        summarizer=None,
+        use_summary=False,
+    )
+    pipe.run(mode="index_only")
+
+    assert embedder.model.pool_calls
+    assert all(len(texts) >= embedder._POOL_MIN_TEXTS for texts, _ in embedder.model.pool_calls)
+    assert embedder._pool is None
@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+pytest.importorskip("webly.vector_index.faiss_db", exc_type=ImportError)
+
+from tests.ingest_benchmark import generate_corpus, run_ingest_benchmark  # noqa: E402
+
+
+def test_generate_corpus_writes_results_and_graph(tmp_path):
+    results_path = generate_corpus(tmp_path, pages=5, links_per_page=2, seed=1)
+
+    lines = results_path.read_text(encoding="utf-8").splitlines()
+    graph = json.loads((tmp_path / "graph.json").read_text(encoding="utf-8"))
+    assert len(lines) == 5
+    assert set(graph) == {json.loads(line)["url"] for line in lines}
+    again = generate_corpus(tmp_path / "again", pages=5, links_per_page=2, seed=1)
+    assert again.read_text(encoding="utf-8") == results_path.read_text(encoding="utf-8")
+
+
+def test_benchmark_reports_throughput_and_stage_timings(tmp_path):
+    report = run_ingest_benchmark(tmp_path, pages=6, dim=8)
+
+    assert report.pages == 6
+    assert report.chunks > 0
+    assert report.embed_calls == report.chunks
+    assert report.pages_per_sec > 0
+    assert {"parse", "chunk", "tokenize", "embed", "index_add", "save"} <= set(report.stage_seconds)
+    assert (tmp_path / "index" / "embeddings.index").exists()
@@ -150,3 +150,100 @@ def test_crawled_at_present_in_transformed_records(tmp_path: Path):
     assert records, "Expected at least one transformed record"
     for rec in records:
         assert rec.get("metadata", {}).get("crawled_at") == ts
+
+
+# ── Summarization tests ───────────────────────────────────────────────────────
+
+import threading  # noqa: E402
+import time  # noqa: E402
+
+
+class _FakeLLM:
+    model_name = "gpt-test"
+
+
+class _CountingSummarizer:
+    llm = _FakeLLM()
+    prompt_template = "Summarize:\n{text}"
+
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str, text: str) -> dict:
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return {"url": url, "summary": f"summary of {text}"}
+
+
+def _write_pages(out_dir: Path, bodies: list[str]) -> None:
+    out_dir.mkdir(exist_ok=True)
+    with open(out_dir / "results.jsonl", "w", encoding="utf-8") as f:
+        for i, body in enumerate(bodies):
+            f.write(json.dumps({"url": f"https://x.com/{i}", "html": f"<p>{body}</p>"}) + "\n")
+
+
+def _summarizing_pipe(tmp_path: Path, summarizer) -> IngestPipeline:
+    out_dir = tmp_path / "out"
+    out_dir.mkdir(exist_ok=True)
+    return IngestPipeline(
+        crawler=DummyCrawler(str(out_dir)),
+        index_path=str(tmp_path / "index"),
+        embedder=DummyEmbedder(),
+        db=DummyDB(),
+        summarizer=summarizer,
+        use_summary=True,
+        summary_concurrency=4,
+    )
+
+
+def test_summaries_run_concurrently_and_dedupe_identical_chunks(tmp_path: Path):
+    summarizer = _CountingSummarizer()
+    pipe = _summarizing_pipe(tmp_path, summarizer)
+    _write_pages(
+        tmp_path / "out",
+        [
+            "first page talks about apples",
+            "second page talks about pears",
+            "third page talks about plums",
+            "Was this page helpful to you?",
+            "Was this page helpful to you?",
+        ],
+    )
+
+    records = pipe.transform()
+
+    assert summarizer.calls == 4
+    assert summarizer.max_active > 1
+    assert {r["summary"] for r in records} >= {"summary of Was this page helpful to you?"}
+    assert len(records) == 5
+
+
+def test_summary_cache_skips_llm_on_reindex(tmp_path: Path):
+    _write_pages(tmp_path / "out", ["first page talks about apples", "second page talks about pears"])
+    _summarizing_pipe(tmp_path, _CountingSummarizer()).transform()
+
+    summarizer = _CountingSummarizer()
+    records = _summarizing_pipe(tmp_path, summarizer).transform()
+
+    assert summarizer.calls == 0
+    assert sorted(r["summary"] for r in records) == [
+        "summary of first page talks about apples",
+        "summary of second page talks about pears",
+    ]
+
+
+def test_summary_cache_key_tracks_model_and_prompt():
+    from webly.processors.summary_cache import SummaryCache
+
+    base = SummaryCache.make_key("text", "model-a", "prompt {text}")
+    assert base != SummaryCache.make_key("text", "model-b", "prompt {text}")
+    assert base != SummaryCache.make_key("text", "model-a", "other {text}")
+    assert base == SummaryCache.make_key("text", "model-a", "prompt {text}")
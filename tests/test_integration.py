@@ -6,6 +6,7 @@ Follows the existing test patterns (dummy objects, tmp_path, no mocking library)
 """
 
 import json
+import sqlite3
 import sys
 import types
 from pathlib import Path
@@ -96,7 +97,7 @@ def test_full_ingest_cycle(tmp_path: Path):
 
     assert result["indexed"] is True
     assert (Path(tmp_path) / "idx" / "embeddings.index").exists()
-    assert (Path(tmp_path) / "idx" / "metadata.json").exists()
+    assert (Path(tmp_path) / "idx" / "metadata.db").exists()
 
     # Checkpoint written with correct stage
     checkpoint = json.loads((Path(tmp_path) / "out" / "checkpoint.json").read_text())
@@ -159,10 +160,11 @@ def test_index_version_roundtrip(tmp_path: Path):
     pipe = _make_ingest_pipeline(tmp_path)
     pipe.run(mode="both")
 
-    meta_path = tmp_path / "idx" / "metadata.json"
-    data = json.loads(meta_path.read_text(encoding="utf-8"))
-    data["config"]["index_version"] = 99
-    meta_path.write_text(json.dumps(data), encoding="utf-8")
+    with sqlite3.connect(tmp_path / "idx" / "metadata.db") as conn:
+        config = json.loads(conn.execute("SELECT value FROM info WHERE name = 'config'").fetchone()[0])
+        config["index_version"] = 99
+        conn.execute("UPDATE info SET value = ? WHERE name = 'config'", (json.dumps(config),))
+    conn.close()
 
     with pytest.raises(RuntimeError, match="version mismatch"):
         FaissDatabase(str(tmp_path / "idx"))
@@ -180,3 +182,456 @@ def test_html_saver_includes_crawled_at():
     # Should be parseable as an ISO 8601 datetime
     parsed = datetime.fromisoformat(result["crawled_at"])
     assert parsed.tzinfo is not None
+
+
+class _CountingEmbedder(IntegrationDummyEmbedder):
+    def __init__(self):
+        self.calls = 0
+
+    def embed(self, text: str) -> list[float]:
+        self.calls += 1
+        return super().embed(text)
+
+
+def _write_results(out_dir: Path, pages: list[dict]) -> None:
+    with open(out_dir / "results.jsonl", "w", encoding="utf-8") as f:
+        for p in pages:
+            f.write(json.dumps(p) + "\n")
+
+
+def _page(url: str, body: str) -> dict:
+    return {"url": url, "html": f"<html><body><h1>{url}</h1><p>{body}</p></body></html>"}
+
+
+def test_incremental_index_only_reembeds_changed_pages(tmp_path: Path):
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    idx_dir = tmp_path / "idx"
+    _write_results(
+        out_dir,
+        [
+            _page("https://example.com/keep", "This page stays exactly the same between runs."),
+            _page("https://example.com/edit", "Original wording of the page that will change."),
+            _page("https://example.com/gone", "This page disappears before the second run."),
+        ],
+    )
+
+    def _pipe(embedder):
+        return IngestPipeline(
+            crawler=IntegrationDummyCrawler(str(out_dir), []),
+            index_path=str(idx_dir),
+            embedder=embedder,
+            db=FaissDatabase(),
+            summarizer=None,
+            use_summary=False,
+            incremental=True,
+        )
+
+    first = _pipe(_CountingEmbedder())
+    first.run(mode="index_only")
+    assert (idx_dir / "manifest.json").exists()
+
+    _write_results(
+        out_dir,
+        [
+            _page("https://example.com/keep", "This page stays exactly the same between runs."),
+            _page("https://example.com/edit", "Completely rewritten wording of the edited page."),
+            _page("https://example.com/new", "A brand new page that was added to the site."),
+        ],
+    )
+    embedder = _CountingEmbedder()
+    result = _pipe(embedder).run(mode="index_only")
+
+    assert result["delta"] == {"pages_added": 1, "pages_changed": 1, "pages_removed": 1, "pages_unchanged": 1}
+    assert embedder.calls == 2
+
+    db = FaissDatabase(str(idx_dir))
+    page_urls = {r["metadata"]["page_url"] for r in db.metadata}
+    assert page_urls == {"https://example.com/keep", "https://example.com/edit", "https://example.com/new"}
+    texts = " ".join(r["text"] for r in db.metadata)
+    assert "Original wording" not in texts
+    assert "Completely rewritten" in texts
+    assert db.index.ntotal == len(db.metadata)
+
+
+def test_incremental_sharded_index_rewrites_only_the_edited_page_shard(tmp_path: Path):
+    from webly.vector_index.sharded_faiss_db import ShardedFaissDatabase
+
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    idx_dir = tmp_path / "idx"
+    urls = [f"https://example.com/p{i}" for i in range(8)]
+    _write_results(out_dir, [_page(url, f"Stable text of page {url}.") for url in urls])
+
+    def _pipe():
+        return IngestPipeline(
+            crawler=IntegrationDummyCrawler(str(out_dir), []),
+            index_path=str(idx_dir),
+            embedder=_CountingEmbedder(),
+            db=ShardedFaissDatabase(num_shards=4),
+            summarizer=None,
+            use_summary=False,
+            incremental=True,
+        )
+
+    _pipe().run(mode="index_only")
+    before = {d.name: (d / "embeddings.index").stat().st_mtime_ns for d in idx_dir.glob("shard_*")}
+    assert len(before) == 4
+
+    _write_results(
+        out_dir,
+        [_page(url, "Rewritten text." if url == urls[0] else f"Stable text of page {url}.") for url in urls],
+    )
+    result = _pipe().run(mode="index_only")
+    assert result["delta"]["pages_changed"] == 1
+
+    after = {d.name: (d / "embeddings.index").stat().st_mtime_ns for d in idx_dir.glob("shard_*")}
+    edited = f"shard_{ShardedFaissDatabase.shard_for(urls[0], 4):03d}"
+    assert after[edited] != before[edited]
+    assert {name for name in before if after[name] != before[name]} == {edited}
+    db = ShardedFaissDatabase(index_path=str(idx_dir))
+    assert {r["metadata"]["page_url"] for r in db.metadata} == set(urls)
+    assert "Rewritten text." in " ".join(r["text"] for r in db.metadata)
+
+
+class _FailingPageEmbedder(_CountingEmbedder):
+    def __init__(self, fail_on: str):
+        super().__init__()
+        self.fail_on = fail_on
+
+    def embed(self, text: str) -> list[float]:
+        if self.fail_on in text:
+            raise RuntimeError("simulated embedding outage")
+        return super().embed(text)
+
+
+def test_page_that_failed_to_embed_is_reingested_on_the_next_incremental_run(tmp_path: Path):
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    idx_dir = tmp_path / "idx"
+    _write_results(
+        out_dir,
+        [
+            _page("https://example.com/ok", "This page embeds fine on every run."),
+            _page("https://example.com/flaky", "Unlucky page whose embedding call fails."),
+        ],
+    )
+
+    def _pipe(embedder):
+        return IngestPipeline(
+            crawler=IntegrationDummyCrawler(str(out_dir), []),
+            index_path=str(idx_dir),
+            embedder=embedder,
+            db=FaissDatabase(),
+            summarizer=None,
+            use_summary=False,
+            incremental=True,
+        )
+
+    _pipe(_FailingPageEmbedder(fail_on="Unlucky")).run(mode="index_only")
+    first = FaissDatabase(str(idx_dir))
+    assert {r["metadata"]["page_url"] for r in first.metadata} == {"https://example.com/ok"}
+
+    embedder = _CountingEmbedder()
+    result = _pipe(embedder).run(mode="index_only")
+
+    assert result["delta"]["pages_unchanged"] == 1
+    assert result["delta"]["pages_changed"] == 1
+    assert embedder.calls == 1
+    db = FaissDatabase(str(idx_dir))
+    assert {r["metadata"]["page_url"] for r in db.metadata} == {"https://example.com/ok", "https://example.com/flaky"}
+
+
+def test_incremental_without_manifest_falls_back_to_full_build(tmp_path: Path):
+    pipe = _make_ingest_pipeline(tmp_path)
+    pipe.incremental = True
+    result = pipe.run(mode="both")
+
+    assert result["indexed"] is True
+    assert "delta" not in result
+    assert (tmp_path / "idx" / "manifest.json").exists()
+
+
+def test_link_data_stored_once_per_page(tmp_path: Path):
+    pipe = _make_ingest_pipeline(tmp_path)
+    graph = {"https://example.com/home": [{"target": "https://example.com/page1", "anchor_text": "France facts"}]}
+    (tmp_path / "out" / "graph.json").write_text(json.dumps(graph), encoding="utf-8")
+    pipe.run(mode="both")
+
+    db = FaissDatabase(str(tmp_path / "idx"))
+    assert db.metadata
+    for rec in db.metadata:
+        assert "incoming_links" not in rec["metadata"]
+        assert "outgoing_links" not in rec["metadata"]
+    incoming = db.get_page_links("https://example.com/page1")["incoming_links"]
+    assert incoming[0]["anchor_text"] == "France facts"
+
+
+class _InterruptingEmbedder(_CountingEmbedder):
+    def __init__(self, fail_on_call: int):
+        super().__init__()
+        self.fail_on_call = fail_on_call
+
+    def embed(self, text: str) -> list[float]:
+        if self.calls + 1 == self.fail_on_call:
+            raise KeyboardInterrupt("simulated crash")
+        return super().embed(text)
+
+
+def test_interrupted_index_run_resumes_from_last_committed_page(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(IngestPipeline, "_CHUNK_BATCH_SIZE", 1)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    pages = [_page(f"https://example.com/p{i}", f"Body text number {i} for the resume test.") for i in range(5)]
+    _write_results(out_dir, pages)
+
+    def _pipe(embedder):
+        return IngestPipeline(
+            crawler=IntegrationDummyCrawler(str(out_dir), []),
+            index_path=str(tmp_path / "idx"),
+            embedder=embedder,
+            db=FaissDatabase(),
+            summarizer=None,
+            use_summary=False,
+        )
+
+    with pytest.raises(KeyboardInterrupt):
+        _pipe(_InterruptingEmbedder(fail_on_call=4)).run(mode="index_only")
+    checkpoint = json.loads((out_dir / "checkpoint.json").read_text())
+    assert checkpoint["stage"] == "transform_progress"
+    assert checkpoint["results_offset"] == 3
+
+    embedder = _CountingEmbedder()
+    result = _pipe(embedder).run(mode="index_only")
+
+    assert result["indexed"] is True
+    assert embedder.calls == 2
+    assert not (out_dir / "ingest_progress.jsonl").exists()
+    db = FaissDatabase(str(tmp_path / "idx"))
+    assert {r["metadata"]["page_url"] for r in db.metadata} == {p["url"] for p in pages}
+
+
+def test_progress_log_discarded_when_results_change(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(IngestPipeline, "_CHUNK_BATCH_SIZE", 1)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    _write_results(out_dir, [_page(f"https://example.com/p{i}", f"Original body {i} of the page.") for i in range(3)])
+    pipe = _make_ingest_pipeline(tmp_path)
+    pipe.embedder = _InterruptingEmbedder(fail_on_call=3)
+    with pytest.raises(KeyboardInterrupt):
+        pipe.run(mode="index_only")
+
+    _write_results(out_dir, [_page(f"https://example.com/q{i}", f"Fresh crawl body {i} here.") for i in range(3)])
+    pipe.embedder = _CountingEmbedder()
+    pipe.run(mode="index_only")
+
+    assert pipe.embedder.calls == 3
+
+
+def test_progress_log_discarded_when_embedding_model_changes(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(IngestPipeline, "_CHUNK_BATCH_SIZE", 1)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    _write_results(out_dir, [_page(f"https://example.com/p{i}", f"Body {i} of the page.") for i in range(4)])
+    pipe = _make_ingest_pipeline(tmp_path)
+    pipe.embedder = _InterruptingEmbedder(fail_on_call=3)
+    pipe.embedder.model_name = "model-a"
+    with pytest.raises(KeyboardInterrupt):
+        pipe.run(mode="index_only")
+
+    pipe.embedder = _CountingEmbedder()
+    pipe.embedder.model_name = "model-b"
+    pipe.run(mode="index_only")
+
+    assert pipe.embedder.calls == 4
+
+
+def test_load_clears_progress_log(tmp_path: Path):
+    pipe = _make_ingest_pipeline(tmp_path)
+    pipe.crawler.crawl()
+    pipe.load(pipe.transform())
+
+    assert not (tmp_path / "out" / "ingest_progress.jsonl").exists()
+
+
+def _mirrored_pages() -> list[dict]:
+    shared = "<html><body><h1>Cookie policy</h1><p>We use cookies to improve this site.</p></body></html>"
+    return [
+        {"url": "https://example.com/a/cookies", "html": shared},
+        {"url": "https://example.com/b/cookies", "html": shared},
+        _page("https://example.com/unique", "Only this page has this wording."),
+    ]
+
+
+def test_duplicate_segments_are_embedded_once(tmp_path: Path):
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    _write_results(out_dir, _mirrored_pages())
+    embedder = _CountingEmbedder()
+    pipe = IngestPipeline(
+        crawler=IntegrationDummyCrawler(str(out_dir), []),
+        index_path=str(tmp_path / "idx"),
+        embedder=embedder,
+        db=FaissDatabase(),
+        summarizer=None,
+        use_summary=False,
+    )
+    pipe.run(mode="index_only")
+
+    db = FaissDatabase(str(tmp_path / "idx"))
+    assert embedder.calls == 2
+    assert {r["metadata"]["page_url"] for r in db.metadata} == {p["url"] for p in _mirrored_pages()}
+    assert db.index.ntotal == 3
+
+
+def test_collapse_duplicate_segments_keeps_one_record_with_source_urls(tmp_path: Path):
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    _write_results(out_dir, _mirrored_pages())
+    pipe = IngestPipeline(
+        crawler=IntegrationDummyCrawler(str(out_dir), []),
+        index_path=str(tmp_path / "idx"),
+        embedder=_CountingEmbedder(),
+        db=FaissDatabase(),
+        summarizer=None,
+        use_summary=False,
+        collapse_duplicate_segments=True,
+    )
+    pipe.run(mode="index_only")
+
+    db = FaissDatabase(str(tmp_path / "idx"))
+    assert db.index.ntotal == 2
+    shared = next(r for r in db.metadata if "cookies" in r["text"])
+    assert shared["metadata"]["source_urls"] == ["https://example.com/a/cookies", "https://example.com/b/cookies"]
+
+
+def test_boilerplate_blocks_removed_across_pages(tmp_path: Path):
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    legal = "<p>All rights reserved by Example Corporation and its subsidiaries worldwide.</p>"
+    pages = [
+        {
+            "url": f"https://example.com/p{i}",
+            "html": (
+                f"<html><body><h1>Page {i}</h1><p>Distinct content number {i} about topic {i}.</p>"
+                f"{legal}</body></html>"
+            ),
+        }
+        for i in range(6)
+    ]
+    _write_results(out_dir, pages)
+    pipe = IngestPipeline(
+        crawler=IntegrationDummyCrawler(str(out_dir), []),
+        index_path=str(tmp_path / "idx"),
+        embedder=IntegrationDummyEmbedder(),
+        db=FaissDatabase(),
+        summarizer=None,
+        use_summary=False,
+        boilerplate_threshold=0.5,
+    )
+    records = pipe.transform()
+
+    assert len(records) == 6
+    assert all("All rights reserved" not in r["text"] for r in records)
+    assert all("Distinct content" in r["text"] for r in records)
+
+
+def test_chunk_cache_skips_parsing_on_reindex(tmp_path: Path, monkeypatch):
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    _write_results(out_dir, [_page(f"https://example.com/c{i}", f"Cached chunk body number {i}.") for i in range(3)])
+
+    def _pipe():
+        return IngestPipeline(
+            crawler=IntegrationDummyCrawler(str(out_dir), []),
+            index_path=str(tmp_path / "idx"),
+            embedder=_CountingEmbedder(),
+            db=FaissDatabase(),
+            summarizer=None,
+            use_summary=False,
+        )
+
+    _pipe().run(mode="index_only")
+    assert (out_dir / ".chunk_cache.db").exists()
+
+    second = _pipe()
+    processed = []
+    original = second.page_processor.process
+
+    def _counting_process(url, html):
+        processed.append(url)
+        return original(url, html)
+
+    monkeypatch.setattr(second.page_processor, "process", _counting_process)
+    second.run(mode="index_only")
+    assert processed == []
+    assert second.embedder.calls == 3
+
+    second.page_processor.chunker.max_words = 10
+    second.run(mode="index_only")
+    assert len(processed) == 3
+
+
+class _BatchingEmbedder(_CountingEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(len(texts))
+        return [IntegrationDummyEmbedder.embed(self, t) for t in texts]
+
+
+def test_segments_are_embedded_through_embed_batch(tmp_path: Path):
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    _write_results(out_dir, [_page(f"https://example.com/b{i}", f"Batch embedded body number {i}.") for i in range(5)])
+    embedder = _BatchingEmbedder()
+    pipe = IngestPipeline(
+        crawler=IntegrationDummyCrawler(str(out_dir), []),
+        index_path=str(tmp_path / "idx"),
+        embedder=embedder,
+        db=FaissDatabase(),
+        summarizer=None,
+        use_summary=False,
+    )
+    pipe.run(mode="index_only")
+
+    assert embedder.batches == [5]
+    assert embedder.calls == 0
+    assert FaissDatabase(str(tmp_path / "idx")).index.ntotal == 5
+
+
+def test_ivf_index_is_trained_on_the_run_before_vectors_are_added(tmp_path: Path):
+    calls = []
+
+    class RecordingDatabase(FaissDatabase):
+        def train(self, vectors):
+            calls.append(("train", len(vectors)))
+            super().train(vectors)
+
+        def add(self, records):
+            calls.append(("add", self.is_trained))
+            super().add(records)
+
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    pages = [_page(f"https://example.com/p{i}", f"Page number {i} talks about topic {i * 7}.") for i in range(80)]
+    _write_results(out_dir, pages)
+    pipe = IngestPipeline(
+        crawler=IntegrationDummyCrawler(str(out_dir), []),
+        index_path=str(tmp_path / "idx"),
+        embedder=IntegrationDummyEmbedder(),
+        db=RecordingDatabase(),
+        summarizer=None,
+        use_summary=False,
+        index_type="ivf_flat",
+    )
+    pipe.run(mode="index_only")
+
+    assert calls[0] == ("train", 80)
+    assert all(trained for name, trained in calls[1:] if name == "add")
+    assert "index_train" in pipe.stage_timings
+    db = FaissDatabase(str(tmp_path / "idx"))
+    assert db.index.ntotal == 80
+    assert db._index_type == "ivf_flat" and db._ivf_nlist == 2
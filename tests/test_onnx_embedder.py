@@ -0,0 +1,113 @@
+import json
+import sys
+import types
+
+import numpy as np
+import pytest
+
+
+class _FakeTokenizer:
+    model_max_length = 512
+
+    def __call__(self, texts, padding=False, truncation=False, max_length=None, return_tensors=None, **kwargs):
+        batch = [texts] if isinstance(texts, str) else texts
+        ids = [[len(w) for w in t.split()][: max_length or None] for t in batch]
+        width = max(len(row) for row in ids)
+        return {
+            "input_ids": np.array([row + [0] * (width - len(row)) for row in ids]),
+            "attention_mask": np.array([[1] * len(row) + [0] * (width - len(row)) for row in ids]),
+        }
+
+
+class _FakeSession:
+    """Hidden state of token i is [word_length, 1, 0] so pooling is easy to check."""
+
+    def __init__(self, path, sess_options=None, providers=None):
+        self.path = path
+
+    def get_inputs(self):
+        return [types.SimpleNamespace(name="input_ids"), types.SimpleNamespace(name="attention_mask")]
+
+    def run(self, _outputs, feeds):
+        ids = feeds["input_ids"].astype(np.float32)
+        hidden = np.stack([ids, np.ones_like(ids), np.zeros_like(ids)], axis=-1)
+        return [hidden]
+
+
+@pytest.fixture
+def onnx_embedder_cls(monkeypatch):
+    ort = types.ModuleType("onnxruntime")
+    ort.SessionOptions = lambda: types.SimpleNamespace()
+    ort.InferenceSession = _FakeSession
+    transformers = types.ModuleType("transformers")
+    transformers.AutoTokenizer = types.SimpleNamespace(from_pretrained=lambda _path: _FakeTokenizer())
+    monkeypatch.setitem(sys.modules, "onnxruntime", ort)
+    monkeypatch.setitem(sys.modules, "transformers", transformers)
+    from webly.embedder.onnx_embedder import OnnxSentenceEmbedder
+
+    return OnnxSentenceEmbedder
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    (tmp_path / "model_int8.onnx").write_bytes(b"")
+    (tmp_path / "webly_onnx.json").write_text(json.dumps({"max_seq_length": 256, "pooling": "mean"}), encoding="utf-8")
+    return str(tmp_path)
+
+
+def _with_pooling(model_dir: str, pooling: str) -> str:
+    with open(f"{model_dir}/webly_onnx.json", "w", encoding="utf-8") as f:
+        json.dump({"max_seq_length": 256, "pooling": pooling}, f)
+    return model_dir
+
+
+def test_mean_pooled_and_normalized_vectors(onnx_embedder_cls, model_dir):
+    embedder = onnx_embedder_cls("fake/model", model_dir=model_dir)
+
+    vec = np.array(embedder.embed("aa bbbb"))
+
+    assert embedder.dim == 3
+    assert embedder.max_input_tokens == 256
+    # mean of [2,1,0] and [4,1,0] is [3,1,0]; padding never leaks into the mean
+    assert vec == pytest.approx(np.array([3.0, 1.0, 0.0]) / np.sqrt(10.0))
+    assert np.linalg.norm(vec) == pytest.approx(1.0)
+
+
+def test_embed_batch_matches_embed_in_callers_order(onnx_embedder_cls, model_dir):
+    embedder = onnx_embedder_cls("fake/model", model_dir=model_dir, batch_size=2)
+    texts = ["a much longer sentence here", "hi", "mid sized text"]
+
+    batch = embedder.embed_batch(texts)
+
+    assert [np.array(v) for v in batch] == [pytest.approx(np.array(embedder.embed(t))) for t in texts]
+
+
+def test_cls_and_max_pooling_follow_the_exported_config(onnx_embedder_cls, model_dir):
+    cls_vec = np.array(onnx_embedder_cls("fake/model", model_dir=_with_pooling(model_dir, "cls")).embed("aa bbbb"))
+    max_vec = np.array(onnx_embedder_cls("fake/model", model_dir=_with_pooling(model_dir, "max")).embed("bbbb aa"))
+
+    assert cls_vec == pytest.approx(np.array([2.0, 1.0, 0.0]) / np.sqrt(5.0))
+    assert max_vec == pytest.approx(np.array([4.0, 1.0, 0.0]) / np.sqrt(17.0))
+
+
+def test_unsupported_pooling_mode_is_rejected(onnx_embedder_cls, model_dir):
+    with pytest.raises(ValueError, match="mean_sqrt_len"):
+        onnx_embedder_cls("fake/model", model_dir=_with_pooling(model_dir, "mean_sqrt_len"))
+
+
+def test_pooling_mode_read_from_sentence_transformers_config(onnx_embedder_cls, tmp_path, monkeypatch):
+    from webly.embedder import onnx_embedder
+
+    config = tmp_path / "1_Pooling" / "config.json"
+    config.parent.mkdir()
+    config.write_text(
+        json.dumps({"word_embedding_dimension": 3, "pooling_mode_cls_token": True, "pooling_mode_mean_tokens": False}),
+        encoding="utf-8",
+    )
+    hub = types.ModuleType("huggingface_hub")
+    hub.hf_hub_download = lambda _repo, filename: str(tmp_path / filename)
+    monkeypatch.setitem(sys.modules, "huggingface_hub", hub)
+
+    assert onnx_embedder.read_pooling_mode("fake/cls-model") == "cls"
+    config.write_text(json.dumps({"pooling_mode_mean_tokens": True, "pooling_mode_max_tokens": True}), encoding="utf-8")
+    assert onnx_embedder.read_pooling_mode("fake/cls-model") == "mean+max"
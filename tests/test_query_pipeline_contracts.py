@@ -75,3 +75,32 @@ def test_query_result_falls_back_when_threshold_filters_everything():
     assert result.supported is False
     assert "couldn't find anything" in result.answer.lower()
     assert result.sources == []
+
+
+def test_query_result_passes_search_filter_to_every_search_of_that_question_only():
+    from webly.vector_index.search_filter import SearchFilter
+
+    class _RecordingVectorDb(_DummyVectorDb):
+        def __init__(self, results):
+            super().__init__(results)
+            self.seen_filters = []
+
+        def search(self, _query_embedding, top_k=5, search_filter=None):
+            self.seen_filters.append(search_filter)
+            return list(self._results[:top_k])
+
+    agent = _DummyChatAgent([])
+    agent.vector_db = _RecordingVectorDb(
+        [{"id": "api", "url": "https://docs.example.com/api/x", "text": "Api", "score": 0.9, "hierarchy": ["API"]}]
+    )
+    qp = QueryPipeline(chat_agent=agent, enable_hybrid=False, retrieval_mode="classic")
+    api_only = SearchFilter(url_prefix="/api/")
+
+    qp.query_result("filtered question", search_filter=api_only)
+    # initial search plus the section expansion search
+    assert len(agent.vector_db.seen_filters) > 1
+    assert set(agent.vector_db.seen_filters) == {api_only}
+
+    agent.vector_db.seen_filters.clear()
+    qp.query_result("unfiltered question")
+    assert set(agent.vector_db.seen_filters) == {None}
@@ -1,4 +1,6 @@
 from webly.pipeline.query_retriever import QueryRetriever
+from webly.vector_index.search_filter import SearchFilter
+from webly.vector_index.search_hit import SearchHit
 
 
 class _DummyEmbedder:
@@ -7,18 +9,22 @@ class _DummyEmbedder:
 
 
 class _DummyVectorDb:
-    def __init__(self, results, metadata=None):
+    def __init__(self, results, metadata=None, page_links=None):
         self._results = list(results)
         self.metadata = list(metadata or [])
+        self.page_links = dict(page_links or {})
+
+    def get_page_links(self, page_url):
+        return self.page_links.get(page_url, {})
 
     def search(self, _query_embedding, top_k=5):
         return list(self._results[:top_k])
 
 
 class _DummyChatAgent:
-    def __init__(self, results, metadata=None):
+    def __init__(self, results, metadata=None, page_links=None):
         self.embedder = _DummyEmbedder()
-        self.vector_db = _DummyVectorDb(results, metadata=metadata)
+        self.vector_db = _DummyVectorDb(results, metadata=metadata, page_links=page_links)
 
 
 class _DummyLogger:
@@ -77,3 +83,136 @@ def test_query_retriever_combines_and_dedupes_by_canonical_url():
 
     assert len(results) == 1
     assert results[0]["id"] == "a"
+
+
+def test_query_retriever_resolves_backlinks_from_page_link_table():
+    page_links = {
+        "https://docs.example.com/auth": {
+            "outgoing_links": [],
+            "incoming_links": [{"from_page": "https://docs.example.com/", "anchor_text": "Authentication guide"}],
+        }
+    }
+    retriever = QueryRetriever(
+        chat_agent=_DummyChatAgent([], page_links=page_links),
+        logger=_DummyLogger(),
+        enable_hybrid=False,
+    )
+    seeds = [{"id": "s", "hierarchy": ["Auth"], "metadata": {"page_url": "https://docs.example.com/auth"}}]
+    inline = [{"id": "i", "metadata": {"incoming_links": [{"anchor_text": "Inline anchor"}]}}]
+
+    assert retriever.collect_hints_for_rewrite(seeds + inline) == ["Auth", "Authentication guide", "Inline anchor"]
+
+
+def test_query_retriever_batches_expansion_queries():
+    class _BatchEmbedder:
+        def __init__(self):
+            self.batches = []
+
+        def embed(self, _text):
+            raise AssertionError("expansion queries should be embedded in one batch")
+
+        def embed_batch(self, texts):
+            self.batches.append(list(texts))
+            return [[float(i), 1.0] for i in range(len(texts))]
+
+    class _BatchVectorDb(_DummyVectorDb):
+        def __init__(self):
+            super().__init__([])
+            self.batch_calls = []
+
+        def search_batch(self, query_embeddings, top_k=5):
+            self.batch_calls.append(len(query_embeddings))
+            return [[{"id": f"hit-{int(q[0])}", "score": 0.9}] for q in query_embeddings]
+
+    chat_agent = _DummyChatAgent([])
+    chat_agent.embedder = _BatchEmbedder()
+    chat_agent.vector_db = _BatchVectorDb()
+    retriever = QueryRetriever(chat_agent=chat_agent, logger=_DummyLogger(), enable_hybrid=False)
+    seeds = [
+        {"id": "a", "hierarchy": ["Install"]},
+        {"id": "b", "hierarchy": ["Configure"]},
+        {"id": "c", "hierarchy": ["Install"]},
+    ]
+
+    results = retriever.expand_via_section("how to set up", seeds)
+
+    assert chat_agent.embedder.batches == [["how to set up Install", "how to set up Configure"]]
+    assert chat_agent.vector_db.batch_calls == [2]
+    assert [r["id"] for r in results] == ["hit-0", "hit-1"]
+    assert all(r["_origin"] == "section" and r["_boost_reason"] == "section" for r in results)
+
+
+def test_query_retriever_applies_search_filter_to_vector_and_bm25_hits():
+    class _FilteringVectorDb(_DummyVectorDb):
+        def search(self, _query_embedding, top_k=5, search_filter=None):
+            self.seen_filter = search_filter
+            return [r for r in self._results if search_filter is None or search_filter.matches(r)][:top_k]
+
+    docs = [
+        {"id": "api", "url": "https://docs.example.com/api/auth", "text": "Token authentication for the API"},
+        {"id": "guide", "url": "https://docs.example.com/guide/auth", "text": "Token authentication guide"},
+        {"id": "news", "url": "https://docs.example.com/news", "text": "Release notes for this month"},
+        {"id": "faq", "url": "https://docs.example.com/faq", "text": "Frequently asked questions"},
+    ]
+    agent = _DummyChatAgent([])
+    agent.vector_db = _FilteringVectorDb(docs, metadata=docs)
+    retriever = QueryRetriever(chat_agent=agent, logger=_DummyLogger(), enable_hybrid=True)
+    api_only = SearchFilter(url_prefix="/api/")
+
+    results = retriever.search("token authentication", k=5, tag="initial", search_filter=api_only)
+
+    assert agent.vector_db.seen_filter == api_only
+    # one vector hit and one BM25 hit, both on the only /api/ page
+    assert [item["id"] for item in results] == ["api", "api"]
+    # the filter belongs to that call only; the retriever is shared by concurrent queries
+    retriever.search("token authentication", k=5, tag="initial")
+    assert agent.vector_db.seen_filter is None
+
+
+def test_query_retriever_materializes_only_reranked_records():
+    class _HitVectorDb(_DummyVectorDb):
+        def search_hits(self, embeddings, top_k=5):
+            return [[SearchHit(r, fid=i, score=0.9 - i / 10) for i, r in enumerate(self._results[:top_k])]
+                    for _ in embeddings]
+
+    stored = [
+        {"url": "https://docs.example.com/a", "text": "Alpha"},
+        {"url": "https://docs.example.com/b", "text": "Beta"},
+    ]
+    agent = _DummyChatAgent([])
+    agent.vector_db = _HitVectorDb(stored)
+    retriever = QueryRetriever(chat_agent=agent, logger=_DummyLogger(), enable_hybrid=False)
+
+    hits = retriever.search(["first", "second"], k=2, tag="initial")
+    assert all(isinstance(hit, SearchHit) for hit in hits)
+    combined = retriever.combine_and_rerank(hits)
+
+    assert [type(r) for r in combined] == [dict, dict]
+    assert [(r["text"], r["id"], r["_origin"]) for r in combined] == [("Alpha", 0, "initial"), ("Beta", 1, "initial")]
+    assert stored == [
+        {"url": "https://docs.example.com/a", "text": "Alpha"},
+        {"url": "https://docs.example.com/b", "text": "Beta"},
+    ]
+
+
+def test_bm25_corpus_is_built_once_per_saved_index():
+    class _SavedIndexVectorDb(_DummyVectorDb):
+        corpus_key = ("metadata.db", 1, 1)
+        scans = 0
+
+        def iter_records(self):
+            type(self).scans += 1
+            return enumerate(self.metadata)
+
+    docs = [
+        {"id": "a", "url": "https://docs.example.com/a", "text": "Token authentication for the API"},
+        {"id": "b", "url": "https://docs.example.com/b", "text": "Release notes for this month"},
+    ]
+    for _ in range(3):
+        # the service builds a new runtime (DB and retriever) per request
+        agent = _DummyChatAgent([])
+        agent.vector_db = _SavedIndexVectorDb([], metadata=docs)
+        retriever = QueryRetriever(chat_agent=agent, logger=_DummyLogger(), enable_hybrid=True)
+        assert [hit["id"] for hit in retriever._bm25_search("token authentication")] == ["a"]
+
+    assert _SavedIndexVectorDb.scans == 1
@@ -29,7 +29,7 @@ class _DummyIngestPipeline:
 
 
 class _DummyQueryPipeline:
-    def query_result(self, question: str, retry_on_empty: bool = False, memory_context: str = ""):
+    def query_result(self, question: str, retry_on_empty: bool = False, memory_context: str = "", search_filter=None):
         return QueryResult(
             answer=f"answer:{question}",
             supported=True,
@@ -69,14 +69,14 @@ def test_build_runtime_passes_score_threshold_to_query_pipeline(monkeypatch, tmp
     class DummyEmbedder:
         dim = 4
 
-        def __init__(self, model_name):
+        def __init__(self, model_name, **kwargs):
             self.model_name = model_name
 
     hf_module.HFSentenceEmbedder = DummyEmbedder
     monkeypatch.setitem(sys.modules, "webly.embedder.hf_sentence_embedder", hf_module)
 
     class DummyDb:
-        def __init__(self):
+        def __init__(self, **kwargs):
             self.index = None
 
     class DummyCrawler:
@@ -130,3 +130,53 @@ def test_build_runtime_passes_score_threshold_to_query_pipeline(monkeypatch, tmp
 
     assert runtime.query_pipeline is not None
     assert captured["score_threshold"] == 0.72
+
+
+def test_build_runtime_picks_the_database_from_the_saved_index_layout(monkeypatch, tmp_path):
+    from webly.vector_index.faiss_db import FaissDatabase
+    from webly.vector_index.sharded_faiss_db import ShardedFaissDatabase
+
+    hf_module = types.ModuleType("webly.embedder.hf_sentence_embedder")
+
+    class DummyEmbedder:
+        dim = 4
+
+        def __init__(self, model_name, **kwargs):
+            self.model_name = model_name
+
+    hf_module.HFSentenceEmbedder = DummyEmbedder
+    monkeypatch.setitem(sys.modules, "webly.embedder.hf_sentence_embedder", hf_module)
+
+    index_dir = tmp_path / "out" / "index"
+    sharded = ShardedFaissDatabase(num_shards=2)
+    sharded.create(dim=4)
+    records = [{"id": f"r{i}", "url": f"https://example.com/p{i}", "embedding": [1, i, 0, 0]} for i in range(6)]
+    sharded.add(records)
+    sharded.save(str(index_dir))
+
+    def _runtime(index_shards):
+        cfg = ProjectConfig.from_dict(
+            {
+                "start_url": "https://example.com/docs",
+                "allowed_domains": ["example.com"],
+                "embedding_model": "sentence-transformers/all-MiniLM-L6-v2",
+                "index_shards": index_shards,
+            },
+            output_dir=str(tmp_path / "out"),
+            index_dir=str(index_dir),
+        )
+        return build_runtime(cfg)
+
+    # index_shards was lowered after a sharded ingest: the saved shards still load
+    runtime = _runtime(1)
+    assert isinstance(runtime.db, ShardedFaissDatabase)
+    assert runtime.ensure_index_loaded()
+    assert runtime.db.num_shards == 2 and len(runtime.db.metadata) == 6
+
+    # the next full ingest builds the configured single index, in the plain layout
+    runtime.db.create(dim=4)
+    runtime.db.add(records)
+    runtime.db.save(str(index_dir))
+    assert not (index_dir / "shards.json").exists()
+    assert isinstance(_runtime(1).db, FaissDatabase)
+    assert len(FaissDatabase(str(index_dir)).metadata) == 6
@@ -5,12 +5,18 @@ from webly.service.app import create_app
 
 
 class _DummyRuntime:
-    def query_result(self, question: str, *, retry_on_empty: bool = False, memory_context: str = "") -> QueryResult:
+    def query_result(
+        self, question: str, *, retry_on_empty: bool = False, memory_context: str = "", search_filter=None
+    ) -> QueryResult:
         return QueryResult(
             answer=f"answer:{question}",
             supported=True,
             sources=[SourceRef(chunk_id="chunk-1", url="https://example.com/docs", section="Docs")],
-            trace={"retry_on_empty": retry_on_empty, "memory_context": memory_context},
+            trace={
+                "retry_on_empty": retry_on_empty,
+                "memory_context": memory_context,
+                "search_filter": search_filter.to_dict() if search_filter else None,
+            },
         )
 
 
@@ -63,6 +69,7 @@ def test_query_endpoint_returns_structured_query_result(tmp_path, monkeypatch):
             "question": "How does this work?",
             "memory_context": "Earlier context",
             "retry_on_empty": True,
+            "search_filter": {"url_prefix": "/api/", "crawled_after": "2026-01-01"},
         },
     )
 
@@ -75,6 +82,7 @@ def test_query_endpoint_returns_structured_query_result(tmp_path, monkeypatch):
     ]
     assert body["trace"]["retry_on_empty"] is True
     assert body["trace"]["memory_context"] == "Earlier context"
+    assert body["trace"]["search_filter"] == {"url_prefix": "/api/", "crawled_after": "2026-01-01"}
 
 
 def test_query_endpoint_returns_404_for_missing_project(tmp_path):
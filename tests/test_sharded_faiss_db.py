@@ -0,0 +1,143 @@
+import json
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy", exc_type=ImportError)
+faiss_db_mod = pytest.importorskip("webly.vector_index.faiss_db", exc_type=ImportError)
+FaissDatabase = faiss_db_mod.FaissDatabase
+from webly.vector_index.sharded_faiss_db import ShardedFaissDatabase  # noqa: E402
+
+
+def _records(count: int, pages: int = 12, dim: int = 8, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim)).astype("float32")
+    return [
+        {
+            "id": f"r{i}",
+            "url": f"https://docs.example.com/p{i % pages}",
+            "text": f"chunk {i}",
+            "metadata": {"page_url": f"https://docs.example.com/p{i % pages}"},
+            "embedding": vectors[i].tolist(),
+        }
+        for i in range(count)
+    ]
+
+
+def test_sharded_search_matches_single_index():
+    records = _records(200)
+    single = FaissDatabase()
+    single.create(dim=8)
+    single.add(records)
+    sharded = ShardedFaissDatabase(num_shards=4)
+    sharded.create(dim=8)
+    sharded.add(records)
+
+    # Every page lives in exactly one shard
+    for shard in sharded.shards:
+        urls = {rec["url"] for rec in shard.metadata}
+        assert all(ShardedFaissDatabase.shard_for(url, 4) == sharded.shards.index(shard) for url in urls)
+    assert sum(len(shard.metadata) for shard in sharded.shards) == 200
+
+    queries = np.random.default_rng(1).standard_normal((5, 8)).astype("float32")
+    expected = single.search_batch(queries, top_k=7)
+    got = sharded.search_batch(queries, top_k=7)
+    assert [[r["id"] for r in hits] for hits in got] == [[r["id"] for r in hits] for hits in expected]
+    assert [r["score"] for r in got[0]] == sorted((r["score"] for r in got[0]), reverse=True)
+
+
+def test_incremental_save_rewrites_only_changed_shards(tmp_path: Path):
+    path = tmp_path / "index"
+    db = ShardedFaissDatabase(num_shards=4)
+    db.create(dim=8)
+    db.add(_records(120))
+    db.set_page_links({f"https://docs.example.com/p{i}": {"outgoing_links": []} for i in range(12)})
+    db.save(str(path))
+    assert (path / "shards.json").is_file()
+    assert faiss_db_mod.index_exists(str(path))
+    before = {d.name: (d / "embeddings.index").stat().st_mtime_ns for d in path.glob("shard_*")}
+
+    reloaded = ShardedFaissDatabase(num_shards=2)
+    reloaded.load(str(path))
+    assert reloaded.num_shards == 4
+    changed_url = "https://docs.example.com/p3"
+    reloaded.delete_by_page_url([changed_url])
+    reloaded.add([{**rec, "id": rec["id"] + "-v2"} for rec in _records(120) if rec["url"] == changed_url])
+    reloaded.set_page_links({f"https://docs.example.com/p{i}": {"outgoing_links": []} for i in range(12)})
+    reloaded.save(str(path))
+
+    after = {d.name: (d / "embeddings.index").stat().st_mtime_ns for d in path.glob("shard_*")}
+    owner = f"shard_{ShardedFaissDatabase.shard_for(changed_url, 4):03d}"
+    assert after[owner] != before[owner]
+    assert all(after[name] == before[name] for name in before if name != owner)
+
+    final = ShardedFaissDatabase(index_path=str(path))
+    assert len(final.ids_for_page_urls([changed_url])) == 10
+    assert final.get_id_by_key("r3-v2") != -1
+    assert final.get_page_links(changed_url) == {"outgoing_links": []}
+
+
+def test_single_index_refuses_sharded_directory(tmp_path: Path):
+    db = ShardedFaissDatabase(num_shards=2)
+    db.create(dim=8)
+    db.add(_records(10))
+    db.save(str(tmp_path))
+    with pytest.raises(RuntimeError, match="sharded"):
+        FaissDatabase().load(str(tmp_path))
+
+
+def test_deletes_leave_shards_without_the_ids_read_only(tmp_path: Path):
+    db = ShardedFaissDatabase(num_shards=4)
+    db.create(dim=8)
+    db.add(_records(40))
+    db.save(str(tmp_path))
+
+    loaded = ShardedFaissDatabase(index_path=str(tmp_path))
+    url = "https://docs.example.com/p5"
+    owner = ShardedFaissDatabase.shard_for(url, 4)
+    assert loaded.delete_many([loaded.get_id_by_key("r5")]) == 1
+    assert loaded.delete_by_page_url([url]) == 2
+
+    assert loaded._dirty == {owner}
+    assert [shard._store.read_only for shard in loaded.shards] == [n != owner for n in range(4)]
+
+
+def test_rebuild_shard_replaces_only_that_shard():
+    db = ShardedFaissDatabase(num_shards=3)
+    db.create(dim=8)
+    records = _records(60)
+    db.add(records)
+    db.set_page_links({rec["url"]: {"outgoing_links": [rec["url"]]} for rec in records})
+    db._dirty.clear()
+    others = [shard for n, shard in enumerate(db.shards) if n != 1]
+
+    own = [rec for i, rec in enumerate(records) if db._shard_of_record(rec, i) == 1]
+    db.rebuild_shard(1, own[:2])
+
+    assert db._dirty == {1}
+    assert [shard for n, shard in enumerate(db.shards) if n != 1] == others
+    assert len(db.shards[1].metadata) == 2
+    assert db.get_page_links(own[0]["url"]) == {"outgoing_links": [own[0]["url"]]}
+    with pytest.raises(ValueError, match="other shards"):
+        db.rebuild_shard(0, own[:1])
+
+
+def test_plain_index_loads_as_one_shard_until_recreated(tmp_path: Path):
+    single = FaissDatabase()
+    single.create(dim=8)
+    single.add(_records(20))
+    single.save(str(tmp_path))
+
+    db = ShardedFaissDatabase(num_shards=4, index_path=str(tmp_path))
+    assert db.num_shards == 1 and len(db.metadata) == 20
+    db.delete_by_page_url(["https://docs.example.com/p0"])
+    db.save(str(tmp_path))
+    assert not (tmp_path / "shards.json").exists()
+    assert len(FaissDatabase(str(tmp_path)).metadata) == 18
+
+    db.create(dim=8)
+    db.add(_records(20))
+    db.save(str(tmp_path))
+    assert db.num_shards == 4
+    assert json.loads((tmp_path / "shards.json").read_text())["num_shards"] == 4
+    assert not (tmp_path / "embeddings.index").exists()
@@ -0,0 +1,93 @@
+from webly.processors.text_chunkers import SlidingTextChunker
+
+_MENU = "<p>Products Pricing Customers Careers Contact us today</p>"
+
+
+def _html(body: str) -> str:
+    return f"<html><body><h1>Title</h1>{_MENU}<p>{body}</p></body></html>"
+
+
+def test_page_block_keys_ignore_whitespace_and_case():
+    chunker = SlidingTextChunker()
+    keys = chunker.page_block_keys(_html("Some page specific words here."))
+
+    assert SlidingTextChunker.block_key("products  pricing customers\ncareers contact us today") in keys
+    assert len(keys) == 2
+
+
+def test_boilerplate_blocks_are_dropped_from_chunks():
+    chunker = SlidingTextChunker()
+    chunker.boilerplate_keys = {SlidingTextChunker.block_key("Products Pricing Customers Careers Contact us today")}
+
+    chunks = chunker.chunk_html(_html("Some page specific words here."), "https://example.com/a")
+
+    text = " ".join(c["text"] for c in chunks)
+    assert "Pricing" not in text
+    assert "page specific words" in text
+
+
+def test_page_made_only_of_boilerplate_yields_no_chunks():
+    chunker = SlidingTextChunker()
+    chunker.boilerplate_keys = {SlidingTextChunker.block_key("Products Pricing Customers Careers Contact us today")}
+
+    assert chunker.chunk_html(f"<html><body>{_MENU}</body></html>", "https://example.com/b") == []
+
+
+def test_sections_follow_heading_hierarchy_in_one_pass():
+    html = (
+        "<html><body><h1>Guide</h1><p>Intro words for the whole guide.</p>"
+        "<div><h2>Install</h2><p>Run the installer with default options.</p>"
+        "<h3>Linux</h3><p>Use the package manager on Linux hosts.</p></div>"
+        "<h2>Usage</h2><p>Call the command line tool afterwards.</p></body></html>"
+    )
+    sections = SlidingTextChunker()._iter_sections(SlidingTextChunker()._clean_html(html))
+
+    assert [(s["hierarchy"], [b["text"] for b in s["blocks"]]) for s in sections] == [
+        (["Guide"], ["Intro words for the whole guide."]),
+        (["Guide", "Install"], ["Run the installer with default options."]),
+        (["Guide", "Install", "Linux"], ["Use the package manager on Linux hosts."]),
+        (["Guide", "Usage"], ["Call the command line tool afterwards."]),
+    ]
+
+
+def test_missing_parent_headings_are_dropped_from_hierarchy():
+    chunks = SlidingTextChunker().chunk_html(
+        "<html><body><h3>Deep</h3><p>Text under a deep heading only.</p></body></html>", "https://example.com/d"
+    )
+
+    assert chunks[0]["hierarchy"] == ["Deep"]
+
+
+def _block_texts(html: str) -> list[str]:
+    chunker = SlidingTextChunker()
+    return [b["text"] for s in chunker._iter_sections(chunker._clean_html(html)) for b in s["blocks"]]
+
+
+def test_nested_blocks_are_emitted_once():
+    html = (
+        "<html><body><h1>API</h1>"
+        "<pre><code>client = Client(api_key=KEY, timeout=30)</code></pre>"
+        "<ul><li><p>First list item with a paragraph inside.</p></li></ul>"
+        "<table><tr><th>Name</th><th>Type</th><th>Notes</th></tr>"
+        "<tr><td>timeout</td><td>int</td><td>seconds before giving up</td></tr></table>"
+        "</body></html>"
+    )
+
+    assert _block_texts(html) == [
+        "client = Client(api_key=KEY, timeout=30)",
+        "First list item with a paragraph inside.",
+        "| Name | Type | Notes |\n| --- | --- | --- |\n| timeout | int | seconds before giving up |",
+    ]
+
+
+def test_layout_table_with_headings_is_walked_not_rendered():
+    html = (
+        "<html><body><table><tr><td><h1>Title</h1><p>Body text placed inside a layout table.</p></td></tr>"
+        "</table></body></html>"
+    )
+    chunker = SlidingTextChunker()
+    sections = chunker._iter_sections(chunker._clean_html(html))
+
+    assert [(s["hierarchy"], [b["text"] for b in s["blocks"]]) for s in sections] == [
+        (["Title"], ["Body text placed inside a layout table."]),
+    ]
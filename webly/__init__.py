@@ -6,6 +6,7 @@ from webly.project_config import ProjectConfig
 from webly.query_result import QueryResult, SourceRef
 from webly.runtime import ProjectRuntime, build_runtime
 from webly.vector_index.faiss_db import FaissDatabase
+from webly.vector_index.sharded_faiss_db import ShardedFaissDatabase
 
 from .framework import PipelineConfig, build_pipelines
 
@@ -20,4 +21,5 @@ __all__ = [
     "IngestPipeline",
     "QueryPipeline",
     "FaissDatabase",
+    "ShardedFaissDatabase",
 ]
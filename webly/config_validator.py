@@ -53,12 +53,36 @@ def validate_pipeline_config(config: dict) -> None:
                     len(emb) > len("openai:"),
                     f"'embedding_model' openai prefix must be followed by a model name, got: {emb!r}",
                 )
+            elif emb.startswith("onnx:"):
+                _check(
+                    len(emb) > len("onnx:") and " " not in emb,
+                    f"'embedding_model' onnx prefix must be followed by a HuggingFace path, got: {emb!r}",
+                )
             else:
                 _check(
                     " " not in emb,
-                    f"'embedding_model' must be 'openai:<model-name>' or a HuggingFace path (no spaces), got: {emb!r}",
+                    f"'embedding_model' must be 'openai:<model-name>', 'onnx:<hf-path>' or a HuggingFace path "
+                    f"(no spaces), got: {emb!r}",
                 )
 
+    # ── embedding_dimensions (int >= 0, text-embedding-3 models only) ─────────
+    embedding_dimensions = config.get("embedding_dimensions")
+    if embedding_dimensions is not None:
+        _check(
+            isinstance(embedding_dimensions, int)
+            and not isinstance(embedding_dimensions, bool)
+            and embedding_dimensions >= 0,
+            f"'embedding_dimensions' must be a non-negative integer, got: {embedding_dimensions!r}",
+        )
+        model = (emb or "").strip()
+        if model.lower() in ("", "default"):
+            model = "openai:text-embedding-3-small"
+        if isinstance(embedding_dimensions, int) and embedding_dimensions > 0:
+            _check(
+                model.startswith("openai:text-embedding-3"),
+                f"'embedding_dimensions' is only supported by OpenAI text-embedding-3 models, got: {model!r}",
+            )
+
     # ── answering_mode enum ───────────────────────────────────────────────────
     answering_mode = config.get("answering_mode")
     if answering_mode is not None:
@@ -76,6 +100,49 @@ def validate_pipeline_config(config: dict) -> None:
             f"'retrieval_mode' must be 'builder' or 'classic', got: {retrieval_mode!r}",
         )
 
+    # ── index_type enum ───────────────────────────────────────────────────────
+    index_type = config.get("index_type")
+    if index_type is not None:
+        valid_index_types = {"flat", "hnsw", "ivf_flat", "ivf_pq", "auto"}
+        _check(
+            index_type in valid_index_types,
+            f"'index_type' must be one of {' | '.join(sorted(valid_index_types))}, got: {index_type!r}",
+        )
+
+    # ── index parameters (int >= 0, 0 = derived/default) ──────────────────────
+    for field_name in ("index_nlist", "index_pq_m", "index_hnsw_m", "index_nprobe", "index_ef_search"):
+        value = config.get(field_name)
+        if value is not None:
+            _check(
+                isinstance(value, int) and not isinstance(value, bool) and value >= 0,
+                f"'{field_name}' must be a non-negative integer, got: {value!r}",
+            )
+
+    # ── index_shards (int >= 1) ───────────────────────────────────────────────
+    index_shards = config.get("index_shards")
+    if index_shards is not None:
+        _check(
+            isinstance(index_shards, int) and not isinstance(index_shards, bool) and index_shards >= 1,
+            f"'index_shards' must be an integer >= 1, got: {index_shards!r}",
+        )
+
+    # ── embedding_cache_dtype enum ────────────────────────────────────────────
+    embedding_cache_dtype = config.get("embedding_cache_dtype")
+    if embedding_cache_dtype is not None:
+        _check(
+            embedding_cache_dtype in ("float32", "float16"),
+            f"'embedding_cache_dtype' must be 'float32' or 'float16', got: {embedding_cache_dtype!r}",
+        )
+
+    # ── embedding cache limits (numbers >= 0) ─────────────────────────────────
+    for field_name in ("embedding_cache_memory_mb", "embedding_cache_max_mb", "embedding_cache_ttl_days"):
+        value = config.get(field_name)
+        if value is not None:
+            _check(
+                isinstance(value, (int, float)) and not isinstance(value, bool) and float(value) >= 0.0,
+                f"'{field_name}' must be a non-negative number, got: {value!r}",
+            )
+
     # ── score_threshold range [0, 1] ──────────────────────────────────────────
     score_threshold = config.get("score_threshold")
     if score_threshold is not None:
@@ -106,6 +173,44 @@ def validate_pipeline_config(config: dict) -> None:
             f"'builder_max_rounds' must be a non-negative integer, got: {builder_max_rounds!r}",
         )
 
+    # ── summary_concurrency (int >= 1, not bool) ─────────────────────────────
+    summary_concurrency = config.get("summary_concurrency")
+    if summary_concurrency is not None:
+        _check(
+            isinstance(summary_concurrency, int)
+            and not isinstance(summary_concurrency, bool)
+            and summary_concurrency >= 1,
+            f"'summary_concurrency' must be a positive integer, got: {summary_concurrency!r}",
+        )
+
+    # ── boilerplate_threshold range [0, 1) ────────────────────────────────────
+    boilerplate_threshold = config.get("boilerplate_threshold")
+    if boilerplate_threshold is not None:
+        _check(
+            isinstance(boilerplate_threshold, (int, float))
+            and not isinstance(boilerplate_threshold, bool)
+            and 0.0 <= float(boilerplate_threshold) < 1.0,
+            f"'boilerplate_threshold' must be a float in [0.0, 1.0), got: {boilerplate_threshold!r}",
+        )
+
+    # ── embedding_batch_size (int >= 1) / embedding_workers (int >= 0), not bool ──
+    embedding_batch_size = config.get("embedding_batch_size")
+    if embedding_batch_size is not None:
+        _check(
+            isinstance(embedding_batch_size, int)
+            and not isinstance(embedding_batch_size, bool)
+            and embedding_batch_size >= 1,
+            f"'embedding_batch_size' must be a positive integer, got: {embedding_batch_size!r}",
+        )
+    embedding_workers = config.get("embedding_workers")
+    if embedding_workers is not None:
+        _check(
+            isinstance(embedding_workers, int)
+            and not isinstance(embedding_workers, bool)
+            and embedding_workers >= 0,
+            f"'embedding_workers' must be a non-negative integer, got: {embedding_workers!r}",
+        )
+
     # ── rate_limit_delay (number >= 0) ────────────────────────────────────────
     rate_limit_delay = config.get("rate_limit_delay")
     if rate_limit_delay is not None:
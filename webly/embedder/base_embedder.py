@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
 
 class Embedder(ABC):
@@ -31,6 +31,10 @@ class Embedder(ABC):
     #: Used by the pipeline to split long chunks before embedding.
     max_input_tokens: int = 8192
 
+    #: Texts the pipeline passes per ``embed_batch()`` call; ``None`` keeps
+    #: the pipeline default (sized for remote API request limits).
+    preferred_batch_size: Optional[int] = None
+
     @abstractmethod
     def embed(self, text: str) -> List[float]:
         """Return a single embedding vector for *text*.
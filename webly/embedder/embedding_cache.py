@@ -1,59 +1,350 @@
 """
-SQLite-backed embedding cache.
+Two-tier embedding cache: an in-process LRU in front of SQLite.
 
 Keyed by blake2b(text + model_name) so the same text embedded with a
 different model produces a different cache entry.  The cache is optional
 and off by default — pass ``embedding_cache_dir`` in PipelineConfig to
 enable it.
+
+Vectors are stored as raw float32 (or float16) BLOBs, so a hit is a buffer
+copy rather than JSON parsing.  Rows written by older versions as JSON text
+are still readable.
+
+Hot vectors (repeated query embeddings, boilerplate segments) are served from
+memory within ``memory_bytes``.  The SQLite tier tracks when each row was last
+used and can be bounded by size (``max_bytes``, least recently used rows go
+first) and/or age (``ttl_seconds``); ``compact()`` evicts and then VACUUMs.
+
+One cache file can be shared by every project on a host: ``shared_embedding_cache()``
+hands all runtimes in a process the same instance per file, writes are buffered
+into ``write_batch_size`` transactions, and other processes wait on SQLite's lock
+(``busy_timeout``) instead of failing while WAL lets readers proceed.
 """
 
 from __future__ import annotations
 
+import atexit
 import hashlib
 import json
+import logging
 import os
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
+from typing import Iterable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# SQLite's default limit on host parameters per statement is 999 on older builds
+_MAX_SQL_PARAMS = 900
 
 
 class EmbeddingCache:
-    """Thread-safe SQLite cache for embedding vectors."""
+    """Thread-safe SQLite cache for embedding vectors with an in-memory LRU tier."""
+
+    DTYPES = ("float32", "float16")
+
+    # Pending last_used updates are written in one batch once this many hits accumulate
+    _TOUCH_FLUSH_SIZE = 256
+    # Size-based eviction trims the store to this fraction of max_bytes
+    _EVICT_TARGET_RATIO = 0.9
 
     _CREATE_SQL = """
     CREATE TABLE IF NOT EXISTS embeddings (
         key      TEXT PRIMARY KEY,
         vector   TEXT NOT NULL,
-        created_at TEXT NOT NULL
+        created_at TEXT NOT NULL,
+        dtype    TEXT NOT NULL DEFAULT 'json',
+        last_used REAL NOT NULL DEFAULT 0
     )
     """
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(
+        self,
+        db_path: str,
+        dtype: str = "float32",
+        memory_bytes: int = 64 * 1024 * 1024,
+        max_bytes: int = 0,
+        ttl_seconds: float = 0,
+        write_batch_size: int = 1,
+        busy_timeout: float = 30.0,
+    ) -> None:
+        """
+        Args:
+            db_path: SQLite file; parent directories are created.
+            dtype: Storage precision of new rows ("float32" or "float16").
+            memory_bytes: Budget of the in-process LRU tier; 0 disables it.
+            max_bytes: Upper bound on stored vector bytes; 0 means unbounded.
+            ttl_seconds: Rows unused for longer than this are evicted; 0 keeps them forever.
+            write_batch_size: Buffer this many new vectors before writing them in one transaction.
+            busy_timeout: Seconds to wait for another process's write lock before giving up.
+        """
+        if dtype not in self.DTYPES:
+            raise ValueError(f"dtype must be one of {', '.join(self.DTYPES)}, got: {dtype!r}")
+        self.dtype = dtype
+        self.memory_bytes = max(0, int(memory_bytes or 0))
+        self.max_bytes = max(0, int(max_bytes or 0))
+        self.ttl_seconds = max(0.0, float(ttl_seconds or 0))
+        self.write_batch_size = max(1, int(write_batch_size or 1))
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._memory_used = 0
+        self._touched: dict[str, float] = {}
+        # Rows written by put_many() but not yet flushed to SQLite
+        self._pending: dict[str, tuple] = {}
+        self._hits = {"memory": 0, "disk": 0}
+        self._misses = 0
+
         parent = os.path.dirname(db_path) or "."
         os.makedirs(parent, exist_ok=True)
-        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=busy_timeout)
         self._conn.execute("PRAGMA journal_mode=WAL")
         self._conn.execute(self._CREATE_SQL)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+        if "dtype" not in columns:
+            # cache created before binary storage: existing rows hold JSON text
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN dtype TEXT NOT NULL DEFAULT 'json'")
+        if "last_used" not in columns:
+            # rows from before LRU tracking count as used now, so a TTL does not wipe them on first open
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE embeddings SET last_used = ?", (time.time(),))
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
         self._conn.commit()
 
+        self._stored_bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+        if self.ttl_seconds or self.max_bytes:
+            with self._lock:
+                self._evict_locked()
+
     @staticmethod
     def make_key(text: str, model_name: str) -> str:
         """Deterministic cache key for a (text, model) pair."""
         payload = (text + "\x00" + model_name).encode("utf-8")
         return hashlib.blake2b(payload, digest_size=16).hexdigest()
 
+    @staticmethod
+    def _decode(blob, dtype: str) -> np.ndarray:
+        if dtype == "json":
+            return np.asarray(json.loads(blob), dtype=np.float32)
+        return np.frombuffer(blob, dtype=dtype).astype(np.float32)
+
+    def _encode(self, vector) -> bytes:
+        return np.asarray(vector, dtype=self.dtype).tobytes()
+
+    # ---------- memory tier ----------
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        if not self.memory_bytes or vector.nbytes > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_used -= old.nbytes
+        self._memory[key] = vector
+        self._memory_used += vector.nbytes
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= evicted.nbytes
+
+    # ---------- reads ----------
     def get(self, key: str) -> list[float] | None:
         """Return the cached vector, or None on a cache miss."""
-        cur = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,))
-        row = cur.fetchone()
-        return json.loads(row[0]) if row else None
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, list[float]]:
+        """Return ``{key: vector}`` for the keys that are cached; misses are absent."""
+        keys = list(dict.fromkeys(keys))
+        found: dict[str, np.ndarray] = {}
+        now = time.time()
+        with self._lock:
+            disk_keys = []
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                elif key in self._pending:
+                    _, blob, _, dtype, _ = self._pending[key]
+                    found[key] = self._decode(blob, dtype)
+                else:
+                    disk_keys.append(key)
+            self._hits["memory"] += len(found)
+
+            for start in range(0, len(disk_keys), _MAX_SQL_PARAMS):
+                batch = disk_keys[start : start + _MAX_SQL_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector, dtype FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob, dtype in rows:
+                    vector = self._decode(blob, dtype)
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self._hits["disk"] += 1
+            self._misses += len(keys) - len(found)
+
+            for key in found:
+                self._touched[key] = now
+            if len(self._touched) >= self._TOUCH_FLUSH_SIZE:
+                with self._conn:
+                    self._flush_touched_locked()
+        return {key: vector.tolist() for key, vector in found.items()}
 
+    # ---------- writes ----------
     def put(self, key: str, vector: list[float]) -> None:
         """Store a vector under the given key."""
-        self._conn.execute(
-            "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
-            (key, json.dumps(vector), datetime.now(timezone.utc).isoformat()),
-        )
-        self._conn.commit()
+        self.put_many([(key, vector)])
+
+    def put_many(self, items: Iterable[tuple[str, list[float]]]) -> None:
+        """
+        Store ``(key, vector)`` pairs. They are written in a single transaction once
+        ``write_batch_size`` rows are buffered (immediately with the default of 1).
+        """
+        created_at = datetime.now(timezone.utc).isoformat()
+        now = time.time()
+        with self._lock:
+            for key, vector in items:
+                blob = self._encode(vector)
+                self._pending[key] = (key, blob, created_at, self.dtype, now)
+                self._remember(key, self._decode(blob, self.dtype))
+            if len(self._pending) >= self.write_batch_size:
+                self._flush_pending_locked()
+
+    def flush(self) -> None:
+        """Write buffered vectors and last_used updates now."""
+        with self._lock:
+            self._flush_pending_locked()
+            with self._conn:
+                self._flush_touched_locked()
+
+    def _flush_pending_locked(self) -> None:
+        if not self._pending:
+            return
+        rows = list(self._pending.values())
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at, dtype, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._flush_touched_locked()
+        self._pending.clear()
+        # Replaced rows are counted twice; the estimate is re-synced on every eviction pass
+        self._stored_bytes += sum(len(row[1]) for row in rows)
+        if self.max_bytes and self._stored_bytes > self.max_bytes:
+            self._evict_locked()
+
+    def _flush_touched_locked(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._touched.items()],
+            )
+            self._touched.clear()
+
+    # ---------- eviction / maintenance ----------
+    def _evict_locked(self) -> int:
+        """Drop expired rows, then least recently used rows until under the size target."""
+        removed = 0
+        self._flush_pending_locked()
+        with self._conn:
+            self._flush_touched_locked()
+            if self.ttl_seconds:
+                cur = self._conn.execute(
+                    "DELETE FROM embeddings WHERE last_used < ?", (time.time() - self.ttl_seconds,)
+                )
+                removed += cur.rowcount
+            self._stored_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()[0]
+            if self.max_bytes and self._stored_bytes > self.max_bytes:
+                excess = self._stored_bytes - int(self.max_bytes * self._EVICT_TARGET_RATIO)
+                victims = []
+                freed = 0
+                for key, size in self._conn.execute(
+                    "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used, created_at"
+                ):
+                    if freed >= excess:
+                        break
+                    victims.append((key,))
+                    freed += size
+                self._conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+                self._stored_bytes -= freed
+                removed += len(victims)
+        return removed
+
+    def evict(self) -> int:
+        """Apply the TTL and size limits now; returns the number of rows removed."""
+        with self._lock:
+            return self._evict_locked()
+
+    def compact(self) -> int:
+        """Evict, then VACUUM the database file to return freed pages to the filesystem."""
+        with self._lock:
+            removed = self._evict_locked()
+            self._conn.execute("VACUUM")
+        return removed
+
+    def stats(self) -> dict:
+        """Hit/miss counters since this cache was opened, plus current tier sizes."""
+        with self._lock:
+            lookups = self._hits["memory"] + self._hits["disk"] + self._misses
+            return {
+                "memory_hits": self._hits["memory"],
+                "disk_hits": self._hits["disk"],
+                "misses": self._misses,
+                "hit_rate": (self._hits["memory"] + self._hits["disk"]) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "stored_bytes": self._stored_bytes,
+            }
 
     def close(self) -> None:
-        self._conn.close()
+        with self._lock:
+            try:
+                self._flush_pending_locked()
+                with self._conn:
+                    self._flush_touched_locked()
+            finally:
+                self._conn.close()
+
+
+_shared_caches: dict[str, EmbeddingCache] = {}
+# Options each shared instance was created with, to flag callers asking for others
+_shared_options: dict[str, dict] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_embedding_cache(db_path: str, **options) -> EmbeddingCache:
+    """
+    Process-wide ``EmbeddingCache`` for *db_path*: every caller pointing at the same file gets the
+    same instance (and memory tier). *options* apply when the instance is first created; a later
+    caller passing different options gets the existing instance and a warning. Buffered writes are
+    flushed at interpreter exit.
+    """
+    path = os.path.abspath(db_path)
+    with _shared_lock:
+        cache = _shared_caches.get(path)
+        if cache is None:
+            cache = EmbeddingCache(path, **options)
+            _shared_caches[path] = cache
+            _shared_options[path] = dict(options)
+        elif options != _shared_options[path]:
+            logger.warning(
+                f"Embedding cache {path} is already open with options {_shared_options[path]}; "
+                f"ignoring {options} (projects sharing a cache file share its settings)"
+            )
+        return cache
+
+
+@atexit.register
+def _flush_shared_caches() -> None:
+    with _shared_lock:
+        for cache in _shared_caches.values():
+            try:
+                cache.flush()
+            except Exception:
+                pass
@@ -1,10 +1,31 @@
+from typing import List
+
 from sentence_transformers import SentenceTransformer
 
 from .base_embedder import Embedder
 
 
 class HFSentenceEmbedder(Embedder):
-    def __init__(self, model_name: str | None = "sentence-transformers/all-MiniLM-L6-v2"):
+    """
+    Local sentence-transformers embedder.
+
+    ``embed_batch`` encodes texts in length-sorted batches of ``batch_size`` (so each batch pads to
+    similar lengths) and, with ``workers > 1``, spreads large batches over a multi-process CPU pool.
+    ``max_input_tokens``/``count_tokens``/``token_offsets`` come from the model's own tokenizer, so the
+    ingest segmenter splits text at the model's real sequence limit instead of truncating silently.
+    """
+
+    # Below this many texts the multi-process pool costs more than it saves
+    _POOL_MIN_TEXTS = 256
+    # Model batches per worker in one embed_batch call: the window length-sorting pads within
+    _GROUP_BATCHES = 8
+
+    def __init__(
+        self,
+        model_name: str | None = "sentence-transformers/all-MiniLM-L6-v2",
+        batch_size: int = 32,
+        workers: int = 0,
+    ):
         name = (model_name or "").strip()
         if name.lower() in ("", "default"):
             name = "sentence-transformers/all-MiniLM-L6-v2"
@@ -18,8 +39,74 @@ class HFSentenceEmbedder(Embedder):
                 "'sentence-transformers/all-MiniLM-L6-v2' or 'sentence-transformers/all-mpnet-base-v2'. "
                 f"Original error: {e}"
             )
+        self.model_name = name
         self.dim = self.model.get_sentence_embedding_dimension()
+        self.batch_size = max(1, int(batch_size))
+        self.workers = max(0, int(workers))
+        self._pool = None
+
+        self.tokenizer = getattr(self.model, "tokenizer", None)
+        max_seq_length = getattr(self.model, "max_seq_length", None)
+        if isinstance(max_seq_length, int) and max_seq_length > 0:
+            self.max_input_tokens = max_seq_length
+
+    @property
+    def preferred_batch_size(self) -> int:
+        """
+        Texts per ``embed_batch`` call: several model batches per worker, so length-sorting has
+        texts to group and, with ``workers > 1``, enough to start the multi-process pool.
+        """
+        size = self.batch_size * max(1, self.workers) * self._GROUP_BATCHES
+        return max(size, self._POOL_MIN_TEXTS) if self.workers > 1 else size
+
+    def count_tokens(self, text: str) -> int:
+        """Token count under the model's tokenizer, including special tokens."""
+        if self.tokenizer is None:
+            return max(1, len(text) // 4)
+        return len(self.tokenizer(text, add_special_tokens=True, truncation=False)["input_ids"])
+
+    def token_offsets(self, text: str) -> List[int]:
+        """Character offset at which each token of *text* starts (needs a fast tokenizer)."""
+        if self.tokenizer is None:
+            raise RuntimeError("model has no tokenizer")
+        encoded = self.tokenizer(text, add_special_tokens=False, truncation=False, return_offsets_mapping=True)
+        return [start for start, _ in encoded["offset_mapping"]]
 
     def embed(self, text: str) -> list[float]:
         vec = self.model.encode(text, normalize_embeddings=True).tolist()
         return vec
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        texts = [t for t in texts if t.strip()]
+        if not texts:
+            return []
+
+        # Sort by length so each batch pads to similar sizes, then restore the caller's order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        sorted_texts = [texts[i] for i in order]
+
+        if self.workers > 1 and len(texts) >= self._POOL_MIN_TEXTS:
+            vectors = self.model.encode_multi_process(
+                sorted_texts,
+                self._get_pool(),
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+            )
+        else:
+            vectors = self.model.encode(sorted_texts, batch_size=self.batch_size, normalize_embeddings=True)
+
+        out: List[List[float]] = [None] * len(texts)  # type: ignore[list-item]
+        for pos, idx in enumerate(order):
+            out[idx] = vectors[pos].tolist()
+        return out
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = self.model.start_multi_process_pool(target_devices=["cpu"] * self.workers)
+        return self._pool
+
+    def close(self) -> None:
+        """Stop the multi-process encode pool, if one was started."""
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
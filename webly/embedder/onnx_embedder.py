@@ -0,0 +1,235 @@
+"""
+Quantized ONNX embedder for CPU-only deployments.
+
+Runs a sentence-transformers model exported to ONNX and dynamically quantized to
+int8 with onnxruntime.  Vectors use the pooling recorded from the model's
+sentence-transformers config at export time (CLS, mean or max) and the same L2
+normalization as ``HFSentenceEmbedder``, so ``dim`` and similarity scores line up
+with the PyTorch path; ``tests/embedding_backend_benchmark.py`` measures the
+speed-up and neighbour recall against it.
+
+The export runs once per model and is cached under ``model_dir`` (default
+``~/.cache/webly/onnx/<model>``).  It needs ``torch`` and ``transformers`` (the
+``hf`` extra); afterwards only ``onnxruntime`` and ``transformers``' tokenizer
+are used (the ``onnx`` extra).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import List
+
+import numpy as np
+
+from .base_embedder import Embedder
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Written next to the export: settings of the sentence-transformers model that the ONNX graph lacks
+_SETTINGS_FILE = "webly_onnx.json"
+# Pooling modes _encode reproduces; other sentence-transformers modes are rejected
+_POOLING_MODES = ("cls", "mean", "max")
+
+
+def default_model_dir(model_name: str) -> str:
+    slug = model_name.replace("/", "__")
+    return os.path.join(os.path.expanduser("~"), ".cache", "webly", "onnx", slug)
+
+
+def read_pooling_mode(model_name: str) -> str:
+    """
+    Pooling of *model_name*'s sentence-transformers ``1_Pooling`` module: "cls", "mean", "max", or the
+    enabled modes joined by "+" (e.g. "mean+max") when it is anything else. Models without one are
+    mean-pooled, as sentence-transformers does for plain transformers checkpoints.
+    """
+    try:
+        from huggingface_hub import hf_hub_download
+
+        with open(hf_hub_download(model_name, "1_Pooling/config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except Exception as e:
+        logger.warning(f"No sentence-transformers pooling config for {model_name}, using mean pooling: {e}")
+        return "mean"
+    modes = [
+        key[len("pooling_mode_") :].removesuffix("_tokens").removesuffix("_token")
+        for key, enabled in config.items()
+        if key.startswith("pooling_mode_") and enabled is True
+    ]
+    return "+".join(modes) or "mean"
+
+
+def export_quantized_model(model_name: str, model_dir: str, quantize: bool = True) -> str:
+    """
+    Export *model_name*'s transformer to ONNX in *model_dir* (plus its tokenizer) and, if *quantize*,
+    write a dynamically int8-quantized copy. Returns the path of the model file to load.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(model_dir, exist_ok=True)
+    fp32_path = os.path.join(model_dir, "model.onnx")
+    int8_path = os.path.join(model_dir, "model_int8.onnx")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.save_pretrained(model_dir)
+    settings = {}
+    try:
+        from huggingface_hub import hf_hub_download
+
+        # sentence-transformers truncates at its own max_seq_length (e.g. 256 for MiniLM), not the tokenizer's
+        with open(hf_hub_download(model_name, "sentence_bert_config.json"), "r", encoding="utf-8") as f:
+            settings["max_seq_length"] = json.load(f).get("max_seq_length")
+    except Exception as e:
+        logger.debug(f"No sentence-transformers config for {model_name}, using the tokenizer limit: {e}")
+    settings["pooling"] = read_pooling_mode(model_name)
+    with open(os.path.join(model_dir, _SETTINGS_FILE), "w", encoding="utf-8") as f:
+        json.dump(settings, f)
+    if not os.path.exists(fp32_path):
+        model = AutoModel.from_pretrained(model_name)
+        model.eval()
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                fp32_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+            )
+
+    if not quantize:
+        return fp32_path
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class OnnxSentenceEmbedder(Embedder):
+    """
+    Sentence embedder backed by an (int8-quantized) ONNX export and onnxruntime on CPU.
+
+    Select it with ``embedding_model = "onnx:<huggingface-model>"``.
+    """
+
+    def __init__(
+        self,
+        model_name: str | None = _DEFAULT_MODEL,
+        model_dir: str | None = None,
+        quantize: bool = True,
+        batch_size: int = 32,
+        threads: int = 0,
+    ):
+        """
+        Args:
+            model_name: Hugging Face sentence-transformers model to export/run.
+            model_dir: Where the exported model and tokenizer live; exported on first use if missing.
+            quantize: Run the dynamically int8-quantized model (default) instead of fp32.
+            batch_size: Texts per inference call in ``embed_batch``.
+            threads: onnxruntime intra-op threads; 0 lets onnxruntime decide.
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        name = (model_name or "").strip()
+        if name.lower() in ("", "default"):
+            name = _DEFAULT_MODEL
+        self.model_name = name
+        self.model_dir = model_dir or default_model_dir(name)
+        self.batch_size = max(1, int(batch_size))
+
+        model_file = os.path.join(self.model_dir, "model_int8.onnx" if quantize else "model.onnx")
+        if not os.path.exists(model_file):
+            logger.info(f"Exporting {name} to ONNX in {self.model_dir} (one-time)")
+            try:
+                model_file = export_quantized_model(name, self.model_dir, quantize=quantize)
+            except Exception as e:
+                raise RuntimeError(
+                    f"Failed to export embedding model '{name}' to ONNX. The first export needs the 'hf' extra "
+                    f"(torch, transformers); later runs only need onnxruntime. Original error: {e}"
+                )
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(model_file, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+
+        settings = {}
+        settings_path = os.path.join(self.model_dir, _SETTINGS_FILE)
+        if os.path.exists(settings_path):
+            with open(settings_path, "r", encoding="utf-8") as f:
+                settings = json.load(f)
+        if "pooling" not in settings:
+            # Exported before the pooling mode was recorded
+            settings["pooling"] = read_pooling_mode(name)
+            with open(settings_path, "w", encoding="utf-8") as f:
+                json.dump(settings, f)
+        if settings["pooling"] not in _POOLING_MODES:
+            raise ValueError(
+                f"Embedding model '{name}' uses {settings['pooling']!r} pooling, which the ONNX backend does not "
+                f"support (supported: {', '.join(_POOLING_MODES)}); use the sentence-transformers backend instead."
+            )
+        self.pooling = settings["pooling"]
+        max_len = settings.get("max_seq_length") or getattr(self.tokenizer, "model_max_length", None)
+        # tokenizers without a limit report a huge sentinel value
+        self.max_input_tokens = max_len if isinstance(max_len, int) and 0 < max_len <= 8192 else 512
+        self.dim = int(self._encode(["dimension probe"]).shape[1])
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        enc = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_input_tokens, return_tensors="np"
+        )
+        feeds = {name: np.asarray(value, dtype=np.int64) for name, value in enc.items() if name in self._input_names}
+        hidden = self.session.run(None, feeds)[0]
+        # the model's pooling over real tokens, then L2 normalization (as sentence-transformers does)
+        mask = np.asarray(enc["attention_mask"], dtype=np.float32)[..., None]
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        elif self.pooling == "max":
+            pooled = np.where(mask > 0, hidden, -np.inf).max(axis=1)
+        else:
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=True, truncation=False)["input_ids"])
+
+    def token_offsets(self, text: str) -> List[int]:
+        encoded = self.tokenizer(text, add_special_tokens=False, truncation=False, return_offsets_mapping=True)
+        return [start for start, _ in encoded["offset_mapping"]]
+
+    @property
+    def preferred_batch_size(self) -> int:
+        """Texts per ``embed_batch`` call: several inference batches, so length-sorting has texts to group."""
+        return self.batch_size * 8
+
+    def embed(self, text: str) -> List[float]:
+        if not text.strip():
+            return []
+        return self._encode([text])[0].tolist()
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        texts = [t for t in texts if t.strip()]
+        if not texts:
+            return []
+        # Length-sorted batches pad less; results go back in the caller's order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out: List[List[float]] = [None] * len(texts)  # type: ignore[list-item]
+        for start in range(0, len(order), self.batch_size):
+            idxs = order[start : start + self.batch_size]
+            vectors = self._encode([texts[i] for i in idxs])
+            for idx, vector in zip(idxs, vectors):
+                out[idx] = vector.tolist()
+        return out
@@ -11,18 +11,67 @@ from .base_embedder import Embedder
 logger = logging.getLogger(__name__)
 
 
+# tiktoken encodings by model name; only successful lookups are cached
+_ENCODINGS: dict = {}
+_TIKTOKEN_MISSING = False
+
+
+def _get_encoding(model_name: str):
+    """
+    tiktoken encoding for *model_name*, built once per process (loading the BPE ranks is slow).
+    Returns None if tiktoken is unavailable. A missing tiktoken package is remembered; other
+    failures (e.g. a transient download error for the BPE file) are retried on the next call.
+    """
+    global _TIKTOKEN_MISSING
+    enc = _ENCODINGS.get(model_name)
+    if enc is not None or _TIKTOKEN_MISSING:
+        return enc
+    try:
+        import tiktoken
+    except ImportError as e:
+        _TIKTOKEN_MISSING = True
+        logger.debug(f"tiktoken unavailable, token counts will use a char-count heuristic: {e}")
+        return None
+    try:
+        try:
+            enc = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            enc = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.debug(f"tiktoken encoding failed, token counts will use a char-count heuristic: {e}")
+        return None
+    _ENCODINGS[model_name] = enc
+    return enc
+
+
 class OpenAIEmbedder(Embedder):
+    # New cache entries are written in transactions of this many vectors (see flush_cache)
+    _CACHE_WRITE_BATCH = 32
+
     def __init__(
         self,
         model_name: str = "text-embedding-3-small",
         api_key: str | None = None,
         cache_dir: str | None = None,
         cost_tracker=None,
+        cache_dtype: str = "float32",
+        cache_memory_mb: float = 64,
+        cache_max_mb: float = 0,
+        cache_ttl_days: float = 0,
+        dimensions: int | None = None,
     ):
         """
         Args:
             model_name (str): OpenAI embedding model (e.g. "text-embedding-3-small", "text-embedding-3-large").
             api_key (str): Optional API key. Defaults to OPENAI_API_KEY from env.
+            cache_dir (str): Directory for the SQLite embedding cache; None disables it. Embedders (of any
+                project) pointing at the same directory share one cache instance per process.
+            cache_dtype (str): Storage precision of cached vectors ("float32" or "float16").
+            cache_memory_mb (float): In-process LRU budget in front of the SQLite cache; 0 disables it.
+            cache_max_mb (float): Size bound of the SQLite cache (LRU eviction); 0 means unbounded.
+            cache_ttl_days (float): Evict cached vectors unused for this long; 0 keeps them forever.
+            dimensions (int): Shortened vector size for text-embedding-3 models (passed to the API as
+                ``dimensions``); None keeps the model's full size.
         """
         self.model_name = model_name
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
@@ -33,11 +82,18 @@ class OpenAIEmbedder(Embedder):
 
         self._cost_tracker = cost_tracker
 
-        # Optional embedding cache
+        # Optional embedding cache, shared with every other embedder using the same cache_dir
         self._cache = None
         if cache_dir is not None:
-            from .embedding_cache import EmbeddingCache
-            self._cache = EmbeddingCache(os.path.join(cache_dir, ".embedding_cache.db"))
+            from .embedding_cache import shared_embedding_cache
+            self._cache = shared_embedding_cache(
+                os.path.join(cache_dir, ".embedding_cache.db"),
+                dtype=cache_dtype,
+                memory_bytes=int(cache_memory_mb * 1024 * 1024),
+                max_bytes=int(cache_max_mb * 1024 * 1024),
+                ttl_seconds=cache_ttl_days * 86400,
+                write_batch_size=self._CACHE_WRITE_BATCH,
+            )
 
         # Dimension sizes (hardcoded since OpenAI doesn't expose this directly)
         if model_name == "text-embedding-3-small":
@@ -54,19 +110,47 @@ class OpenAIEmbedder(Embedder):
             self.max_input_tokens = 7000
             self.safety_ratio = 0.8
 
+        # text-embedding-3 models return shortened (Matryoshka) vectors when asked for fewer dimensions
+        self.dimensions = None
+        if dimensions:
+            if not model_name.startswith("text-embedding-3"):
+                raise ValueError(f"Model '{model_name}' does not support shortened embeddings (dimensions)")
+            if not 0 < int(dimensions) <= self.dim:
+                raise ValueError(f"dimensions must be between 1 and {self.dim} for '{model_name}', got {dimensions}")
+            self.dimensions = int(dimensions)
+            self.dim = self.dimensions
+        # Shortened vectors are cached apart from full-size ones of the same model
+        self._cache_model = f"{model_name}@{self.dimensions}" if self.dimensions else model_name
+
+    def cache_stats(self) -> dict:
+        """Embedding cache hit/miss counters, or {} when the cache is disabled."""
+        return self._cache.stats() if self._cache is not None else {}
+
+    def flush_cache(self) -> None:
+        """Write buffered cache entries to disk (no-op without a cache)."""
+        if self._cache is not None:
+            self._cache.flush()
+
     def count_tokens(self, text: str) -> int:
         """
         Best-effort token counter to help pre-chunking.
         Falls back to a rough char heuristic if tiktoken isn't available.
         """
-        try:
-            import tiktoken
-
-            enc = tiktoken.get_encoding("cl100k_base")
-            return len(enc.encode(text))
-        except Exception as e:
-            logger.debug(f"tiktoken unavailable or failed, using char-count heuristic: {e}")
+        enc = _get_encoding(self.model_name)
+        if enc is None:
             return max(1, len(text) // 4)
+        return len(enc.encode(text, disallowed_special=()))
+
+    def token_offsets(self, text: str) -> List[int]:
+        """
+        Character offset at which each token of *text* starts. Lets the segmenter split on
+        token boundaries after a single encode. Raises if tiktoken is unavailable.
+        """
+        enc = _get_encoding(self.model_name)
+        if enc is None:
+            raise RuntimeError("tiktoken encoding unavailable")
+        _, offsets = enc.decode_with_offsets(enc.encode(text, disallowed_special=()))
+        return offsets
 
     def _call_with_retry(self, fn, max_retries: int = 3, backoff: float = 1.0):
         for attempt in range(max_retries + 1):
@@ -85,6 +169,12 @@ class OpenAIEmbedder(Embedder):
                 logger.warning(f"OpenAI API error; retrying in {wait:.1f}s (attempt {attempt + 1}): {e}")
                 time.sleep(wait)
 
+    def _create_embeddings(self, input):
+        kwargs = {"model": self.model_name, "input": input}
+        if self.dimensions:
+            kwargs["dimensions"] = self.dimensions
+        return self.client.embeddings.create(**kwargs)
+
     def embed(self, text: str) -> List[float]:
         """
         Generate an embedding vector for a single text string.
@@ -93,13 +183,13 @@ class OpenAIEmbedder(Embedder):
             return []
 
         if self._cache is not None:
-            _key = self._cache.make_key(text, self.model_name)
+            _key = self._cache.make_key(text, self._cache_model)
             _cached = self._cache.get(_key)
             if _cached is not None:
                 return _cached
 
         resp = self._call_with_retry(
-            lambda: self.client.embeddings.create(model=self.model_name, input=text)
+            lambda: self._create_embeddings(text)
         )
         result = resp.data[0].embedding
 
@@ -122,29 +212,28 @@ class OpenAIEmbedder(Embedder):
 
         if self._cache is None:
             resp = self._call_with_retry(
-                lambda: self.client.embeddings.create(model=self.model_name, input=texts)
+                lambda: self._create_embeddings(texts)
             )
             if self._cost_tracker is not None and resp.usage is not None:
                 self._cost_tracker.record_embedding(self.model_name, resp.usage.prompt_tokens, len(texts))
             return [item.embedding for item in resp.data]
 
-        # Separate cache hits from misses (preserve original order, deduplicate misses)
-        result_map: dict[str, List[float] | None] = {}
-        for t in texts:
-            k = self._cache.make_key(t, self.model_name)
-            result_map[t] = self._cache.get(k)
+        # Separate cache hits from misses in one lookup (preserve original order, deduplicate misses)
+        keys = {t: self._cache.make_key(t, self._cache_model) for t in texts}
+        cached = self._cache.get_many(keys.values())
+        result_map: dict[str, List[float] | None] = {t: cached.get(k) for t, k in keys.items()}
 
         # Unique misses in original order
         unique_misses: list[str] = list(dict.fromkeys(t for t in texts if result_map[t] is None))
 
         if unique_misses:
             resp = self._call_with_retry(
-                lambda: self.client.embeddings.create(model=self.model_name, input=unique_misses)
+                lambda: self._create_embeddings(unique_misses)
             )
             if self._cost_tracker is not None and resp.usage is not None:
                 self._cost_tracker.record_embedding(self.model_name, resp.usage.prompt_tokens, len(unique_misses))
             for miss_text, item in zip(unique_misses, resp.data):
                 result_map[miss_text] = item.embedding
-                self._cache.put(self._cache.make_key(miss_text, self.model_name), item.embedding)
+            self._cache.put_many((keys[t], result_map[t]) for t in unique_misses)
 
         return [result_map[t] for t in texts]  # type: ignore[return-value]
@@ -53,7 +53,9 @@ try:
         ------------------
         embedding_model : str
             Model identifier. Use ``"sentence-transformers/<name>"`` for
-            local HuggingFace models or ``"openai:<model>"`` for OpenAI.
+            local HuggingFace models, ``"onnx:sentence-transformers/<name>"``
+            for the same model as int8-quantized ONNX on CPU, or
+            ``"openai:<model>"`` for OpenAI.
             Default: ``"openai:text-embedding-3-small"``.
 
         Chat / LLM settings
@@ -63,6 +65,10 @@ try:
         summary_model : str
             Optional OpenAI model for page summarisation. Leave blank to
             embed raw chunked text instead.
+        summary_concurrency : int
+            Maximum number of chunk summaries requested in parallel
+            (default ``4``). Summaries are cached per chunk text, summary
+            model, and prompt template in ``output_dir/.summary_cache.db``.
         answering_mode : str
             One of ``"strict_grounded"``, ``"technical_grounded"``
             (default), or ``"assisted_examples"``.
@@ -86,6 +92,72 @@ try:
         score_threshold : float
             Minimum cosine similarity score for retrieved chunks.
 
+        Indexing
+        --------
+        embedding_dimensions : int
+            Shortened vector size for OpenAI ``text-embedding-3`` models
+            (e.g. ``512`` or ``768``); ``0`` keeps the model's full size
+            (default). Changing it requires a full re-index.
+        embedding_batch_size : int
+            Texts per encode batch for local (Hugging Face) embedding models
+            (default ``32``).
+        embedding_workers : int
+            CPU worker processes for local embedding of large batches;
+            ``0`` or ``1`` encodes in-process (default ``0``).
+        embedding_cache_dir : str
+            Directory for the SQLite embedding cache. Leave blank to disable.
+            Point several projects at the same directory to share one cache
+            (entries are keyed by text and model) across runtimes and processes.
+        embedding_cache_dtype : str
+            Storage precision of cached vectors: ``"float32"`` (default) or
+            ``"float16"`` (half the disk, ~3 significant digits).
+        embedding_cache_memory_mb : float
+            In-process LRU tier in front of the SQLite cache (default ``64``;
+            ``0`` disables it).
+        embedding_cache_max_mb : float
+            Size bound of the SQLite cache; least recently used vectors are
+            evicted first. ``0`` means unbounded (default).
+        embedding_cache_ttl_days : float
+            Evict cached vectors not used for this many days. ``0`` keeps
+            them forever (default).
+        incremental_index : bool
+            When ``True``, re-indexing only re-embeds pages whose content
+            hash changed since the last run and drops vectors of changed or
+            deleted pages (default ``False``).
+        collapse_duplicate_segments : bool
+            When ``True``, identical segment texts are stored as a single
+            vector whose metadata lists every ``source_urls`` page. Ignored
+            with ``incremental_index`` (default ``False``).
+        boilerplate_threshold : float
+            Drop text blocks (menus, sidebars, legal text) that appear on
+            more than this fraction of sampled pages before chunking, e.g.
+            ``0.5``. ``0`` disables the pass (default ``0.0``).
+        index_mmap : bool
+            Memory-map the saved FAISS index read-only instead of reading it
+            into RAM, so query workers share the vectors through the OS page
+            cache and start without loading the whole file (default ``False``).
+        index_type : str
+            ``"flat"`` (exact, default), ``"hnsw"``, ``"ivf_flat"``,
+            ``"ivf_pq"``, or ``"auto"`` to pick flat / HNSW / IVF-PQ by the
+            number of vectors at index time.
+        index_nlist : int
+            IVF inverted lists; ``0`` derives ``~4*sqrt(vectors)`` (default).
+        index_pq_m : int
+            IVF-PQ sub-quantizers (must divide the embedding dimension);
+            ``0`` picks ~16 dimensions per sub-quantizer (default).
+        index_hnsw_m : int
+            HNSW graph degree; ``0`` keeps the default of ``32``.
+        index_nprobe : int
+            IVF lists scanned per query; ``0`` keeps the stored value
+            (``16``). Higher is slower but more accurate.
+        index_ef_search : int
+            HNSW search breadth per query; ``0`` keeps the stored value
+            (``64``).
+        index_shards : int
+            Split the index into this many shards by page URL, searched in
+            parallel; an incremental run rewrites only the shards whose pages
+            changed. Takes effect on the next full ingest (default ``1``).
+
         Debug
         -----
         debug : bool
@@ -112,6 +184,7 @@ try:
         embedding_model: str
         chat_model: str
         summary_model: str
+        summary_concurrency: int
         answering_mode: str
         system_prompt: str
         system_prompt_custom_override: bool
@@ -122,7 +195,25 @@ try:
         score_threshold: float
         debug: bool
         query_debug: bool
+        embedding_dimensions: int
+        embedding_batch_size: int
+        embedding_workers: int
         embedding_cache_dir: str
+        embedding_cache_dtype: str
+        embedding_cache_memory_mb: float
+        embedding_cache_max_mb: float
+        embedding_cache_ttl_days: float
+        incremental_index: bool
+        collapse_duplicate_segments: bool
+        boilerplate_threshold: float
+        index_mmap: bool
+        index_type: str
+        index_nlist: int
+        index_pq_m: int
+        index_hnsw_m: int
+        index_nprobe: int
+        index_ef_search: int
+        index_shards: int
 
 except ImportError:
     PipelineConfig = dict  # type: ignore[misc,assignment]
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import re
+from bisect import bisect_left, bisect_right
 from typing import Any
 
+_PARAGRAPH_BREAK_RE = re.compile(r"\n{2,}")
+_SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?])\s+")
+
 
 def max_input_tokens(embedder: Any) -> int:
     for attr in ("max_input_tokens", "max_tokens", "context_size", "max_seq_len"):
@@ -33,53 +37,76 @@ def hard_char_splits(text: str, max_tokens: int) -> list[str]:
     return out
 
 
-def chunk_text_for_embedding(embedder: Any, text: str, logger=None, safety_ratio: float = 0.9) -> list[str]:
-    max_tok = int(max_input_tokens(embedder) * getattr(embedder, "safety_ratio", safety_ratio))
-    if count_tokens(embedder, text, logger) <= max_tok:
+def token_offsets(embedder: Any, text: str, logger=None) -> list[int]:
+    """
+    Character offset at which each token of *text* starts.
+
+    Uses ``embedder.token_offsets`` when the backend exposes its tokenizer. Otherwise tokens are
+    assumed to be spread evenly over the text, sized from a single ``count_tokens`` call.
+    """
+    if hasattr(embedder, "token_offsets"):
+        try:
+            return list(embedder.token_offsets(text))
+        except Exception as exc:
+            if logger is not None:
+                logger.debug(f"embedder.token_offsets failed, estimating offsets: {exc}")
+    total = count_tokens(embedder, text, logger)
+    if not text:
+        return []
+    return [(i * len(text)) // total for i in range(total)]
+
+
+def _last_boundary(boundaries: list[int], start: int, limit: int) -> int | None:
+    """Largest token boundary in (start, limit], or None."""
+    i = bisect_right(boundaries, limit) - 1
+    if i >= 0 and boundaries[i] > start:
+        return boundaries[i]
+    return None
+
+
+def segment_by_token_budget(embedder: Any, text: str, max_tokens: int, logger=None) -> list[str]:
+    """
+    Split *text* into pieces of at most *max_tokens* tokens.
+
+    Texts within the budget cost one ``count_tokens`` call. Longer texts are encoded once more for
+    token offsets; cuts prefer the last paragraph break inside the budget, then the last sentence
+    break, and only fall back to a hard cut at the token limit.
+    """
+    max_tokens = max(1, int(max_tokens))
+    if count_tokens(embedder, text, logger) <= max_tokens:
+        return [text]
+    offsets = token_offsets(embedder, text, logger)
+    n_tokens = len(offsets)
+    if n_tokens <= max_tokens:
         return [text]
 
-    paras = re.split(r"\n{2,}", text)
-    chunks: list[str] = []
-    current: list[str] = []
-    current_tokens = 0
-
-    def flush() -> None:
-        nonlocal current, current_tokens
-        if current:
-            joined = "\n\n".join(current).strip()
-            if joined:
-                chunks.append(joined)
-        current = []
-        current_tokens = 0
-
-    for paragraph in paras:
-        paragraph_tokens = count_tokens(embedder, paragraph, logger)
-        if paragraph_tokens > max_tok:
-            sentences = re.split(r"(?<=[.!?])\s+", paragraph)
-            for sentence in sentences:
-                sentence_tokens = count_tokens(embedder, sentence, logger)
-                if sentence_tokens > max_tok:
-                    for piece in hard_char_splits(sentence, max_tok):
-                        piece_tokens = count_tokens(embedder, piece, logger)
-                        if piece_tokens > max_tok:
-                            chunks.append(piece)
-                            continue
-                        if current_tokens + piece_tokens > max_tok:
-                            flush()
-                        current.append(piece)
-                        current_tokens += piece_tokens
-                    continue
-                if current_tokens + sentence_tokens > max_tok:
-                    flush()
-                current.append(sentence)
-                current_tokens += sentence_tokens
-            flush()
-            continue
-
-        if current_tokens + paragraph_tokens > max_tok:
-            flush()
-        current.append(paragraph)
-        current_tokens += paragraph_tokens
-
-    flush()
-    return [chunk for chunk in chunks if chunk]
+    def to_token_index(char_positions) -> list[int]:
+        # first token starting at or after each break
+        return sorted({bisect_left(offsets, pos) for pos in char_positions})
+
+    paragraph_cuts = to_token_index(m.end() for m in _PARAGRAPH_BREAK_RE.finditer(text))
+    sentence_cuts = to_token_index(m.end() for m in _SENTENCE_BREAK_RE.finditer(text))
+
+    segments: list[str] = []
+    start = 0
+    while n_tokens - start > max_tokens:
+        limit = start + max_tokens
+        cut = (
+            _last_boundary(paragraph_cuts, start, limit)
+            or _last_boundary(sentence_cuts, start, limit)
+            or limit
+        )
+        piece = text[offsets[start] : offsets[cut]].strip()
+        if piece:
+            segments.append(piece)
+        start = cut
+
+    tail = text[offsets[start] :].strip()
+    if tail:
+        segments.append(tail)
+    return segments
+
+
+def chunk_text_for_embedding(embedder: Any, text: str, logger=None, safety_ratio: float = 0.9) -> list[str]:
+    max_tok = int(max_input_tokens(embedder) * getattr(embedder, "safety_ratio", safety_ratio))
+    return segment_by_token_budget(embedder, text, max_tok, logger)
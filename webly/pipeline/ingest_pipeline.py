@@ -1,8 +1,12 @@
+import hashlib
 import json
 import os
-import re
-from collections import defaultdict
-from typing import Any, Dict, List, Optional
+import random
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from webly.crawl.crawler import Crawler
 from webly.embedder.base_embedder import Embedder
@@ -14,9 +18,25 @@ try:
     from webly.processors.text_summarizer import TextSummarizer
 except ImportError:
     TextSummarizer = object
+from webly.processors.chunk_cache import ChunkCache
 from webly.processors.page_processor import SemanticPageProcessor
+from webly.processors.summary_cache import SummaryCache
 from webly.processors.text_chunkers import DefaultChunker
 from webly.processors.text_extractors import DefaultTextExtractor
+
+
+def _reservoir_sample(items, k: int, seed: int = 0) -> list:
+    """Uniform sample of up to *k* items from an iterable of unknown length (Algorithm R)."""
+    rng = random.Random(seed)
+    sample: list = []
+    for i, item in enumerate(items):
+        if i < k:
+            sample.append(item)
+        else:
+            j = rng.randint(0, i)
+            if j < k:
+                sample[j] = item
+    return sample
 
 
 class IngestPipeline:
@@ -28,6 +48,17 @@ class IngestPipeline:
       - run(): orchestrates (crawl_only | index_only | both)
     """
 
+    _MANIFEST_FILENAME: str = "manifest.json"
+    _MANIFEST_VERSION: int = 1
+
+    # Boilerplate detection is skipped for samples smaller than this (too few pages to tell)
+    _BOILERPLATE_MIN_PAGES: int = 5
+
+    # Chunks collected before a summarize/embed flush (bounds memory and summary fan-out)
+    _CHUNK_BATCH_SIZE: int = 64
+    # Segments per embedder.embed_batch call (keeps API requests under provider token limits)
+    _EMBED_BATCH_SIZE: int = 32
+
     # Soft limits to avoid model/context errors during summarization
     _MAX_SUMMARY_CHARS: int = 12000  # cap text passed to summarizer
     _HEAD_TAIL_SPLIT: int = 10000  # keep head N + tail (_MAX - N)
@@ -44,6 +75,15 @@ class IngestPipeline:
         debug: bool = False,
         debug_summary_path: Optional[str] = None,
         progress_callback=None,
+        incremental: bool = False,
+        summary_concurrency: int = 4,
+        summary_cache_path: Optional[str] = None,
+        collapse_duplicate_segments: bool = False,
+        boilerplate_threshold: float = 0.0,
+        boilerplate_sample_pages: int = 200,
+        chunk_cache_path: Optional[str] = None,
+        index_type: str = "flat",
+        index_options: Optional[Dict[str, int]] = None,
     ):
         self.crawler = crawler
         self.index_path = index_path
@@ -58,6 +98,37 @@ class IngestPipeline:
         self.debug = bool(debug)
         self.logger = configure_logging(self.__class__.__name__)
         self.progress_callback = progress_callback
+        self.incremental = bool(incremental)
+        self.collapse_duplicate_segments = bool(collapse_duplicate_segments)
+        self.boilerplate_threshold = float(boilerplate_threshold or 0.0)
+        self.boilerplate_sample_pages = max(1, int(boilerplate_sample_pages))
+        self.index_type = (index_type or "flat").lower()
+        self.index_options = {k: v for k, v in (index_options or {}).items() if v}
+        # Set when transform() started a new index (vs. loading one for an incremental run)
+        self._index_is_new = False
+
+        # Summaries run through a bounded worker pool and a persistent cache next to the crawl results
+        self.summary_concurrency = max(1, int(summary_concurrency or 1))
+        self.summary_cache_path = summary_cache_path or os.path.join(
+            getattr(crawler, "output_dir", "."), ".summary_cache.db"
+        )
+        self._summary_cache: Optional[SummaryCache] = None
+        self.chunk_cache_path = chunk_cache_path or os.path.join(getattr(crawler, "output_dir", "."), ".chunk_cache.db")
+        self._chunk_cache: Optional[ChunkCache] = None
+
+        # Page manifest state for the current index run (url -> content hash)
+        self._page_hashes: Dict[str, str] = {}
+        # Pages of the current run that did not make it into the index in full, see _write_manifest
+        self._failed_pages: set = set()
+        # Page-level link table for the current index run (url -> outgoing/incoming links)
+        self._page_links: Dict[str, Dict[str, list]] = {}
+        self._last_delta: Optional[Dict[str, int]] = None
+        # Last committed transform progress (results offset + input identity), see _commit_progress
+        self._progress: Optional[dict] = None
+        # Segment text hash -> embedding for the current run, so duplicate segments are embedded once
+        self._segment_vectors: Dict[str, Any] = {}
+        # Wall-clock seconds per stage of the last index run, see _timed
+        self.stage_timings: Dict[str, float] = {}
 
         # Debug file paths
         if debug_summary_path:
@@ -78,6 +149,18 @@ class IngestPipeline:
     # -------------------------------------------------------------------------
     # Internal helpers
     # -------------------------------------------------------------------------
+    @contextmanager
+    def _timed(self, stage: str):
+        """
+        Add the block's wall-clock seconds to ``stage_timings[stage]``: ``boilerplate``, ``parse``, ``chunk``,
+        ``summarize``, ``tokenize``, ``embed``, ``index_train``, ``index_add`` or ``save``.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_timings[stage] = self.stage_timings.get(stage, 0.0) + (time.perf_counter() - start)
+
     def _resolve_results_path(self, require_non_empty: bool = False) -> str:
         """
         Resolve the actual path to crawl results:
@@ -160,6 +243,242 @@ class IngestPipeline:
             self.logger.error(f"Summarizer error for {url}: {e}")
         return None
 
+    def _get_summary_cache(self) -> Optional[SummaryCache]:
+        if self._summary_cache is None and self.summary_cache_path:
+            try:
+                self._summary_cache = SummaryCache(self.summary_cache_path)
+            except Exception as e:
+                self.logger.warning(f"Summary cache unavailable at {self.summary_cache_path}: {e}")
+                self.summary_cache_path = None
+        return self._summary_cache
+
+    def _summary_cache_key(self, text: str) -> str:
+        llm = getattr(self.summarizer, "llm", None)
+        model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or ""
+        template = getattr(self.summarizer, "prompt_template", "") or ""
+        return SummaryCache.make_key(text, str(model), str(template))
+
+    def _summarize_many(self, items: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+        Summarize (url, text) pairs through the persistent summary cache and a bounded worker pool.
+        Identical texts in the batch (repeated boilerplate) are summarized once.
+        """
+        cache = self._get_summary_cache()
+        summaries: Dict[str, Optional[str]] = {}
+        misses: Dict[str, str] = {}  # text -> url of its first occurrence
+        for url, text in items:
+            if text in summaries or text in misses:
+                continue
+            cached = cache.get(self._summary_cache_key(text)) if cache is not None else None
+            if cached is not None:
+                summaries[text] = cached
+            else:
+                misses[text] = url
+
+        if misses:
+            workers = max(1, min(self.summary_concurrency, len(misses)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(lambda pair: self._safe_summarize(pair[1], pair[0]), misses.items()))
+            for text, summary in zip(misses, results):
+                summaries[text] = summary
+                if summary and cache is not None:
+                    cache.put(self._summary_cache_key(text), summary)
+
+        return [summaries[text] for _, text in items]
+
+    def _get_chunk_cache(self) -> Optional[ChunkCache]:
+        if self._chunk_cache is None and self.chunk_cache_path:
+            try:
+                self._chunk_cache = ChunkCache(self.chunk_cache_path)
+            except Exception as e:
+                self.logger.warning(f"Chunk cache unavailable at {self.chunk_cache_path}: {e}")
+                self.chunk_cache_path = None
+        return self._chunk_cache
+
+    def _chunker_fingerprint(self) -> str:
+        """
+        Identify everything that shapes a page's chunks: processor and chunker classes, the chunker's
+        scalar parameters and ``cache_version``, and the current boilerplate set.
+        """
+        chunker = self.page_processor.chunker
+        params = {
+            k: v
+            for k, v in vars(chunker).items()
+            if k != "boilerplate_keys" and isinstance(v, (str, int, float, bool, type(None)))
+        }
+        payload = {
+            "processor": f"{type(self.page_processor).__module__}.{type(self.page_processor).__qualname__}",
+            "chunker": f"{type(chunker).__module__}.{type(chunker).__qualname__}",
+            "version": getattr(chunker, "cache_version", 0),
+            "params": params,
+            "boilerplate": sorted(getattr(chunker, "boilerplate_keys", None) or ()),
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+    def _chunk_page(self, url: str, html: str, page_hash: str, chunker_fingerprint: str) -> List[dict]:
+        """
+        HTML -> chunks through the chunk cache (``output_dir/.chunk_cache.db``), keyed by url, content hash and
+        chunker fingerprint, so re-indexing with another embedder or summarizer skips unchanged pages' parsing.
+        """
+        cache = self._get_chunk_cache()
+        key = ChunkCache.make_key(url, page_hash, chunker_fingerprint) if cache is not None else None
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        chunks = self.page_processor.process(url, html)
+        if cache is not None:
+            cache.put(key, chunks)
+        return chunks
+
+    @staticmethod
+    def _segment_key(text: str) -> str:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _collapse_duplicates(self, records: List[dict]) -> List[dict]:
+        """
+        Keep the first record per segment text and list every page it appeared on in
+        ``metadata.source_urls``.
+        """
+        kept: Dict[str, dict] = {}
+        for rec in records:
+            key = self._segment_key(rec.get("text", ""))
+            page_url = (rec.get("metadata") or {}).get("page_url") or rec.get("url")
+            first = kept.get(key)
+            if first is None:
+                kept[key] = rec
+                rec.setdefault("metadata", {})["source_urls"] = [page_url] if page_url else []
+                continue
+            source_urls = first["metadata"]["source_urls"]
+            if page_url and page_url not in source_urls:
+                source_urls.append(page_url)
+        if len(kept) < len(records):
+            self.logger.info(f"Collapsed {len(records) - len(kept)} duplicate segment records")
+        return list(kept.values())
+
+    @staticmethod
+    def _page_hash(html: str) -> str:
+        return hashlib.blake2b(html.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.index_path, self._MANIFEST_FILENAME)
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write_manifest(self) -> None:
+        """
+        Persist page hashes for the next incremental run. Failed pages get an empty hash, so that
+        run sees them as changed: it deletes whatever part of them was indexed and embeds them again.
+        """
+        path = self._manifest_path()
+        payload = {
+            "version": self._MANIFEST_VERSION,
+            "dim": getattr(self.embedder, "dim", None),
+            "pages": {url: ("" if url in self._failed_pages else h) for url, h in self._page_hashes.items()},
+        }
+        tmp = path + ".tmp"
+        try:
+            os.makedirs(self.index_path, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            self.logger.warning(f"Failed to write index manifest to {path}: {e}")
+
+    def _load_for_incremental(self) -> Optional[Dict[str, str]]:
+        """
+        Load the existing index and its page manifest for a delta run.
+        Returns the previous {url: content_hash} map, or None when a full rebuild is required
+        (no index/manifest yet, unreadable index, or embedding dimension changed).
+        """
+        manifest = self._read_manifest()
+        pages = manifest.get("pages")
+        if manifest.get("version") != self._MANIFEST_VERSION or not isinstance(pages, dict):
+            self.logger.info("No usable index manifest found; running a full rebuild.")
+            return None
+        if manifest.get("dim") != getattr(self.embedder, "dim", None):
+            self.logger.info("Embedding dimension changed since the last index; running a full rebuild.")
+            return None
+        if not hasattr(self.db, "ids_for_page_urls"):
+            self.logger.warning(f"{type(self.db).__name__} does not support page deletes; running a full rebuild.")
+            return None
+        try:
+            # A delta run modifies the index, so never map it read-only here
+            self.db.load(self.index_path, expected_dim=self.embedder.dim, mmap=False)
+        except Exception as e:
+            self.logger.warning(f"Could not load existing index for incremental run ({e}); running a full rebuild.")
+            return None
+        return pages
+
+    def _create_index(self, expected_count: Optional[int] = None) -> None:
+        """Create an empty index of ``index_type`` with ``index_options`` (``nlist``, ``pq_m``, ``hnsw_m``)."""
+        if self.index_type == "flat" and not self.index_options:
+            self.db.create(dim=self.embedder.dim)
+            return
+        options: Dict[str, Any] = dict(self.index_options)
+        if expected_count is not None:
+            options["expected_count"] = expected_count
+        self.db.create(dim=self.embedder.dim, index_type=self.index_type, **options)
+
+    def _train_index(self, records: List[dict]) -> None:
+        """Train a trainable (IVF) index on a reservoir sample of every vector of this run."""
+        if not callable(getattr(self.db, "train", None)) or getattr(self.db, "is_trained", True):
+            return
+        training_size = getattr(self.db, "training_size", None)
+        size = (training_size() if callable(training_size) else 0) or len(records)
+        vectors = (rec["embedding"] for rec in records if rec.get("embedding"))
+        sample = _reservoir_sample(vectors, size)
+        if sample:
+            self.db.train(sample)
+
+    def _detect_boilerplate(self, results_path: str, total_lines: Optional[int]) -> None:
+        """
+        Sample up to ``boilerplate_sample_pages`` pages spread over the results file, count on how
+        many of them each text block appears, and hand blocks above ``boilerplate_threshold`` to the
+        chunker so they are excluded from every page's chunks.
+        """
+        chunker = self.page_processor.chunker
+        if not hasattr(chunker, "boilerplate_keys"):
+            return
+        chunker.boilerplate_keys = set()
+        if self.boilerplate_threshold <= 0 or not hasattr(chunker, "page_block_keys"):
+            return
+
+        stride = max(1, (total_lines or 0) // self.boilerplate_sample_pages)
+        counts: Counter = Counter()
+        sampled = 0
+        with open(results_path, "r", encoding="utf-8") as f:
+            for idx, line in enumerate(f):
+                if idx % stride:
+                    continue
+                try:
+                    html = json.loads(line).get("html")
+                    if not html:
+                        continue
+                    counts.update(chunker.page_block_keys(html))
+                except Exception as e:
+                    self.logger.debug(f"Boilerplate sampling skipped line {idx + 1}: {e}")
+                    continue
+                sampled += 1
+                if sampled >= self.boilerplate_sample_pages:
+                    break
+
+        if sampled < self._BOILERPLATE_MIN_PAGES:
+            return
+        cutoff = self.boilerplate_threshold * sampled
+        chunker.boilerplate_keys = {key for key, n in counts.items() if n > cutoff}
+        self.logger.info(
+            f"Boilerplate: {len(chunker.boilerplate_keys)} blocks repeat on more than "
+            f"{self.boilerplate_threshold:.0%} of {sampled} sampled pages"
+        )
+
     # -------------------------------------------------------------------------
     # Public stages
     # -------------------------------------------------------------------------
@@ -183,11 +502,31 @@ class IngestPipeline:
     def transform(self) -> List[dict]:
         """
         Read results file -> chunk -> (optional) summarize -> embed.
+
+        Embedded batches are committed to ``ingest_progress.jsonl`` so an interrupted run resumes after
+        the last committed page. With ``incremental=True`` only new or changed pages (by content hash
+        against the index manifest) are embedded, and records of changed or removed pages are deleted.
         """
         self.logger.info(f"Transforming pages (summarize = {self.use_summary and bool(self.summarizer)})")
-        # Initialize FAISS index
-        self.db.create(dim=self.embedder.dim)
+        previous_pages = self._load_for_incremental() if self.incremental else None
+        self._index_is_new = previous_pages is None
+        if self._index_is_new:
+            # Initialize FAISS index
+            self._create_index()
+        self._page_hashes = {}
+        self._failed_pages = set()
+        self._page_links = {}
+        self._last_delta = None
+        self._progress = None
+        self.stage_timings = {}
+        self._segment_vectors = {}
+        changed_urls: set = set()
+        unchanged_count = 0
         transformed_records: List[dict] = []
+        # Chunks waiting to be summarized/embedded; flushed every _CHUNK_BATCH_SIZE chunks, or once
+        # there are enough to fill one of the embedder's preferred batches
+        pending: List[Dict[str, Any]] = []
+        chunk_batch_size = max(self._CHUNK_BATCH_SIZE, self._preferred_embed_batch_size() or 0)
 
         # Resolve results path (require presence & non-empty)
         resolved_results = self._resolve_results_path(require_non_empty=True)
@@ -223,6 +562,9 @@ class IngestPipeline:
                     }
                 )
 
+        # Backends with a page-level link table get links once per page; others keep them per record.
+        normalize_links = bool(getattr(self.db, "stores_page_links", False))
+
         summary_debug_file = open(self.debug_summary_path, "w", encoding="utf-8") if self.debug else None
         chunk_debug_file = open(self.debug_chunks_path, "w", encoding="utf-8") if self.debug else None
 
@@ -235,21 +577,66 @@ class IngestPipeline:
             self.logger.debug(f"Could not count lines in results file: {e}")
             total_lines = None
 
+        with self._timed("boilerplate"):
+            self._detect_boilerplate(resolved_results, total_lines)
+        chunker_fingerprint = self._chunker_fingerprint()
+
+        # Resume from the last committed page of an interrupted run over the same inputs and settings
+        progress_state = self._progress_state(resolved_results, chunker_fingerprint)
+        resume_offset, resumed_records = self._resume_progress(progress_state)
+        if resumed_records:
+            self.logger.info(f"Resuming after results line {resume_offset} ({len(resumed_records)} records replayed)")
+        transformed_records.extend(resumed_records)
+        # Failures already written to the progress log; each commit carries only the new ones
+        committed_failures = set(self._failed_pages)
+        for rec in resumed_records:
+            self._segment_vectors.setdefault(self._segment_key(rec.get("text", "")), rec.get("embedding"))
+        progress_log = open(self._progress_log_path(), "a", encoding="utf-8")
+
         with open(resolved_results, "r", encoding="utf-8") as f:
             for idx, line in enumerate(f, start=1):
+                url = None
                 try:
-                    record = json.loads(line)
+                    with self._timed("parse"):
+                        record = json.loads(line)
                     url = record.get("url")
                     html = record.get("html")
 
                     outgoing_links = site_graph.get(url, [])
                     incoming_links = incoming_map.get(url, [])
+                    link_fields = (
+                        {}
+                        if normalize_links
+                        else {"outgoing_links": outgoing_links, "incoming_links": incoming_links}
+                    )
 
                     if not url or not html:
                         self.logger.warning(f"Skipping malformed record (missing url/html): {record}")
                         continue
 
-                    chunks = self.page_processor.process(url, html)
+                    with self._timed("parse"):
+                        page_hash = self._page_hash(html)
+                    self._page_hashes[url] = page_hash
+                    # Link data is refreshed for every page (even unchanged ones) since backlinks
+                    # depend on the rest of the site.
+                    if normalize_links:
+                        self._page_links[url] = {
+                            "outgoing_links": outgoing_links,
+                            "incoming_links": incoming_links,
+                        }
+                    if previous_pages is not None:
+                        if previous_pages.get(url) == page_hash:
+                            unchanged_count += 1
+                            continue
+                        if url in previous_pages:
+                            changed_urls.add(url)
+
+                    # Already embedded by an interrupted run; its records were replayed from the progress log
+                    if idx <= resume_offset:
+                        continue
+
+                    with self._timed("chunk"):
+                        chunks = self._chunk_page(url, html, page_hash, chunker_fingerprint)
 
                     if self.progress_callback:
                         try:
@@ -275,65 +662,29 @@ class IngestPipeline:
                             )
                             chunk_debug_file.write("\n")
 
-                        # Optional summarization
-                        if self.use_summary and self.summarizer:
-                            summary_text = self._safe_summarize(url, content_to_embed)
-                            if summary_text:
-                                chunk["summary"] = summary_text
-                                content_to_embed = summary_text
-
-                                if self.debug and summary_debug_file:
-                                    json.dump(
-                                        {
-                                            "url": chunk.get("url", url),
-                                            "chunk_index": chunk.get("chunk_index", -1),
-                                            "original_preview": chunk.get("text", "")[:500],
-                                            "summary_preview": summary_text[:500],
-                                        },
-                                        summary_debug_file,
-                                    )
-                                    summary_debug_file.write("\n")
-                            else:
-                                # If summarizer failed, proceed with original text
-                                pass
-
-                        parts = self._chunk_for_embedding(content_to_embed)
-                        parent_chunk_id = f"{url}#chunk_{chunk.get('chunk_index', -1)}"
-
-                        for seg_idx, part in enumerate(parts):
-                            try:
-                                embedding = self.embedder.embed(part)
-                            except Exception as e:
-                                self.logger.error(f"Embedding error for {url} (seg {seg_idx}): {e}")
-                                continue
-                            if embedding is None:
-                                self.logger.warning(
-                                    f"Skipping chunk from {url} seg {seg_idx} - embedding returned None."
-                                )
-                                continue
-
-                            rec = {
-                                **chunk,  # keep original fields (url, hierarchy, etc.)
-                                "text": part,  # the actual embedded segment text
-                                "embedding": embedding,
-                                "id": f"{parent_chunk_id}__seg_{seg_idx}",
-                                "metadata": {
-                                    **(chunk.get("metadata", {}) or {}),
-                                    "chunk_id": parent_chunk_id,  # keep original id as parent
-                                    "seg_index": seg_idx,
-                                    "seg_count": len(parts),
-                                    "page_url": url,
-                                    "outgoing_links": outgoing_links,
-                                    "incoming_links": incoming_links,
-                                    "crawled_at": record.get("crawled_at", ""),
-                                },
-                            }
-                            transformed_records.append(rec)
+                        pending.append({"url": url, "record": record, "chunk": chunk, "link_fields": link_fields})
 
                 except json.JSONDecodeError:
                     self.logger.warning("Skipping line (not valid JSON).")
                 except Exception as e:
                     self.logger.warning(f"Skipping record due to error: {e}")
+                    if url in self._page_hashes:
+                        self._failed_pages.add(url)
+
+                if len(pending) >= chunk_batch_size:
+                    batch = self._safe_transform_batch(pending, summary_debug_file)
+                    transformed_records.extend(batch)
+                    new_failures = self._failed_pages - committed_failures
+                    self._commit_progress(progress_log, progress_state, idx, batch, new_failures)
+                    committed_failures |= new_failures
+                    pending = []
+
+            if pending:
+                batch = self._safe_transform_batch(pending, summary_debug_file)
+                transformed_records.extend(batch)
+                self._commit_progress(progress_log, progress_state, idx, batch, self._failed_pages - committed_failures)
+
+        progress_log.close()
 
         if summary_debug_file:
             summary_debug_file.close()
@@ -343,28 +694,206 @@ class IngestPipeline:
             chunk_debug_file.close()
             self.logger.info(f"Wrote raw chunks to {self.debug_chunks_path}")
 
+        if previous_pages is not None:
+            removed_urls = set(previous_pages) - set(self._page_hashes)
+            stale_urls = changed_urls | removed_urls
+            if stale_urls and callable(getattr(self.db, "delete_by_page_url", None)):
+                # Routed by page URL: a sharded index only touches the shards owning these pages
+                self.db.delete_by_page_url(stale_urls)
+            elif stale_urls:
+                stale_ids = self.db.ids_for_page_urls(stale_urls)
+                if stale_ids:
+                    self.db.delete(stale_ids)
+            self._last_delta = {
+                "pages_added": len(set(self._page_hashes) - set(previous_pages)),
+                "pages_changed": len(changed_urls),
+                "pages_removed": len(removed_urls),
+                "pages_unchanged": unchanged_count,
+            }
+            self.logger.info(f"Incremental index delta: {self._last_delta}")
+
         return transformed_records
 
+    def _safe_transform_batch(self, pending: List[Dict[str, Any]], summary_debug_file=None) -> List[dict]:
+        """_transform_batch(), marking every page of the batch as failed if it raises."""
+        try:
+            return self._transform_batch(pending, summary_debug_file)
+        except Exception as e:
+            self.logger.error(f"Failed to transform a batch of {len(pending)} chunks: {e}")
+            self._failed_pages.update(item["url"] for item in pending)
+            return []
+
+    def _transform_batch(self, pending: List[Dict[str, Any]], summary_debug_file=None) -> List[dict]:
+        """
+        (optional) summarize -> split -> embed a batch of chunks collected by transform().
+        """
+        if self.use_summary and self.summarizer:
+            with self._timed("summarize"):
+                summaries = self._summarize_many([(item["url"], item["chunk"]["text"]) for item in pending])
+        else:
+            summaries = [None] * len(pending)
+
+        segmented: List[Tuple[Dict[str, Any], List[str]]] = []
+        for item, summary_text in zip(pending, summaries):
+            url, chunk = item["url"], item["chunk"]
+            content_to_embed = chunk["text"]
+
+            # If the summarizer failed, proceed with the original text
+            if summary_text:
+                chunk["summary"] = summary_text
+                content_to_embed = summary_text
+
+                if self.debug and summary_debug_file:
+                    json.dump(
+                        {
+                            "url": chunk.get("url", url),
+                            "chunk_index": chunk.get("chunk_index", -1),
+                            "original_preview": chunk.get("text", "")[:500],
+                            "summary_preview": summary_text[:500],
+                        },
+                        summary_debug_file,
+                    )
+                    summary_debug_file.write("\n")
+
+            with self._timed("tokenize"):
+                parts = self._chunk_for_embedding(content_to_embed)
+            segmented.append((item, parts))
+
+        # Embed each segment text not seen earlier in this run once, batched when the embedder supports it
+        new_texts = list(
+            dict.fromkeys(
+                part for _, parts in segmented for part in parts if self._segment_key(part) not in self._segment_vectors
+            )
+        )
+        with self._timed("embed"):
+            self._embed_segments(new_texts)
+
+        out: List[dict] = []
+        for item, parts in segmented:
+            url, chunk, record = item["url"], item["chunk"], item["record"]
+            parent_chunk_id = f"{url}#chunk_{chunk.get('chunk_index', -1)}"
+
+            for seg_idx, part in enumerate(parts):
+                embedding = self._segment_vectors.get(self._segment_key(part))
+                if embedding is None:
+                    self.logger.warning(f"Skipping chunk from {url} seg {seg_idx} - no embedding.")
+                    self._failed_pages.add(url)
+                    continue
+
+                out.append(
+                    {
+                        **chunk,  # keep original fields (url, hierarchy, etc.)
+                        "text": part,  # the actual embedded segment text
+                        "embedding": embedding,
+                        "id": f"{parent_chunk_id}__seg_{seg_idx}",
+                        "metadata": {
+                            **(chunk.get("metadata", {}) or {}),
+                            "chunk_id": parent_chunk_id,  # keep original id as parent
+                            "seg_index": seg_idx,
+                            "seg_count": len(parts),
+                            "page_url": url,
+                            **item["link_fields"],
+                            "crawled_at": record.get("crawled_at", ""),
+                        },
+                    }
+                )
+        return out
+
+    def _preferred_embed_batch_size(self) -> Optional[int]:
+        """The embedder's ``preferred_batch_size`` (e.g. enough texts to keep a worker pool busy), if set."""
+        preferred = getattr(self.embedder, "preferred_batch_size", None)
+        return preferred if isinstance(preferred, int) and preferred > 0 else None
+
+    def _embed_segments(self, texts: List[str]) -> None:
+        """
+        Embed *texts* into ``_segment_vectors``. Uses ``embedder.embed_batch`` in groups of the
+        embedder's ``preferred_batch_size`` (``_EMBED_BATCH_SIZE`` if it has none) when available and
+        falls back to one ``embed`` call per text if a batch fails. Texts whose embedding fails or is
+        None are left out.
+        """
+        embed_batch = getattr(self.embedder, "embed_batch", None)
+        group_size = self._preferred_embed_batch_size() or self._EMBED_BATCH_SIZE
+        for start in range(0, len(texts), group_size):
+            batch = texts[start : start + group_size]
+            vectors = None
+            if callable(embed_batch) and len(batch) > 1:
+                try:
+                    vectors = list(embed_batch(batch))
+                    if len(vectors) != len(batch):
+                        self.logger.warning(
+                            f"embed_batch returned {len(vectors)} vectors for {len(batch)} texts; embedding one by one"
+                        )
+                        vectors = None
+                except Exception as e:
+                    self.logger.warning(f"Batch embedding failed, embedding one by one: {e}")
+                    vectors = None
+            if vectors is None:
+                vectors = []
+                for text in batch:
+                    try:
+                        vectors.append(self.embedder.embed(text))
+                    except Exception as e:
+                        self.logger.error(f"Embedding error for segment {text[:60]!r}: {e}")
+                        vectors.append(None)
+            for text, vector in zip(batch, vectors):
+                if vector is not None:
+                    self._segment_vectors[self._segment_key(text)] = vector
+
     def load(self, records: List[dict]):
         """
-        Write records to FAISS and persist to disk.
+        Write records to FAISS and persist to disk. A new non-flat index is created again here once the
+        vector count is known, and trained before any vector is added.
         """
         if not isinstance(records, list):
             records = []
 
-        for rec in records:
+        if self.collapse_duplicate_segments:
+            if self.incremental:
+                # A shared record is owned by one page; deleting that page would orphan the others
+                self.logger.warning("collapse_duplicate_segments is ignored for incremental index runs")
+            else:
+                records = self._collapse_duplicates(records)
+
+        if self._index_is_new and self.index_type != "flat":
+            # Sizing ("auto" type, IVF nlist) depends on the vector count, known only now
+            self._create_index(expected_count=len(records))
+        with self._timed("index_train"):
+            self._train_index(records)
+
+        with self._timed("index_add"):
+            for rec in records:
+                try:
+                    self.db.add([rec])
+                except Exception as e:
+                    self.logger.error(f"Failed to add record: {e}")
+                    self._failed_pages.add((rec.get("metadata") or {}).get("page_url") or rec.get("url"))
+
+        if getattr(self.db, "stores_page_links", False):
+            self.db.set_page_links(self._page_links)
+
+        # Embedding caches buffer writes; persist this run's vectors alongside the index
+        flush_cache = getattr(self.embedder, "flush_cache", None)
+        if callable(flush_cache):
             try:
-                self.db.add([rec])
+                flush_cache()
             except Exception as e:
-                self.logger.error(f"Failed to add record: {e}")
+                self.logger.warning(f"Failed to flush embedding cache: {e}")
 
         # Persist index + metadata
         try:
-            self.db.save(self.index_path)
+            with self._timed("save"):
+                self.db.save(self.index_path)
             self.logger.info(f"Saved index to {self.index_path}")
         except Exception as e:
             raise RuntimeError(f"[IngestPipeline] Failed to save index to {self.index_path}: {e}")
 
+        # Page hashes let the next incremental run skip unchanged pages
+        if self._page_hashes:
+            self._write_manifest()
+
+        # The index now holds this run's records; a later run must not replay them
+        self._clear_progress()
+
     # -------------------------------------------------------------------------
     # Orchestrator
     # -------------------------------------------------------------------------
@@ -374,22 +903,28 @@ class IngestPipeline:
         settings_override: dict = None,
         force_crawl: bool = False,
         mode: str = "both",  # "crawl_only" | "index_only" | "both"
+        incremental: Optional[bool] = None,
     ):
         """
         mode:
           - "crawl_only": only run the crawler and produce results.jsonl/graph.json
           - "index_only": only read results.jsonl/.json -> build FAISS index
           - "both": (default) crawl if needed, then index
+
+        incremental: override the pipeline's ``incremental`` setting for this run.
         """
         mode = (mode or "both").lower()
         if mode not in ("crawl_only", "index_only", "both"):
             raise ValueError(f"Invalid mode: {mode}")
+        if incremental is not None:
+            self.incremental = bool(incremental)
 
         if force_crawl:
             try:
                 os.remove(self._checkpoint_path())
             except FileNotFoundError:
                 pass
+            self._clear_progress()
 
         # ---------------- Crawl phase ----------------
         if mode in ("crawl_only", "both"):
@@ -481,16 +1016,25 @@ class IngestPipeline:
                     r.get("metadata", {}).get("page_url", "") for r in records
                     if r.get("metadata")
                 })
-                self._write_checkpoint("load_done", {"indexed_url_count": indexed_url_count})
+                extra = {"indexed_url_count": indexed_url_count}
+                if self._last_delta is not None:
+                    extra["delta"] = self._last_delta
+                self._write_checkpoint("load_done", extra)
             except Exception as e:
-                self._write_checkpoint("transform_or_load_failed", {"error": str(e)})
+                # Keep the committed offset so the next index run resumes instead of starting over
+                self._write_checkpoint("transform_or_load_failed", {"error": str(e), **(self._progress or {})})
                 raise
+            finally:
+                self._close_embedder()
             self.logger.info("Indexing phase complete.")
-            return {
+            result = {
                 "crawled": (mode == "both"),
                 "indexed": True,
                 "index_path": self.index_path,
             }
+            if self._last_delta is not None:
+                result["delta"] = self._last_delta
+            return result
 
     # -------------------------------------------------------------------------
     # Checkpoint helpers
@@ -506,6 +1050,108 @@ class IngestPipeline:
         except Exception:
             return {}
 
+    def _close_embedder(self) -> None:
+        """Release embedder resources held for the run (e.g. a multi-process encode pool)."""
+        close = getattr(self.embedder, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                self.logger.warning(f"Failed to close embedder: {e}")
+
+    def _progress_log_path(self) -> str:
+        return os.path.join(getattr(self.crawler, "output_dir", "."), "ingest_progress.jsonl")
+
+    def _clear_progress(self) -> None:
+        try:
+            os.remove(self._progress_log_path())
+        except FileNotFoundError:
+            pass
+
+    def _progress_state(self, results_path: str, chunker_fingerprint: str) -> dict:
+        """
+        Identity of the inputs and settings a progress log is valid for: the results file, the
+        embedding model, the summarizer and the chunker.
+        """
+        stat = os.stat(results_path)
+        embedder_model = (
+            getattr(self.embedder, "_cache_model", None)
+            or getattr(self.embedder, "model_name", None)
+            or getattr(self.embedder, "model", None)
+        )
+        summarizer = None
+        if self.use_summary and self.summarizer:
+            llm = getattr(self.summarizer, "llm", None)
+            summarizer = {
+                "class": f"{type(self.summarizer).__module__}.{type(self.summarizer).__qualname__}",
+                "model": str(getattr(llm, "model_name", None) or getattr(llm, "model", None) or ""),
+                "prompt_template": str(getattr(self.summarizer, "prompt_template", "") or ""),
+            }
+        return {
+            "results_path": os.path.abspath(results_path),
+            "results_size": stat.st_size,
+            "results_mtime_ns": stat.st_mtime_ns,
+            "embedding_model": str(embedder_model) if embedder_model is not None else None,
+            "dim": getattr(self.embedder, "dim", None),
+            "summarizer": summarizer,
+            "chunker": chunker_fingerprint,
+            "incremental": self.incremental,
+        }
+
+    def _resume_progress(self, state: dict) -> Tuple[int, List[dict]]:
+        """
+        Return (last committed results line, embedded records) from an interrupted run over the same
+        inputs. Anything else starts from zero and truncates the progress log.
+        """
+        checkpoint = self._read_checkpoint()
+        offset = checkpoint.get("results_offset")
+        same_inputs = all(checkpoint.get(k) == v for k, v in state.items())
+        if not isinstance(offset, int) or offset <= 0 or not same_inputs:
+            self._clear_progress()
+            return 0, []
+
+        records: List[dict] = []
+        valid_lines: List[str] = []
+        try:
+            with open(self._progress_log_path(), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn write from the interrupted run
+                    # Batches logged after the last checkpoint write are not committed
+                    if entry.get("offset", offset + 1) > offset:
+                        break
+                    records.extend(entry.get("records") or [])
+                    self._failed_pages.update(entry.get("failed_pages") or [])
+                    valid_lines.append(line)
+        except FileNotFoundError:
+            return 0, []
+
+        # Drop uncommitted tail so later appends start from a clean log
+        with open(self._progress_log_path(), "w", encoding="utf-8") as f:
+            f.writelines(valid_lines)
+        self._progress = {**state, "results_offset": offset}
+        return offset, records
+
+    def _commit_progress(
+        self, progress_log, state: dict, offset: int, records: List[dict], failed_pages: Iterable[str] = ()
+    ) -> None:
+        """
+        Append a batch of embedded records (and the pages that failed since the last commit) to the
+        progress log, then advance the checkpoint.
+        """
+        try:
+            json.dump({"offset": offset, "records": records, "failed_pages": sorted(failed_pages)}, progress_log)
+            progress_log.write("\n")
+            progress_log.flush()
+            os.fsync(progress_log.fileno())
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"Failed to append ingest progress log: {e}")
+            return
+        self._progress = {**state, "results_offset": offset}
+        self._write_checkpoint("transform_progress", self._progress)
+
     def _write_checkpoint(self, stage: str, extra: dict | None = None) -> None:
         from datetime import datetime, timezone
         path = self._checkpoint_path()
@@ -6,6 +6,7 @@ from webly.pipeline.query_context import QueryContextTools
 from webly.pipeline.query_retriever import QueryRetriever
 from webly.pipeline.query_response_composer import QueryResponseComposer
 from webly.query_result import QueryResult, SourceRef
+from webly.vector_index.search_filter import SearchFilter
 
 
 class QueryPipeline:
@@ -85,15 +86,32 @@ class QueryPipeline:
         self._last_trace: Dict[str, Any] = {}
 
     # ---------------- Core entrypoint ----------------
-    def query(self, question: str, retry_on_empty: bool = False, memory_context: str = "") -> str:
-        return self.query_result(question, retry_on_empty=retry_on_empty, memory_context=memory_context).answer
+    def query(
+        self,
+        question: str,
+        retry_on_empty: bool = False,
+        memory_context: str = "",
+        search_filter: Optional[SearchFilter] = None,
+    ) -> str:
+        return self.query_result(
+            question, retry_on_empty=retry_on_empty, memory_context=memory_context, search_filter=search_filter
+        ).answer
 
-    def query_result(self, question: str, retry_on_empty: bool = False, memory_context: str = "") -> QueryResult:
+    def query_result(
+        self,
+        question: str,
+        retry_on_empty: bool = False,
+        memory_context: str = "",
+        search_filter: Optional[SearchFilter] = None,
+    ) -> QueryResult:
+        """*search_filter* restricts every retrieval pass of this question to matching records."""
         self._last_supported = False
         self._last_trace = {}
         self._last_used_sources = []
         if (self.retrieval_mode or "classic").lower() == "builder":
-            return self._query_builder(question, retry_on_empty=retry_on_empty, memory_context=memory_context)
+            return self._query_builder(
+                question, retry_on_empty=retry_on_empty, memory_context=memory_context, search_filter=search_filter
+            )
 
         if self.debug:
             self.logger.debug(f"User query: {question}")
@@ -104,7 +122,9 @@ class QueryPipeline:
         question_for_answer = f"{memory_context}\nUser: {question}".strip() if memory_context else question
 
         # === Pass 1: initial search ===
-        initial_results = self._search(question_for_search, self.top_k_first_pass, tag="initial")
+        initial_results = self._search(
+            question_for_search, self.top_k_first_pass, tag="initial", search_filter=search_filter
+        )
         if self.debug:
             self.logger.debug(f"Initial results ({len(initial_results)}): {[r.get('id') for r in initial_results]}")
 
@@ -114,7 +134,9 @@ class QueryPipeline:
             except AttributeError:
                 pass
             self.recrawl_fn()
-            initial_results = self._search(question_for_search, self.top_k_first_pass, tag="initial-after-recrawl")
+            initial_results = self._search(
+                question_for_search, self.top_k_first_pass, tag="initial-after-recrawl", search_filter=search_filter
+            )
 
         if not initial_results:
             answer, supported = self._fallback_payload([], question)
@@ -135,12 +157,12 @@ class QueryPipeline:
         # Optional expansions for the initial seeds
         seeds = list(initial_results)
         if self.enable_graph_expansion:
-            graph_expanded = self._expand_via_graph(question, seeds)
+            graph_expanded = self._expand_via_graph(question, seeds, search_filter=search_filter)
             if self.debug and graph_expanded:
                 self.logger.debug(f"Graph expansion added {len(graph_expanded)} results")
             saved_results.extend(graph_expanded)
         if self.enable_section_expansion:
-            section_expanded = self._expand_via_section(question, seeds)
+            section_expanded = self._expand_via_section(question, seeds, search_filter=search_filter)
             if self.debug and section_expanded:
                 self.logger.debug(f"Section expansion added {len(section_expanded)} results")
             saved_results.extend(section_expanded)
@@ -191,22 +213,22 @@ class QueryPipeline:
             if not subqueries:
                 break
 
-            # Run second-pass searches for each subquery
-            hop_results: List[Dict[str, Any]] = []
-            for q in subqueries:
-                hop_results.extend(self._search(q, self.top_k_second_pass, tag="rewrite"))
+            # Run second-pass searches for all subqueries in one batch
+            hop_results: List[Dict[str, Any]] = self._search(
+                subqueries, self.top_k_second_pass, tag="rewrite", search_filter=search_filter
+            )
 
             if self.debug and hop_results:
                 self.logger.debug(f"Hop {hop} rewritten results: {[r.get('id') for r in hop_results]}")
 
             # Optional expansions on hop results
             if self.enable_graph_expansion and hop_results:
-                hop_graph = self._expand_via_graph(question, hop_results)
+                hop_graph = self._expand_via_graph(question, hop_results, search_filter=search_filter)
                 if self.debug and hop_graph:
                     self.logger.debug(f"Hop {hop} graph expansion added {len(hop_graph)} results")
                 hop_results.extend(hop_graph)
             if self.enable_section_expansion and hop_results:
-                hop_section = self._expand_via_section(question, hop_results)
+                hop_section = self._expand_via_section(question, hop_results, search_filter=search_filter)
                 if self.debug and hop_section:
                     self.logger.debug(f"Hop {hop} section expansion added {len(hop_section)} results")
                 hop_results.extend(hop_section)
@@ -262,7 +284,13 @@ class QueryPipeline:
             },
         )
 
-    def _query_builder(self, question: str, retry_on_empty: bool = False, memory_context: str = "") -> QueryResult:
+    def _query_builder(
+        self,
+        question: str,
+        retry_on_empty: bool = False,
+        memory_context: str = "",
+        search_filter: Optional[SearchFilter] = None,
+    ) -> QueryResult:
         if self.debug:
             self.logger.debug(f"[builder] User query: {question}")
             if memory_context:
@@ -331,7 +359,9 @@ class QueryPipeline:
             question_for_search = question
             question_for_answer = question
 
-        initial_results = self._search(question_for_search, self.top_k_first_pass, tag="initial")
+        initial_results = self._search(
+            question_for_search, self.top_k_first_pass, tag="initial", search_filter=search_filter
+        )
         if self.debug:
             self.logger.debug(
                 f"[builder] Initial results ({len(initial_results)}): "
@@ -344,7 +374,9 @@ class QueryPipeline:
             except AttributeError:
                 pass
             self.recrawl_fn()
-            initial_results = self._search(question_for_search, self.top_k_first_pass, tag="initial-after-recrawl")
+            initial_results = self._search(
+                question_for_search, self.top_k_first_pass, tag="initial-after-recrawl", search_filter=search_filter
+            )
 
         if not initial_results:
             answer, supported = self._fallback_payload([], question)
@@ -395,8 +427,9 @@ class QueryPipeline:
                 )
             if not extra_queries:
                 break
-            for q in extra_queries:
-                saved_results.extend(self._search(q, self.top_k_second_pass, tag="builder-followup"))
+            saved_results.extend(
+                self._search(extra_queries, self.top_k_second_pass, tag="builder-followup", search_filter=search_filter)
+            )
 
         combined = self._combine_and_rerank(saved_results)[: self.max_results_to_consider]
         context = self._assemble_context(combined, max_chars=self._compute_budget_chars(question))
@@ -473,17 +506,23 @@ class QueryPipeline:
     def _current_sources(self) -> List[SourceRef]:
         return self.context_tools.current_sources(self._last_used_sources)
 
-    def _search(self, query: Optional[Union[str, List[str]]], k: int, tag: str) -> List[Dict[str, Any]]:
-        return self.retriever.search(query, k, tag)
+    def _search(
+        self, query: Optional[Union[str, List[str]]], k: int, tag: str, search_filter: Optional[SearchFilter] = None
+    ) -> List[Dict[str, Any]]:
+        return self.retriever.search(query, k, tag, search_filter=search_filter)
 
     def _collect_hints_for_rewrite(self, results: List[Dict[str, Any]]) -> List[str]:
         return self.retriever.collect_hints_for_rewrite(results)
 
-    def _expand_via_graph(self, question: str, seeds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        return self.retriever.expand_via_graph(question, seeds)
+    def _expand_via_graph(
+        self, question: str, seeds: List[Dict[str, Any]], search_filter: Optional[SearchFilter] = None
+    ) -> List[Dict[str, Any]]:
+        return self.retriever.expand_via_graph(question, seeds, search_filter=search_filter)
 
-    def _expand_via_section(self, question: str, seeds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        return self.retriever.expand_via_section(question, seeds)
+    def _expand_via_section(
+        self, question: str, seeds: List[Dict[str, Any]], search_filter: Optional[SearchFilter] = None
+    ) -> List[Dict[str, Any]]:
+        return self.retriever.expand_via_section(question, seeds, search_filter=search_filter)
 
     def _combine_and_rerank(self, *result_groups: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         return self.retriever.combine_and_rerank(*result_groups)
@@ -568,8 +607,10 @@ class QueryPipeline:
         self.retriever._ensure_bm25()
         return
 
-    def _bm25_search(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
-        return self.retriever._bm25_search(query, top_k=top_k)
+    def _bm25_search(
+        self, query: str, top_k: int = 10, search_filter: Optional[SearchFilter] = None
+    ) -> List[Dict[str, Any]]:
+        return self.retriever._bm25_search(query, top_k=top_k, search_filter=search_filter)
 
     def _normalize_for_dedupe(self, url: str) -> str:
         return self.retriever._normalize_for_dedupe(url)
@@ -2,13 +2,31 @@ from __future__ import annotations
 
 import math
 import re
-from collections import defaultdict
+import threading
+from collections import OrderedDict, defaultdict
 from logging import Logger
 from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
+from webly.vector_index.search_filter import SearchFilter
+from webly.vector_index.search_hit import SearchHit
+
+# BM25 corpora by the vector DB's ``corpus_key`` (a saved, unmodified index), shared by retrievers
+# across requests so the record store is tokenized once per index and process
+_BM25_CACHE_SIZE = 4
+_bm25_cache: "OrderedDict[Any, Tuple]" = OrderedDict()
+_bm25_cache_lock = threading.Lock()
+
 
 class QueryRetriever:
+    """
+    Vector + BM25 retrieval, expansion and reranking for ``QueryPipeline``.
+
+    Search results are ``SearchHit``s when the vector DB provides ``search_hits`` (BM25 hits always
+    are): they reference the stored records and carry ranking annotations themselves, so no record
+    is copied until ``combine_and_rerank`` materializes the final candidates as plain dicts.
+    """
+
     def __init__(
         self,
         chat_agent,
@@ -35,14 +53,27 @@ class QueryRetriever:
         self._bm25_k1 = 1.5
         self._bm25_b = 0.75
 
-    def search(self, query: Optional[Union[str, List[str]]], k: int, tag: str) -> List[Dict[str, Any]]:
+    def search(
+        self,
+        query: Optional[Union[str, List[str]]],
+        k: int,
+        tag: str,
+        search_filter: Optional[SearchFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Vector (and, with hybrid enabled, BM25) hits for one query or several. *search_filter* is passed
+        per call rather than kept on the retriever, which concurrent requests share.
+        """
         if not query:
             return []
-        queries = [query] if isinstance(query, str) else list(query)
+        queries = [query] if isinstance(query, str) else [q for q in query if q]
+        if not queries:
+            return []
+        # One embed_batch call and one multi-query vector search for all queries
+        result_lists = self._vector_search(self._embed_queries(queries), k, search_filter=search_filter)
         all_results: List[Dict[str, Any]] = []
-        for q in queries:
-            q_emb = self.chat_agent.embedder.embed(q)
-            results = self.chat_agent.vector_db.search(q_emb, top_k=k) or []
+        for q, results in zip(queries, result_lists):
+            results = results or []
             if self.score_threshold > 0.0:
                 results = [
                     record
@@ -56,7 +87,7 @@ class QueryRetriever:
             all_results.extend(results)
 
             if self.enable_hybrid:
-                bm25_hits = self._bm25_search(q, top_k=max(8, k))
+                bm25_hits = self._bm25_search(q, top_k=max(8, k), search_filter=search_filter)
                 for i, record in enumerate(bm25_hits):
                     record.setdefault("_meta_rank", i)
                     record.setdefault("_origin", f"{tag}-bm25")
@@ -64,23 +95,62 @@ class QueryRetriever:
                 all_results.extend(bm25_hits)
         return all_results
 
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        embedder = self.chat_agent.embedder
+        embed_batch = getattr(embedder, "embed_batch", None)
+        if len(queries) > 1 and callable(embed_batch):
+            vectors = embed_batch(queries)
+            # embed_batch skips blank texts; fall back so vectors stay aligned with queries
+            if len(vectors) == len(queries):
+                return vectors
+        return [embedder.embed(q) for q in queries]
+
+    def _vector_search(
+        self, embeddings: List[List[float]], k: int, search_filter: Optional[SearchFilter] = None
+    ) -> List[List[Dict[str, Any]]]:
+        vector_db = self.chat_agent.vector_db
+        # Only pass the filter when one is set, so backends without filter support keep working
+        kwargs = {"search_filter": search_filter} if search_filter else {}
+        search_hits = getattr(vector_db, "search_hits", None)
+        if callable(search_hits):
+            return search_hits(embeddings, top_k=k, **kwargs)
+        search_batch = getattr(vector_db, "search_batch", None)
+        if len(embeddings) > 1 and callable(search_batch):
+            return search_batch(embeddings, top_k=k, **kwargs)
+        return [vector_db.search(q_emb, top_k=k, **kwargs) for q_emb in embeddings]
+
+    def _incoming_links(self, record: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Backlinks for a record's page. Older indexes store them inline in each record's metadata;
+        newer ones keep them once per page in the vector DB's link table, resolved here on demand.
+        """
+        metadata = record.get("metadata") or {}
+        if "incoming_links" in metadata:
+            return metadata.get("incoming_links") or []
+        page_url = metadata.get("page_url")
+        get_page_links = getattr(self.chat_agent.vector_db, "get_page_links", None)
+        if not page_url or get_page_links is None:
+            return []
+        return (get_page_links(page_url) or {}).get("incoming_links") or []
+
     def collect_hints_for_rewrite(self, results: List[Dict[str, Any]]) -> List[str]:
         hints: List[str] = []
         for record in results[:8]:
             if record.get("hierarchy"):
                 hints.append(" > ".join(record["hierarchy"]))
-            for incoming in record.get("metadata", {}).get("incoming_links") or []:
+            for incoming in self._incoming_links(record):
                 if incoming.get("anchor_text"):
                     hints.append(incoming["anchor_text"])
         return [hint for hint in hints if hint]
 
-    def expand_via_graph(self, question: str, seeds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        expansions: List[Dict[str, Any]] = []
+    def expand_via_graph(
+        self, question: str, seeds: List[Dict[str, Any]], search_filter: Optional[SearchFilter] = None
+    ) -> List[Dict[str, Any]]:
+        queries: List[str] = []
         seen_queries = set()
 
         for record in seeds[:12]:
-            incoming_links = (record.get("metadata", {}) or {}).get("incoming_links") or []
-            for incoming in incoming_links[:5]:
+            for incoming in self._incoming_links(record)[:5]:
                 anchor = (incoming.get("anchor_text") or "").strip()
                 if not anchor:
                     continue
@@ -88,14 +158,18 @@ class QueryRetriever:
                 if query in seen_queries:
                     continue
                 seen_queries.add(query)
-                results = self.search(query, k=3, tag="graph-anchor")
-                for expansion in results:
-                    expansion.setdefault("_boost_reason", "anchor")
-                expansions.extend(results)
+                queries.append(query)
+
+        # All anchor queries are embedded and searched together
+        expansions = self.search(queries, k=3, tag="graph-anchor", search_filter=search_filter)
+        for expansion in expansions:
+            expansion.setdefault("_boost_reason", "anchor")
         return expansions
 
-    def expand_via_section(self, question: str, seeds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        expansions: List[Dict[str, Any]] = []
+    def expand_via_section(
+        self, question: str, seeds: List[Dict[str, Any]], search_filter: Optional[SearchFilter] = None
+    ) -> List[Dict[str, Any]]:
+        queries: List[str] = []
         seen_queries = set()
 
         for record in seeds[:10]:
@@ -109,11 +183,11 @@ class QueryRetriever:
             if query in seen_queries:
                 continue
             seen_queries.add(query)
+            queries.append(query)
 
-            results = self.search(query, k=3, tag="section")
-            for expansion in results:
-                expansion.setdefault("_boost_reason", "section")
-            expansions.extend(results)
+        expansions = self.search(queries, k=3, tag="section", search_filter=search_filter)
+        for expansion in expansions:
+            expansion.setdefault("_boost_reason", "section")
         return expansions
 
     def combine_and_rerank(self, *result_groups: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -186,7 +260,8 @@ class QueryRetriever:
             seen_canon[canon] = count + 1
             canon_limited.append(record)
 
-        return canon_limited
+        # Only the final candidates become full (copied) records
+        return [record.to_dict() if isinstance(record, SearchHit) else record for record in canon_limited]
 
     def _tokenize(self, text: str) -> List[str]:
         return re.findall(r"[A-Za-z0-9_]{2,}", (text or "").lower())
@@ -194,9 +269,38 @@ class QueryRetriever:
     def _ensure_bm25(self) -> None:
         if self._bm25_ready:
             return
+        vector_db = self.chat_agent.vector_db
+        corpus_key = getattr(vector_db, "corpus_key", None)
+        if corpus_key is not None:
+            with _bm25_cache_lock:
+                cached = _bm25_cache.get(corpus_key)
+                if cached is not None:
+                    _bm25_cache.move_to_end(corpus_key)
+            if cached is not None:
+                (self._bm25_docs, self._bm25_doc_ids, self._bm25_df, self._bm25_avgdl, self._bm25_idf) = cached
+                self._bm25_ready = True
+                return
+
+        self._build_bm25(vector_db)
+        if corpus_key is not None:
+            with _bm25_cache_lock:
+                _bm25_cache[corpus_key] = (
+                    self._bm25_docs,
+                    self._bm25_doc_ids,
+                    self._bm25_df,
+                    self._bm25_avgdl,
+                    self._bm25_idf,
+                )
+                while len(_bm25_cache) > _BM25_CACHE_SIZE:
+                    _bm25_cache.popitem(last=False)
+
+    def _build_bm25(self, vector_db) -> None:
+        # Stream the store page by page where the DB allows it instead of decoding it into one list
+        iter_records = getattr(vector_db, "iter_records", None)
+        records = (rec for _, rec in iter_records()) if callable(iter_records) else (vector_db.metadata or [])
         docs = []
         doc_ids = []
-        for record in self.chat_agent.vector_db.metadata or []:
+        for record in records:
             text = record.get("text") or record.get("summary") or ""
             if not text:
                 continue
@@ -227,7 +331,9 @@ class QueryRetriever:
         }
         self._bm25_ready = True
 
-    def _bm25_search(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+    def _bm25_search(
+        self, query: str, top_k: int = 10, search_filter: Optional[SearchFilter] = None
+    ) -> List[Dict[str, Any]]:
         self._ensure_bm25()
         if not self._bm25_docs:
             return []
@@ -255,10 +361,12 @@ class QueryRetriever:
 
         scores.sort(key=lambda item: item[0], reverse=True)
         hits = []
-        for score, index in scores[:top_k]:
-            if score <= 0:
+        for score, index in scores:
+            if score <= 0 or len(hits) >= top_k:
+                break
+            if search_filter and not search_filter.matches(self._bm25_doc_ids[index]):
                 continue
-            record = self._bm25_doc_ids[index].copy()
+            record = SearchHit(self._bm25_doc_ids[index])
             record["_score_bm25"] = float(score)
             hits.append(record)
         return hits
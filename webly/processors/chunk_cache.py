@@ -0,0 +1,63 @@
+"""
+SQLite-backed page chunk cache.
+
+Keyed by blake2b(url + page content hash + chunker fingerprint) so editing a
+page or changing the chunker (class, parameters, boilerplate set) produces
+fresh chunks.  ``IngestPipeline`` keeps one next to the crawl results, so a
+re-index after switching the embedding model or summarizer skips HTML
+parsing and chunking for every page it has already seen.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+
+class ChunkCache:
+    """Thread-safe SQLite cache for the chunk list of a page."""
+
+    _CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS chunks (
+        key        TEXT PRIMARY KEY,
+        chunks     TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    )
+    """
+
+    def __init__(self, db_path: str) -> None:
+        parent = os.path.dirname(db_path) or "."
+        os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(self._CREATE_SQL)
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(url: str, page_hash: str, chunker_fingerprint: str) -> str:
+        """Deterministic cache key for a (url, page content hash, chunker fingerprint) triple."""
+        payload = "\x00".join((url, page_hash, chunker_fingerprint)).encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> list[dict] | None:
+        """Return the cached chunk list, or None on a cache miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT chunks FROM chunks WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, chunks: list[dict]) -> None:
+        """Store a page's chunk list under the given key."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chunks (key, chunks, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(chunks, ensure_ascii=False), datetime.now(timezone.utc).isoformat()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,61 @@
+"""
+SQLite-backed summary cache.
+
+Keyed by blake2b(text + summary model + prompt template) so changing either
+the model or the prompt produces a fresh summary.  ``IngestPipeline`` keeps
+one next to the crawl results whenever a summarizer is configured, so
+re-indexes and repeated boilerplate chunks do not pay for another LLM call.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+
+class SummaryCache:
+    """Thread-safe SQLite cache for chunk summaries."""
+
+    _CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS summaries (
+        key        TEXT PRIMARY KEY,
+        summary    TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    )
+    """
+
+    def __init__(self, db_path: str) -> None:
+        parent = os.path.dirname(db_path) or "."
+        os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(self._CREATE_SQL)
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(text: str, model_name: str, prompt_template: str) -> str:
+        """Deterministic cache key for a (text, model, prompt template) triple."""
+        payload = "\x00".join((text, model_name, prompt_template)).encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Return the cached summary, or None on a cache miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, summary: str) -> None:
+        """Store a summary under the given key."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at) VALUES (?, ?, ?)",
+                (key, summary, datetime.now(timezone.utc).isoformat()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,10 +1,13 @@
 import hashlib
-import re
 from abc import ABC, abstractmethod
-from typing import Dict, List, Tuple
+from typing import Dict, List, Set, Tuple
 
 from bs4 import BeautifulSoup, Tag
 
+_HEADING_LEVELS: Dict[str, int] = {f"h{i}": i for i in range(1, 7)}
+# Block-level tags likely to contain meaningful text
+_BLOCK_TAGS = frozenset({"p", "li", "pre", "code", "blockquote", "td", "table"})
+
 
 class TextChunker(ABC):
     """
@@ -57,10 +60,22 @@ class TextChunker(ABC):
 
 
 class SlidingTextChunker(TextChunker):
+    """
+    Heading-aware sliding-window chunker.
+
+    ``boilerplate_keys`` holds ``block_key()`` hashes of blocks found to repeat across the site
+    (menus, sidebars, legal text rendered as plain ``div``/``p``/``li``); matching blocks are
+    dropped before chunking. The ingest pipeline fills it from a corpus-level pass over
+    ``page_block_keys()``.
+    """
+
+    # Part of the ingest chunk-cache key; bump whenever the chunks produced for the same HTML change
+    cache_version: int = 1
+
     def __init__(self, max_words: int = 350, overlap: int = 50):
         self.max_words = max_words
         self.overlap = overlap
-        self._heading_re = re.compile(r"^h([1-6])$", re.I)
+        self.boilerplate_keys: Set[str] = set()
 
     # ---------- Cleaning ----------
     def _clean_html(self, html: str) -> BeautifulSoup:
@@ -79,6 +94,29 @@ class SlidingTextChunker(TextChunker):
         base = f"{url}|{' > '.join(hierarchy)}|{local_idx}"
         return hashlib.blake2b(base.encode("utf-8"), digest_size=10).hexdigest()
 
+    @staticmethod
+    def block_key(text: str) -> str:
+        """Whitespace-insensitive hash of a block's text."""
+        normalized = " ".join(text.split()).lower()
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+
+    def page_block_keys(self, html: str) -> Set[str]:
+        """Distinct ``block_key()`` hashes of the text blocks chunk_html() would consider for *html*."""
+        sections = self._iter_sections(self._clean_html(html))
+        return {self.block_key(blk["text"]) for sec in sections for blk in sec["blocks"]}
+
+    def _drop_boilerplate(self, sections: List[Dict]) -> Tuple[List[Dict], bool]:
+        if not self.boilerplate_keys:
+            return sections, False
+        kept: List[Dict] = []
+        dropped = False
+        for sec in sections:
+            blocks = [b for b in sec["blocks"] if self.block_key(b["text"]) not in self.boilerplate_keys]
+            dropped = dropped or len(blocks) < len(sec["blocks"])
+            if blocks:
+                kept.append({**sec, "blocks": blocks})
+        return kept, dropped
+
     def _table_to_md(self, table: Tag) -> str:
         # very lightweight markdown rendering for tables
         rows = []
@@ -110,6 +148,13 @@ class SlidingTextChunker(TextChunker):
             txt = self._text(node)
         return txt, anchors
 
+    @staticmethod
+    def _is_container_block(node: Tag) -> bool:
+        """Block used for layout rather than content: it holds headings (or, for tables, other tables)."""
+        if node.find(list(_HEADING_LEVELS)):
+            return True
+        return node.name == "table" and node.find("table") is not None
+
     # ---------- Sectioning by headings ----------
     def _iter_sections(self, soup: BeautifulSoup) -> List[Dict]:
         """
@@ -118,57 +163,45 @@ class SlidingTextChunker(TextChunker):
           'hierarchy': [h1, h2, ...],
           'blocks': [ {'text':..., 'anchors':[...]} , ...]
         }
-        We walk headings in document order; a section spans until the next heading of same or higher level.
+        Single pass over the document in order: every heading closes the current section and starts a
+        new one under the updated heading path; text blocks go to the section they appear in. Blocks
+        before the first heading (or on pages without headings) form a section with an empty hierarchy.
+
+        Only outermost blocks are emitted: the walker does not descend into a block it has rendered, so
+        a ``<code>`` in a ``<pre>``, a ``<p>`` in an ``<li>`` or the cells of a rendered table are not
+        repeated. Blocks that contain headings (and layout tables holding other tables) are descended
+        into instead of rendered whole.
         """
         body = soup.body or soup
-        headings = body.find_all(self._heading_re)
         sections: List[Dict] = []
-
-        # If no headings at all, treat entire body as one section
-        if not headings:
-            blocks = []
-            # block-level nodes likely to contain meaningful text
-            for node in body.find_all(["p", "li", "pre", "code", "blockquote", "td", "table"]):
+        # Maintain current heading path (H1..Hn)
+        path: List[str] = []
+        blocks: List[Dict] = []
+
+        # Explicit stack so rendered blocks can be skipped without visiting their subtree
+        stack = [c for c in reversed(body.contents) if isinstance(c, Tag)]
+        while stack:
+            node = stack.pop()
+            name = (node.name or "").lower()
+            level = _HEADING_LEVELS.get(name)
+            if level is not None:
+                if blocks:
+                    sections.append({"hierarchy": path[:], "blocks": blocks})
+                    blocks = []
+                # update path to this level, padding missing parent headings
+                path = path[: level - 1]
+                while len(path) < level - 1:
+                    path.append("")
+                path.append(self._text(node))
+            elif name in _BLOCK_TAGS and not self._is_container_block(node):
                 txt, anchors = self._block_text_and_anchors(node)
                 if txt and len(txt.split()) > 3:
                     blocks.append({"text": txt, "anchors": anchors})
-            if blocks:
-                sections.append({"hierarchy": [], "blocks": blocks})
-            return sections
-
-        # Build sections delimited by headings
-        def level_of(tag: Tag) -> int:
-            m = self._heading_re.match(tag.name)
-            return int(m.group(1)) if m else 6
-
-        # Maintain current heading path (H1..Hn)
-        path: List[str] = []
-        for i, h in enumerate(headings):
-            curr_lvl = level_of(h)
-            # update path to this level
-            text = self._text(h)
-            if curr_lvl - 1 <= len(path):
-                path = path[: curr_lvl - 1]
-            # ensure parents exist up to level-1
-            while len(path) < curr_lvl - 1:
-                path.append("")  # missing parent heading
-            path = path + [text]
-
-            # Collect blocks until next heading of <= curr_lvl
-            blocks: List[Dict] = []
-            for sib in h.next_siblings:
-                if isinstance(sib, Tag):
-                    m = self._heading_re.match(sib.name or "")
-                    if m and int(m.group(1)) <= curr_lvl:
-                        break  # next sibling heading closes this section
-                    if sib.name in ["p", "li", "pre", "code", "blockquote", "td", "table"]:
-                        txt, anchors = self._block_text_and_anchors(sib)
-                        if txt and len(txt.split()) > 3:
-                            blocks.append({"text": txt, "anchors": anchors})
-            if blocks:
-                # copy the path for immutability per section
-                sections.append({"hierarchy": path[:], "blocks": blocks})
+            else:
+                stack.extend(c for c in reversed(node.contents) if isinstance(c, Tag))
 
+        if blocks:
+            sections.append({"hierarchy": path[:], "blocks": blocks})
         return sections
 
     # ---------- Chunking over blocks with sliding window ----------
@@ -240,7 +273,7 @@ class SlidingTextChunker(TextChunker):
 
     def chunk_html(self, html: str, url: str) -> List[Dict]:
         soup = self._clean_html(html)
-        sections = self._iter_sections(soup)
+        sections, dropped_boilerplate = self._drop_boilerplate(self._iter_sections(soup))
 
         all_chunks: List[Dict] = []
         for sec in sections:
@@ -249,8 +282,8 @@ class SlidingTextChunker(TextChunker):
             sec_chunks = self._chunk_section_blocks(url, hierarchy, blocks)
             all_chunks.extend(sec_chunks)
 
-        # If nothing at all, fallback to whole body text
-        if not all_chunks:
+        # If nothing at all, fallback to whole body text (unless the page was all boilerplate)
+        if not all_chunks and not dropped_boilerplate:
             body = soup.body or soup
             full_text = body.get_text(separator=" ", strip=True)
             if full_text:
@@ -35,6 +35,7 @@ class ProjectConfig:
     embedding_model: str = "openai:text-embedding-3-small"
     chat_model: str = "gpt-4o-mini"
     summary_model: str = ""
+    summary_concurrency: int = 4
     answering_mode: str = "technical_grounded"
     system_prompt: str = ""
     system_prompt_custom_override: bool = False
@@ -45,7 +46,25 @@ class ProjectConfig:
     score_threshold: float = 0.5
     debug: bool = False
     query_debug: bool = False
+    embedding_dimensions: int = 0
+    embedding_batch_size: int = 32
+    embedding_workers: int = 0
     embedding_cache_dir: str = ""
+    embedding_cache_dtype: str = "float32"
+    embedding_cache_memory_mb: float = 64
+    embedding_cache_max_mb: float = 0
+    embedding_cache_ttl_days: float = 0
+    incremental_index: bool = False
+    collapse_duplicate_segments: bool = False
+    boilerplate_threshold: float = 0.0
+    index_mmap: bool = False
+    index_type: str = "flat"
+    index_nlist: int = 0
+    index_pq_m: int = 0
+    index_hnsw_m: int = 0
+    index_nprobe: int = 0
+    index_ef_search: int = 0
+    index_shards: int = 1
 
     @classmethod
     def from_dict(
@@ -91,6 +110,7 @@ class ProjectConfig:
             embedding_model=raw["embedding_model"],
             chat_model=raw["chat_model"],
             summary_model=raw.get("summary_model", ""),
+            summary_concurrency=raw.get("summary_concurrency", 4),
             answering_mode=raw.get("answering_mode", "technical_grounded"),
             system_prompt=raw.get("system_prompt", ""),
             system_prompt_custom_override=raw.get("system_prompt_custom_override", False),
@@ -101,7 +121,25 @@ class ProjectConfig:
             score_threshold=raw.get("score_threshold", 0.5),
             debug=raw.get("debug", False),
             query_debug=raw.get("query_debug", False),
+            embedding_dimensions=raw.get("embedding_dimensions", 0),
+            embedding_batch_size=raw.get("embedding_batch_size", 32),
+            embedding_workers=raw.get("embedding_workers", 0),
             embedding_cache_dir=raw.get("embedding_cache_dir", ""),
+            embedding_cache_dtype=raw.get("embedding_cache_dtype", "float32"),
+            embedding_cache_memory_mb=raw.get("embedding_cache_memory_mb", 64),
+            embedding_cache_max_mb=raw.get("embedding_cache_max_mb", 0),
+            embedding_cache_ttl_days=raw.get("embedding_cache_ttl_days", 0),
+            incremental_index=raw.get("incremental_index", False),
+            collapse_duplicate_segments=raw.get("collapse_duplicate_segments", False),
+            boilerplate_threshold=raw.get("boilerplate_threshold", 0.0),
+            index_mmap=raw.get("index_mmap", False),
+            index_type=raw.get("index_type", "flat"),
+            index_nlist=raw.get("index_nlist", 0),
+            index_pq_m=raw.get("index_pq_m", 0),
+            index_hnsw_m=raw.get("index_hnsw_m", 0),
+            index_nprobe=raw.get("index_nprobe", 0),
+            index_ef_search=raw.get("index_ef_search", 0),
+            index_shards=raw.get("index_shards", 1),
         )
         config.validate()
         return config
@@ -129,6 +167,7 @@ class ProjectConfig:
             "embedding_model": self.embedding_model,
             "chat_model": self.chat_model,
             "summary_model": self.summary_model,
+            "summary_concurrency": self.summary_concurrency,
             "answering_mode": self.answering_mode,
             "system_prompt": self.system_prompt,
             "system_prompt_custom_override": self.system_prompt_custom_override,
@@ -139,7 +178,25 @@ class ProjectConfig:
             "score_threshold": self.score_threshold,
             "debug": self.debug,
             "query_debug": self.query_debug,
+            "embedding_dimensions": self.embedding_dimensions,
+            "embedding_batch_size": self.embedding_batch_size,
+            "embedding_workers": self.embedding_workers,
             "embedding_cache_dir": self.embedding_cache_dir,
+            "embedding_cache_dtype": self.embedding_cache_dtype,
+            "embedding_cache_memory_mb": self.embedding_cache_memory_mb,
+            "embedding_cache_max_mb": self.embedding_cache_max_mb,
+            "embedding_cache_ttl_days": self.embedding_cache_ttl_days,
+            "incremental_index": self.incremental_index,
+            "collapse_duplicate_segments": self.collapse_duplicate_segments,
+            "boilerplate_threshold": self.boilerplate_threshold,
+            "index_mmap": self.index_mmap,
+            "index_type": self.index_type,
+            "index_nlist": self.index_nlist,
+            "index_pq_m": self.index_pq_m,
+            "index_hnsw_m": self.index_hnsw_m,
+            "index_nprobe": self.index_nprobe,
+            "index_ef_search": self.index_ef_search,
+            "index_shards": self.index_shards,
         }
 
     def to_storage_dict(self) -> dict[str, Any]:
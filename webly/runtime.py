@@ -16,7 +16,9 @@ from webly.pipeline.query_pipeline import QueryPipeline
 from webly.project_config import ProjectConfig
 from webly.query_result import QueryResult
 from webly._webcreeper import configure_logging
-from webly.vector_index.faiss_db import FaissDatabase
+from webly.vector_index.faiss_db import SHARDS_FILENAME, FaissDatabase, index_exists
+from webly.vector_index.search_filter import SearchFilter
+from webly.vector_index.sharded_faiss_db import ShardedFaissDatabase
 
 
 @dataclass(slots=True)
@@ -32,18 +34,14 @@ class ProjectRuntime:
         return self.ingest_pipeline.db
 
     def index_exists(self) -> bool:
-        return (
-            os.path.isdir(self.config.index_dir)
-            and os.path.exists(os.path.join(self.config.index_dir, "embeddings.index"))
-            and os.path.exists(os.path.join(self.config.index_dir, "metadata.json"))
-        )
+        return os.path.isdir(self.config.index_dir) and index_exists(self.config.index_dir)
 
     def ensure_index_loaded(self) -> bool:
         if getattr(self.db, "index", None) is not None:
             return True
         if not self.index_exists():
             return False
-        self.db.load(self.config.index_dir)
+        self.db.load(self.config.index_dir, expected_dim=getattr(self.ingest_pipeline.embedder, "dim", None))
         return True
 
     def run_ingest(self, **kwargs):
@@ -52,14 +50,29 @@ class ProjectRuntime:
         finally:
             self.cost_tracker.flush()
 
-    def query(self, question: str, *, retry_on_empty: bool = False, memory_context: str = "") -> str:
+    def query(
+        self,
+        question: str,
+        *,
+        retry_on_empty: bool = False,
+        memory_context: str = "",
+        search_filter: Optional[SearchFilter] = None,
+    ) -> str:
         return self.query_result(
             question,
             retry_on_empty=retry_on_empty,
             memory_context=memory_context,
+            search_filter=search_filter,
         ).answer
 
-    def query_result(self, question: str, *, retry_on_empty: bool = False, memory_context: str = "") -> QueryResult:
+    def query_result(
+        self,
+        question: str,
+        *,
+        retry_on_empty: bool = False,
+        memory_context: str = "",
+        search_filter: Optional[SearchFilter] = None,
+    ) -> QueryResult:
         if self.query_pipeline is None:
             raise RuntimeError("Query pipeline is unavailable for this runtime.")
         if not self.ensure_index_loaded():
@@ -69,6 +82,7 @@ class ProjectRuntime:
                 question,
                 retry_on_empty=retry_on_empty,
                 memory_context=memory_context,
+                search_filter=search_filter,
             )
         finally:
             self.cost_tracker.flush()
@@ -95,14 +109,41 @@ def build_runtime(config: Mapping[str, Any] | ProjectConfig, api_key: Optional[s
             model_name=emb.split(":", 1)[1],
             api_key=api_key,
             cache_dir=project_config.embedding_cache_dir or None,
+            cache_dtype=project_config.embedding_cache_dtype or "float32",
+            cache_memory_mb=float(project_config.embedding_cache_memory_mb),
+            cache_max_mb=float(project_config.embedding_cache_max_mb),
+            cache_ttl_days=float(project_config.embedding_cache_ttl_days),
+            dimensions=int(project_config.embedding_dimensions) or None,
             cost_tracker=tracker,
         )
+    elif emb.startswith("onnx:"):
+        from webly.embedder.onnx_embedder import OnnxSentenceEmbedder
+
+        embedder = OnnxSentenceEmbedder(
+            emb.split(":", 1)[1],
+            batch_size=int(project_config.embedding_batch_size),
+        )
     else:
         from webly.embedder.hf_sentence_embedder import HFSentenceEmbedder
 
-        embedder = HFSentenceEmbedder(emb)
+        embedder = HFSentenceEmbedder(
+            emb,
+            batch_size=int(project_config.embedding_batch_size),
+            workers=int(project_config.embedding_workers),
+        )
 
-    db = FaissDatabase()
+    db_options = {
+        "mmap": bool(project_config.index_mmap),
+        "nprobe": int(project_config.index_nprobe) or None,
+        "ef_search": int(project_config.index_ef_search) or None,
+    }
+    # A sharded index on disk needs the sharded database whatever the config says now; it also reads
+    # a plain index as one shard, and index_shards applies when a full ingest creates a new index
+    index_shards = int(project_config.index_shards)
+    if index_shards > 1 or os.path.exists(os.path.join(project_config.index_dir, SHARDS_FILENAME)):
+        db = ShardedFaissDatabase(num_shards=index_shards, **db_options)
+    else:
+        db = FaissDatabase(**db_options)
     chatbot = None
     if api_key:
         chatbot = ChatGPTModel(api_key=api_key, model=project_config.chat_model, cost_tracker=tracker)
@@ -150,6 +191,16 @@ def build_runtime(config: Mapping[str, Any] | ProjectConfig, api_key: Optional[s
         summarizer=summarizer,
         use_summary=bool(summarizer),
         debug=bool(project_config.debug),
+        incremental=bool(project_config.incremental_index),
+        collapse_duplicate_segments=bool(project_config.collapse_duplicate_segments),
+        boilerplate_threshold=float(project_config.boilerplate_threshold),
+        summary_concurrency=int(project_config.summary_concurrency),
+        index_type=project_config.index_type,
+        index_options={
+            "nlist": int(project_config.index_nlist),
+            "pq_m": int(project_config.index_pq_m),
+            "hnsw_m": int(project_config.index_hnsw_m),
+        },
     )
     ingest_pipeline.cost_tracker = tracker
 
@@ -6,6 +6,7 @@ from webly.query_result import QueryResult
 from webly.service.dependencies import get_runtime_service
 from webly.service.schemas import ErrorResponse, QueryRequest, QueryResponse, SourceRefResponse
 from webly.service.services.runtime_service import RuntimeService
+from webly.vector_index.search_filter import SearchFilter
 
 router = APIRouter(prefix="/v1/projects", tags=["query"])
 
@@ -34,5 +35,6 @@ def query_project(
         question=request.question,
         retry_on_empty=request.retry_on_empty,
         memory_context=request.memory_context,
+        search_filter=SearchFilter(**request.search_filter.model_dump()) if request.search_filter else None,
     )
     return _query_response(result)
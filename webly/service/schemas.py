@@ -22,6 +22,7 @@ class ProjectConfigCreate(BaseModel):
     embedding_model: str = "openai:text-embedding-3-small"
     chat_model: str = "gpt-4o-mini"
     summary_model: str = ""
+    summary_concurrency: int = 4
     answering_mode: str = "technical_grounded"
     system_prompt: str = ""
     system_prompt_custom_override: bool = False
@@ -32,7 +33,25 @@ class ProjectConfigCreate(BaseModel):
     score_threshold: float = 0.5
     debug: bool = False
     query_debug: bool = False
+    embedding_dimensions: int = 0
+    embedding_batch_size: int = 32
+    embedding_workers: int = 0
     embedding_cache_dir: str = ""
+    embedding_cache_dtype: str = "float32"
+    embedding_cache_memory_mb: float = 64
+    embedding_cache_max_mb: float = 0
+    embedding_cache_ttl_days: float = 0
+    incremental_index: bool = False
+    collapse_duplicate_segments: bool = False
+    boilerplate_threshold: float = 0.0
+    index_mmap: bool = False
+    index_type: str = "flat"
+    index_nlist: int = 0
+    index_pq_m: int = 0
+    index_hnsw_m: int = 0
+    index_nprobe: int = 0
+    index_ef_search: int = 0
+    index_shards: int = 1
 
 
 class ProjectConfigPatch(BaseModel):
@@ -52,6 +71,7 @@ class ProjectConfigPatch(BaseModel):
     embedding_model: str | None = None
     chat_model: str | None = None
     summary_model: str | None = None
+    summary_concurrency: int | None = None
     answering_mode: str | None = None
     system_prompt: str | None = None
     system_prompt_custom_override: bool | None = None
@@ -62,7 +82,25 @@ class ProjectConfigPatch(BaseModel):
     score_threshold: float | None = None
     debug: bool | None = None
     query_debug: bool | None = None
+    embedding_dimensions: int | None = None
+    embedding_batch_size: int | None = None
+    embedding_workers: int | None = None
     embedding_cache_dir: str | None = None
+    embedding_cache_dtype: str | None = None
+    embedding_cache_memory_mb: float | None = None
+    embedding_cache_max_mb: float | None = None
+    embedding_cache_ttl_days: float | None = None
+    incremental_index: bool | None = None
+    collapse_duplicate_segments: bool | None = None
+    boilerplate_threshold: float | None = None
+    index_mmap: bool | None = None
+    index_type: str | None = None
+    index_nlist: int | None = None
+    index_pq_m: int | None = None
+    index_hnsw_m: int | None = None
+    index_nprobe: int | None = None
+    index_ef_search: int | None = None
+    index_shards: int | None = None
 
 
 class ProjectCreateRequest(BaseModel):
@@ -126,6 +164,15 @@ class ProjectStatusResponse(BaseModel):
     capabilities: RuntimeCapabilitiesResponse
 
 
+class SearchFilterRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    url_prefix: str | None = None
+    section: str | None = None
+    crawled_after: str | None = None
+    crawled_before: str | None = None
+
+
 class QueryRequest(BaseModel):
     model_config = ConfigDict(
         json_schema_extra={
@@ -133,6 +180,7 @@ class QueryRequest(BaseModel):
                 "question": "How does authentication work?",
                 "memory_context": "",
                 "retry_on_empty": False,
+                "search_filter": {"url_prefix": "/docs/api/"},
             }
         }
     )
@@ -140,6 +188,7 @@ class QueryRequest(BaseModel):
     question: str
     memory_context: str = ""
     retry_on_empty: bool = False
+    search_filter: SearchFilterRequest | None = None
 
 
 class SourceRefResponse(BaseModel):
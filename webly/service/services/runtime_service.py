@@ -6,6 +6,8 @@ from webly.query_result import QueryResult
 from webly.runtime import build_runtime
 from webly.service.errors import BadRequestError, NotFoundError, ServiceUnavailableError
 from webly.storage.project_repository import FileProjectRepository
+from webly.vector_index.faiss_db import index_exists
+from webly.vector_index.search_filter import SearchFilter
 
 
 class RuntimeService:
@@ -36,7 +38,15 @@ class RuntimeService:
         except RuntimeError as exc:
             raise ServiceUnavailableError(str(exc)) from exc
 
-    def query_project(self, project: str, *, question: str, retry_on_empty: bool = False, memory_context: str = "") -> QueryResult:
+    def query_project(
+        self,
+        project: str,
+        *,
+        question: str,
+        retry_on_empty: bool = False,
+        memory_context: str = "",
+        search_filter: SearchFilter | None = None,
+    ) -> QueryResult:
         status = self.status(project)
         self._require_query_ready(status)
         runtime = self.build_project_runtime(project)
@@ -45,6 +55,7 @@ class RuntimeService:
                 question,
                 retry_on_empty=retry_on_empty,
                 memory_context=memory_context,
+                search_filter=search_filter,
             )
         except FileNotFoundError as exc:
             raise ServiceUnavailableError(str(exc)) from exc
@@ -69,11 +80,7 @@ class RuntimeService:
         config = self.projects.load(safe_name)
         results_path = os.path.join(config.output_dir, config.results_file)
         results_ready = os.path.exists(results_path) and os.path.getsize(results_path) > 0
-        index_ready = (
-            os.path.isdir(config.index_dir)
-            and os.path.exists(os.path.join(config.index_dir, "embeddings.index"))
-            and os.path.exists(os.path.join(config.index_dir, "metadata.json"))
-        )
+        index_ready = os.path.isdir(config.index_dir) and index_exists(config.index_dir)
         uses_openai_embeddings = config.embedding_model.startswith("openai:")
         uses_summary_model = bool(config.summary_model)
         has_openai_api_key = bool(os.getenv("OPENAI_API_KEY"))
@@ -2,48 +2,117 @@ import hashlib
 import json
 import logging
 import os
-from typing import Dict, List, Optional
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 import faiss
 import numpy as np
 
+from .metadata_store import MetadataStore
+from .search_filter import SearchFilter
+from .search_hit import SearchHit
 from .vector_db import VectorDatabase
 
 logger = logging.getLogger(__name__)
 
-INDEX_VERSION: int = 1
+# v2: records, page links and config in a SQLite store (metadata.db) instead of metadata.json
+INDEX_VERSION: int = 2
+
+# Memory-map the stored vectors/codes without copying them (faiss >= 1.8). Older builds only know
+# IO_FLAG_MMAP, which maps IVF inverted lists and reads other index types into RAM as usual.
+_MMAP_FLAGS: int = getattr(faiss, "IO_FLAG_MMAP_IFC", 0) or faiss.IO_FLAG_MMAP
+
+# Written by ShardedFaissDatabase next to its shard_NNN/ directories
+SHARDS_FILENAME = "shards.json"
+
+
+def index_exists(path: str) -> bool:
+    """True if *path* holds a saved index (either metadata format, or a sharded index)."""
+    if os.path.exists(os.path.join(path, SHARDS_FILENAME)):
+        return True
+    return os.path.exists(os.path.join(path, "embeddings.index")) and (
+        os.path.exists(os.path.join(path, FaissDatabase._METADATA_FILENAME))
+        or os.path.exists(os.path.join(path, FaissDatabase._JSON_METADATA_FILENAME))
+    )
 
 
 class FaissDatabase(VectorDatabase):
     """
     Drop-in improved FAISS wrapper:
       - Stable 64-bit IDs via IndexIDMap2 (hash of a stable 'key')
-      - True remove_ids / add_with_ids for delete/update
-      - Optional index types: flat|hnsw|ivf_flat|ivf_pq
-      - Auto-train IVF on first add (without using .base_index; compatible with Windows wheels)
+      - O(k) tombstone deletes (``delete_many`` / ``delete_by_page_url``): dead ids are masked out
+        of searches and removed from FAISS in one compaction pass once they pass
+        ``_COMPACT_DEAD_FRACTION`` of the index
+      - True remove_ids / add_with_ids for update
+      - Optional index types: flat|hnsw|ivf_flat|ivf_pq, or "auto" to pick one by vector count
+      - IVF training via train() on a caller-chosen sample (falls back to the first add)
+      - Query-time nprobe / efSearch via set_search_params()
       - Cosine similarity via inner product + L2 normalization
+      - Optional memory-mapped, read-only loading (``mmap=True``): vectors stay in the page cache
+        shared by every process that maps the same file instead of being read into each one
+      - Metadata-filtered search (``SearchFilter``: URL prefix, top-level section, crawl date)
+        through FAISS ``IDSelector``s built from indexed store columns and cached per filter
+      - Records in a SQLite ``MetadataStore`` opened lazily: search decodes only its hits, and a
+        loaded store is copied into memory only when the index is modified
+      - ``search_hits`` returns ``SearchHit``s that share decoded records (cached across searches
+        until the next write) instead of copying a record per hit
     External usage/API unchanged.
     """
 
-    _METADATA_FILENAME = "metadata.json"
+    _METADATA_FILENAME = "metadata.db"
+    # Format of INDEX_VERSION 1 (and unversioned indexes); migrated on load
+    _JSON_METADATA_FILENAME = "metadata.json"
     _LEGACY_METADATA_FILENAME = "metadata.meta"
 
-    def __init__(self, index_path: str = None):
+    stores_page_links = True
+
+    # "auto" index type: flat up to _AUTO_FLAT_MAX vectors, HNSW up to _AUTO_HNSW_MAX, IVF-PQ beyond
+    _AUTO_FLAT_MAX: int = 50_000
+    _AUTO_HNSW_MAX: int = 1_000_000
+    # FAISS wants at least 39 training points per centroid; sample a comfortable multiple of that
+    _MIN_POINTS_PER_CENTROID: int = 39
+    _TRAIN_POINTS_PER_CENTROID: int = 64
+    # Compact (drop tombstoned vectors from FAISS) once this fraction of the index is dead
+    _COMPACT_DEAD_FRACTION: float = 0.2
+    # Filters matching at most this many vectors are searched exactly over just those vectors
+    # (flat / HNSW); HNSW graph search loses recall when most neighbours are filtered out
+    _EXACT_FILTER_MAX: int = 2048
+    # Resolved filters (matching ids + IDSelector) kept until the next write
+    _FILTER_CACHE_SIZE: int = 32
+    # Decoded records shared by search hits, kept until the next write
+    _RECORD_CACHE_SIZE: int = 4096
+
+    def __init__(
+        self,
+        index_path: str = None,
+        mmap: bool = False,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ):
         self.index_path = index_path
         self.index: Optional[faiss.Index] = None
         self.dim: Optional[int] = None
 
-        # Metadata storage (kept as a list for save/load compatibility)
-        self.metadata: List[Dict] = []
+        # load() maps the index file instead of reading it; a mapped index cannot be modified
+        self.mmap = mmap
+        self.read_only = False
 
-        # Maps
-        # key -> external id (we use the FAISS 64-bit id as the external id)
-        self.id_map: Dict[str, int] = {}
+        # Records (by FAISS id, which is also the external id), page links and config
+        self._store = MetadataStore()
+        # (path, mtime, size) of the saved metadata.db the read-only store views; see corpus_key
+        self._store_file_key: Optional[Tuple] = None
 
-        # faiss_id -> position in self.metadata
-        self._faiss_to_pos: Dict[int, int] = {}
-        # position -> faiss_id (helpful during maintenance)
-        self._pos_to_faiss: Dict[int, int] = {}
+        # FAISS ids deleted from the store but still in the index until the next compact()
+        self._tombstones: Set[int] = set()
+        self._dead_selector: Optional[faiss.IDSelector] = None
+
+        # SearchFilter -> (matching ids, selector) and FAISS id -> decoded record (read-only, shared
+        # by search hits); both cleared whenever records change
+        self._filter_cache: "OrderedDict[SearchFilter, Tuple[np.ndarray, faiss.IDSelector]]" = OrderedDict()
+        self._record_cache: "OrderedDict[int, Dict]" = OrderedDict()
+        self._cache_lock = threading.Lock()
 
         # Config
         self._index_type: str = "flat"
@@ -53,6 +122,11 @@ class FaissDatabase(VectorDatabase):
         self._hnsw_M: int = 32
         self._hnsw_efSearch: int = 64
         self._hnsw_efConstruction: int = 120
+        self._ivf_nprobe: int = 16
+
+        # Query-time overrides of the stored nprobe / efSearch (see set_search_params)
+        self._nprobe_override = nprobe
+        self._ef_search_override = ef_search
 
         if index_path:
             self.load(index_path)
@@ -78,10 +152,46 @@ class FaissDatabase(VectorDatabase):
     def _key_for_idx(rec: Dict, idx: int) -> str:
         """
         Stable key used for id hashing.
-        Priority: explicit stored _key -> url -> id -> fallback 'record_{idx}'.
+        Priority: explicit stored _key -> id -> url -> fallback 'record_{idx}'.
+        ``id`` comes before ``url`` because every segment of a page shares the page url;
+        keying on it would collapse all of a page's vectors onto one FAISS id.
         We store _key in metadata during add() so rebuilds remain stable even if positions shift.
         """
-        return rec.get("_key") or rec.get("url") or rec.get("id") or f"record_{idx}"
+        return rec.get("_key") or rec.get("id") or rec.get("url") or f"record_{idx}"
+
+    @staticmethod
+    def _page_url(rec: Dict) -> Optional[str]:
+        return (rec.get("metadata") or {}).get("page_url") or rec.get("url")
+
+    def _writable_store(self) -> MetadataStore:
+        # A loaded store is a read-only view of the saved file; copy it into memory on first write
+        if self._store.read_only:
+            self._replace_store(self._store.writable_copy())
+        return self._store
+
+    def _replace_store(self, store: MetadataStore) -> None:
+        """Swap in *store* and close the connection of the one it replaces."""
+        old, self._store = self._store, store
+        if old is not store:
+            old.close()
+
+    @property
+    def metadata(self) -> List[Dict]:
+        """All records in insertion order. Decodes the whole store; search() only decodes its hits."""
+        return [rec for _, rec in self._store.iter_records()]
+
+    def iter_records(self) -> Iterator[Tuple[int, Dict]]:
+        """Yield ``(fid, record)`` in insertion order, decoding a page of store rows at a time."""
+        return self._store.iter_records()
+
+    @property
+    def corpus_key(self) -> Optional[Tuple]:
+        """
+        Identity of the saved record store this index reads (path, mtime, size), or None for a new
+        or modified index. Lets callers cache corpus-wide data such as BM25 statistics across
+        instances that load the same saved index.
+        """
+        return self._store_file_key if self._store.read_only else None
 
     def _maybe_train_ivf(self, arr: np.ndarray) -> None:
         """
@@ -96,16 +206,192 @@ class FaissDatabase(VectorDatabase):
             # Non-trainable index types or already-trained: just ignore
             logger.debug(f"FAISS index training skipped: {e}")
 
+    @property
+    def is_trained(self) -> bool:
+        return self.index is None or bool(self.index.is_trained)
+
+    def training_size(self) -> int:
+        """Number of sample vectors train() should get for the current index; 0 if it needs none."""
+        if self._index_type not in ("ivf_flat", "ivf_pq"):
+            return 0
+        centroids = self._ivf_nlist
+        if self._index_type == "ivf_pq":
+            centroids = max(centroids, 2 ** self._pq_nbits)
+        return centroids * self._TRAIN_POINTS_PER_CENTROID
+
+    def train(self, vectors) -> None:
+        """Train the (IVF) index on *vectors*, e.g. a uniform sample of everything that will be added."""
+        if self.index is None:
+            raise RuntimeError("Index not created. Call create() first.")
+        self._require_writable()
+        arr = self._normalize(np.asarray(vectors, dtype="float32"))
+        logger.info(f"Training {self._index_type} index (nlist={self._ivf_nlist}) on {len(arr)} vectors")
+        self.index.train(arr)
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+        """Set IVF ``nprobe`` / HNSW ``efSearch`` for subsequent searches (None keeps the current value)."""
+        if nprobe:
+            self._nprobe_override = int(nprobe)
+        if ef_search:
+            self._ef_search_override = int(ef_search)
+        self._apply_search_params()
+
+    def _apply_search_params(self) -> None:
+        if self.index is None:
+            return
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            ivf.nprobe = min(int(self._nprobe_override or self._ivf_nprobe), ivf.nlist)
+        if self._index_type == "hnsw":
+            base = faiss.downcast_index(self.index.index)
+            base.hnsw.efSearch = int(self._ef_search_override or self._hnsw_efSearch)
+
+    def _search_params(self, selector: Optional[faiss.IDSelector] = None) -> Optional[faiss.SearchParameters]:
+        """
+        Per-search parameters restricting results to *selector* or, without one, masking out
+        tombstoned ids. None when there is nothing to restrict.
+        """
+        if selector is None:
+            if not self._tombstones:
+                return None
+            if self._dead_selector is None:
+                dead = np.fromiter(self._tombstones, dtype="int64", count=len(self._tombstones))
+                self._dead_selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(dead))
+            selector = self._dead_selector
+        # Typed parameters replace the index's own nprobe / efSearch, so carry those over
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+        if self._index_type == "hnsw":
+            base = faiss.downcast_index(self.index.index)
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+        return faiss.SearchParameters(sel=selector)
+
+    def _resolve_filter(self, search_filter: SearchFilter) -> Tuple[np.ndarray, faiss.IDSelector]:
+        """Matching FAISS ids and their selector; the store only holds live records, so no tombstones."""
+        with self._cache_lock:
+            entry = self._filter_cache.get(search_filter)
+            if entry is not None:
+                self._filter_cache.move_to_end(search_filter)
+                return entry
+        fids = np.asarray(self._store.fids_matching(search_filter), dtype="int64")
+        entry = (fids, faiss.IDSelectorBatch(fids))
+        with self._cache_lock:
+            self._filter_cache[search_filter] = entry
+            while len(self._filter_cache) > self._FILTER_CACHE_SIZE:
+                self._filter_cache.popitem(last=False)
+        return entry
+
+    def _records(self, fids: List[int]) -> Dict[int, Dict]:
+        """Decoded records of *fids*, from the shared record cache or one store lookup for the rest."""
+        found: Dict[int, Dict] = {}
+        with self._cache_lock:
+            for fid in fids:
+                rec = self._record_cache.get(fid)
+                if rec is not None:
+                    self._record_cache.move_to_end(fid)
+                    found[fid] = rec
+        missing = [fid for fid in fids if fid not in found]
+        if missing:
+            decoded = self._store.get_many(missing)
+            found.update(decoded)
+            with self._cache_lock:
+                self._record_cache.update(decoded)
+                while len(self._record_cache) > self._RECORD_CACHE_SIZE:
+                    self._record_cache.popitem(last=False)
+        return found
+
+    def _records_changed(self) -> None:
+        with self._cache_lock:
+            self._filter_cache.clear()
+            self._record_cache.clear()
+
+    def index_options(self) -> Dict:
+        """
+        ``create()`` options for a new empty index of the same kind (type, HNSW degree, PQ
+        sub-quantizers); ``nlist`` is left to be derived from the new index's ``expected_count``.
+        """
+        return {
+            "index_type": self._index_type,
+            "hnsw_m": self._hnsw_M,
+            "pq_m": self._pq_m if self._index_type == "ivf_pq" else 0,
+        }
+
+    @staticmethod
+    def _auto_pq_m(dim: int) -> int:
+        # ~16 dimensions per sub-quantizer; pq_m has to divide dim
+        target = max(1, min(96, dim // 16))
+        return next(m for m in range(target, 0, -1) if dim % m == 0)
+
+    def _require_writable(self) -> None:
+        # FAISS aborts the process (not an exception) when resizing a memory-mapped index
+        if self.read_only:
+            raise RuntimeError(
+                "Index was loaded memory-mapped and is read-only. Load it with mmap=False or create() "
+                "a new index before modifying it."
+            )
+
     # ---------------- Core API ----------------
 
-    def create(self, dim: int, index_type: str = "flat") -> None:
+    def create(
+        self,
+        dim: int,
+        index_type: str = "flat",
+        expected_count: Optional[int] = None,
+        nlist: int = 0,
+        pq_m: int = 0,
+        hnsw_m: int = 0,
+    ) -> None:
         """
         Initialize the FAISS index.
-        index_type: "flat" | "hnsw" | "ivf_flat" | "ivf_pq"
+        index_type: "flat" | "hnsw" | "ivf_flat" | "ivf_pq" | "auto"
+        *expected_count* (vectors about to be added) sizes the index: "auto" picks flat, HNSW or
+        IVF-PQ by it, and an *nlist* / *pq_m* of 0 is derived from it and *dim*. *hnsw_m* of 0 keeps
+        the default graph degree.
         """
         self.dim = dim
         self._index_type = (index_type or "flat").lower()
+        if self._index_type == "auto":
+            count = expected_count or 0
+            if count <= self._AUTO_FLAT_MAX:
+                self._index_type = "flat"
+            elif count <= self._AUTO_HNSW_MAX:
+                self._index_type = "hnsw"
+            else:
+                self._index_type = "ivf_pq"
+            logger.info(f"Index type 'auto' resolved to '{self._index_type}' for {count} vectors")
+
+        if hnsw_m:
+            self._hnsw_M = int(hnsw_m)
+        if nlist:
+            self._ivf_nlist = int(nlist)
+        elif expected_count:
+            # ~4*sqrt(n) lists, but never fewer training points per list than FAISS needs
+            self._ivf_nlist = max(
+                1, min(int(4 * np.sqrt(expected_count)), expected_count // self._MIN_POINTS_PER_CENTROID)
+            )
+        if pq_m:
+            if dim % int(pq_m):
+                raise ValueError(f"pq_m ({pq_m}) must divide the embedding dimension ({dim})")
+            self._pq_m = int(pq_m)
+        elif self._index_type == "ivf_pq":
+            self._pq_m = self._auto_pq_m(dim)
+        if self._index_type == "ivf_pq" and expected_count:
+            # 2**nbits codebook entries need enough training points too
+            max_bits = int(np.log2(max(2, expected_count // self._MIN_POINTS_PER_CENTROID)))
+            self._pq_nbits = max(1, min(8, max_bits))
+
+        # Always wrap with IDMap2 to manage stable ids (no reliance on .base_index)
+        self.index = faiss.IndexIDMap2(self._new_base_index(dim))
+        self.read_only = False
+        self._apply_search_params()
+
+        # Reset the record store
+        self._replace_store(MetadataStore())
+        self._set_tombstones(())
 
+    def _new_base_index(self, dim: int) -> faiss.Index:
+        """Empty FAISS index of the configured type and parameters (not yet wrapped in an IDMap)."""
         if self._index_type == "flat":
             base = faiss.IndexFlatIP(dim)
 
@@ -128,16 +414,13 @@ class FaissDatabase(VectorDatabase):
             )
 
         else:
-            raise ValueError(f"Unsupported index type: {index_type}")
-
-        # Always wrap with IDMap2 to manage stable ids (no reliance on .base_index)
-        self.index = faiss.IndexIDMap2(base)
+            raise ValueError(f"Unsupported index type: {self._index_type}")
+        return base
 
-        # Reset in-memory stores
-        self.metadata = []
-        self.id_map = {}
-        self._faiss_to_pos = {}
-        self._pos_to_faiss = {}
+    def _set_tombstones(self, ids) -> None:
+        self._tombstones = set(ids)
+        self._dead_selector = None
+        self._records_changed()
 
     def add(self, records: List[Dict]) -> None:
         """
@@ -150,16 +433,23 @@ class FaissDatabase(VectorDatabase):
             raise RuntimeError("Index not created. Call create() first.")
         if not records:
             return
+        self._require_writable()
 
         vectors = [rec["embedding"] for rec in records]
         arr = np.asarray(vectors, dtype="float32")
         arr = self._normalize(arr)
 
+        store = self._writable_store()
+
         # Determine stable keys and faiss ids
-        start_pos = len(self.metadata)
+        start_pos = store.count()
         keys: List[str] = [self._key_for_idx(rec, start_pos + i) for i, rec in enumerate(records)]
         ids = np.asarray([self._id64_from_key(k) for k in keys], dtype="int64")
 
+        # Re-adding a deleted id: drop the dead vectors first so the id is not in the index twice
+        if self._tombstones and not self._tombstones.isdisjoint(ids.tolist()):
+            self.compact()
+
         # Train IVF if needed (safe no-op for non-trainable indexes)
         self._maybe_train_ivf(arr)
 
@@ -167,96 +457,179 @@ class FaissDatabase(VectorDatabase):
         self.index.add_with_ids(arr, ids)
 
         # Store metadata (without embeddings); persist the computed key for stability across rebuilds
+        rows: List[Tuple[int, str, Optional[str], Dict]] = []
         for i, rec in enumerate(records):
             rec_copy = rec.copy()
             rec_copy.pop("embedding", None)
-            # store key so future map rebuilds don't depend on position
             rec_copy["_key"] = keys[i]
+            rows.append((int(ids[i]), keys[i], self._page_url(rec_copy), rec_copy))
+        store.put_many(rows)
+        self._records_changed()
+
+    def search(
+        self, query_embedding: List[float], top_k: int = 5, search_filter: Optional[SearchFilter] = None
+    ) -> List[Dict]:
+        return self.search_batch([query_embedding], top_k=top_k, search_filter=search_filter)[0]
+
+    def search_batch(
+        self, query_embeddings, top_k: int = 5, search_filter: Optional[SearchFilter] = None
+    ) -> List[List[Dict]]:
+        """
+        Search all query embeddings with one FAISS call on a 2-D query matrix and decode the
+        union of their hits in one store lookup. Returns one result list per query, in order.
+        With *search_filter*, only matching records are searched (see ``SearchFilter``).
+        """
+        return [[hit.to_dict() for hit in hits] for hits in self.search_hits(query_embeddings, top_k, search_filter)]
 
-            pos = len(self.metadata)
-            fid = int(ids[i])
-
-            self.metadata.append(rec_copy)
-            self._faiss_to_pos[fid] = pos
-            self._pos_to_faiss[pos] = fid
-
-            self.id_map[keys[i]] = fid
-
-    def search(self, query_embedding: List[float], top_k: int = 5) -> List[Dict]:
+    def search_hits(
+        self, query_embeddings, top_k: int = 5, search_filter: Optional[SearchFilter] = None
+    ) -> List[List[SearchHit]]:
+        """
+        Like ``search_batch`` but returns ``SearchHit``s referencing shared, read-only records
+        instead of a copied record per hit.
+        """
         if self.index is None:
             raise RuntimeError("Index not initialized.")
-        if self.index.ntotal == 0 or top_k <= 0:
+        if len(query_embeddings) == 0:
             return []
-
-        k = min(int(top_k), self.index.ntotal)
-
-        query = np.asarray([query_embedding], dtype="float32")
-        query = self._normalize(query)
-
-        distances, ids = self.index.search(query, k)
-
-        results: List[Dict] = []
-        id_row = ids[0]
-        dist_row = distances[0]
-        for i in range(len(id_row)):
-            fid = int(id_row[i])
-            if fid == -1:
-                continue
-            pos = self._faiss_to_pos.get(fid)
-            if pos is None or pos < 0 or pos >= len(self.metadata):
-                continue
-
-            rec = self.metadata[pos].copy()
-            rec["score"] = float(dist_row[i])  # cosine similarity ∈ [-1, 1]
-            rec["id"] = fid  # stable external id = faiss id
-            results.append(rec)
-
-        return results
+        queries = np.asarray(query_embeddings, dtype="float32")
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        if self.index.ntotal == 0 or top_k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        queries = self._normalize(queries)
+        if search_filter is not None and not search_filter.is_empty():
+            fids, selector = self._resolve_filter(search_filter)
+            k = min(int(top_k), len(fids))
+            if k <= 0:
+                return [[] for _ in range(len(queries))]
+            if len(fids) <= self._EXACT_FILTER_MAX and self._index_type in ("flat", "hnsw"):
+                distances, ids = self._exact_search(queries, fids, k)
+            else:
+                distances, ids = self.index.search(queries, k, params=self._search_params(selector))
+        else:
+            k = min(int(top_k), self.index.ntotal - len(self._tombstones))
+            if k <= 0:
+                return [[] for _ in range(len(queries))]
+            distances, ids = self.index.search(queries, k, params=self._search_params())
+
+        # Decode only the returned hits, once per distinct id
+        records = self._records(list(dict.fromkeys(int(fid) for fid in ids.ravel() if fid != -1)))
+        batch_results: List[List[SearchHit]] = []
+        for id_row, dist_row in zip(ids, distances):
+            results: List[SearchHit] = []
+            for fid, dist in zip(id_row.tolist(), dist_row.tolist()):
+                rec = records.get(fid)
+                if rec is None:
+                    continue
+                # score: cosine similarity in [-1, 1]; id: stable external id = faiss id
+                results.append(SearchHit(rec, fid=fid, score=dist))
+            batch_results.append(results)
+        return batch_results
+
+    def _exact_search(self, queries: np.ndarray, fids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Brute-force top-*k* over just the vectors of *fids* (a small filtered subset)."""
+        scores = queries @ self.index.reconstruct_batch(fids).T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top_scores, order, axis=1), fids[np.take_along_axis(top, order, axis=1)]
+
+    def set_page_links(self, page_links: Dict[str, Dict]) -> bool:
+        """Replace the page link table; returns False, leaving the store untouched, if it is unchanged."""
+        payload = json.dumps(page_links or {}, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+        if self._store.get_info("page_links_digest") == digest:
+            return False
+        store = self._writable_store()
+        store.set_page_links(page_links)
+        store.set_info("page_links_digest", digest)
+        return True
+
+    def get_page_links(self, page_url: str) -> Dict:
+        return self._store.get_page_links(page_url) or {}
+
+    def get_all_page_links(self) -> Dict[str, Dict]:
+        """The whole page link table, ``{page_url: links}``."""
+        return self._store.all_page_links()
+
+    def has_id(self, id: int) -> bool:
+        """True if a record is stored under the FAISS id *id*."""
+        return bool(self._store.existing_fids([id]))
 
     def get_id_by_key(self, key: str) -> int:
         # Returns the stable FAISS id for a given key (url/id/fallback)
-        return self.id_map.get(key, -1)
-
-    def _rebuild_maps_from_metadata(self) -> None:
-        """Rebuild id_map and faiss<->pos mappings deterministically from stored _key in metadata."""
-        self.id_map.clear()
-        self._faiss_to_pos.clear()
-        self._pos_to_faiss.clear()
-        for pos, rec in enumerate(self.metadata):
-            key = self._key_for_idx(rec, pos)  # prefers stored _key if present
-            fid = int(self._id64_from_key(key))
-            self.id_map[key] = fid
-            self._faiss_to_pos[fid] = pos
-            self._pos_to_faiss[pos] = fid
+        fid = self._store.fid_for_key(key)
+        return -1 if fid is None else fid
+
+    def ids_for_page_urls(self, page_urls) -> List[int]:
+        """
+        Return the FAISS ids of every record whose ``metadata.page_url`` (or top-level ``url``)
+        is in *page_urls*. Used by incremental re-indexing to drop a page's old segments.
+        """
+        wanted = set(page_urls or [])
+        if not wanted:
+            return []
+        return self._store.fids_for_page_urls(wanted)
 
     def delete(self, ids: List[int]) -> None:
         """
         Delete by external ids (FAISS ids returned from search()).
         """
-        if self.index is None:
-            raise RuntimeError("Index not initialized.")
-        if not ids:
-            return
-
-        # Remove from FAISS
-        faiss_ids = np.asarray(ids, dtype="int64")
-        self.index.remove_ids(faiss_ids)
-
-        # Remove from metadata (by positions), then rebuild maps
-        to_remove_positions = set()
-        for fid in ids:
-            pos = self._faiss_to_pos.get(int(fid))
-            if pos is not None:
-                to_remove_positions.add(pos)
-
-        if not to_remove_positions:
-            return
+        self.delete_many(ids)
 
-        new_metadata = [rec for pos, rec in enumerate(self.metadata) if pos not in to_remove_positions]
-        self.metadata = new_metadata
+    def delete_many(self, ids) -> int:
+        """
+        Delete a batch of records by external id; returns how many existed.
 
-        # After positions shift, rebuild maps from stored _key so IDs stay consistent
-        self._rebuild_maps_from_metadata()
+        Records leave the store at once and their vectors are tombstoned: searches skip them and
+        ``compact()`` drops them from FAISS in one pass when the dead fraction passes
+        ``_COMPACT_DEAD_FRACTION``. A delete therefore costs O(len(ids)) instead of a pass over
+        the whole index per call.
+        """
+        if self.index is None:
+            raise RuntimeError("Index not initialized.")
+        # Look ids up in the current (possibly read-only) store first: a delete that matches nothing
+        # must not copy a loaded store into memory
+        dead = self._store.existing_fids(ids)
+        if not dead:
+            return 0
+        self._require_writable()
+        self._writable_store().delete_many(dead)
+        self._set_tombstones(self._tombstones | dead)
+        if len(self._tombstones) > self._COMPACT_DEAD_FRACTION * self.index.ntotal:
+            self.compact()
+        return len(dead)
+
+    def delete_by_page_url(self, page_urls) -> int:
+        """Delete every record of *page_urls* in one batch; returns how many were deleted."""
+        return self.delete_many(self.ids_for_page_urls(page_urls))
+
+    def compact(self) -> int:
+        """Remove tombstoned vectors from the FAISS index; returns how many were removed."""
+        if not self._tombstones:
+            return 0
+        self._require_writable()
+        dead = np.fromiter(self._tombstones, dtype="int64", count=len(self._tombstones))
+        try:
+            removed = int(self.index.remove_ids(dead))
+        except RuntimeError:
+            # HNSW cannot remove vectors: rebuild it from the live ones
+            removed = self._rebuild_without(dead)
+        logger.info(f"Compacted FAISS index: removed {removed} deleted vectors, {self.index.ntotal} remain")
+        self._set_tombstones(())
+        return removed
+
+    def _rebuild_without(self, dead: np.ndarray) -> int:
+        ids = faiss.vector_to_array(self.index.id_map)
+        vectors = self.index.index.reconstruct_n(0, self.index.ntotal)
+        keep = ~np.isin(ids, dead)
+        rebuilt = faiss.IndexIDMap2(self._new_base_index(self.dim))
+        rebuilt.add_with_ids(vectors[keep], ids[keep])
+        self.index = rebuilt
+        self._apply_search_params()
+        return int(len(ids) - keep.sum())
 
     def delete_by_key(self, key: str):
         fid = self.get_id_by_key(key)
@@ -271,10 +644,12 @@ class FaissDatabase(VectorDatabase):
         """
         if self.index is None:
             raise RuntimeError("Index not initialized.")
+        self._require_writable()
 
         fid = int(id)
-        pos = self._faiss_to_pos.get(fid)
-        if pos is None:
+        store = self._writable_store()
+        previous = store.get(fid)
+        if previous is None:
             raise KeyError(f"No record found for id: {id}")
 
         # Remove old vector
@@ -294,23 +669,28 @@ class FaissDatabase(VectorDatabase):
         rec_copy.pop("embedding", None)
         if "_key" not in rec_copy:
             # keep the previous key to maintain mapping stability
-            prev_key = self.metadata[pos].get("_key")
+            prev_key = previous.get("_key")
             if prev_key:
                 rec_copy["_key"] = prev_key
-        self.metadata[pos] = rec_copy
-        # maps remain valid (same fid, same pos)
+        store.replace(fid, rec_copy, page_url=self._page_url(rec_copy))
+        self._records_changed()
 
     def save(self, path: str) -> None:
         if self.index is None:
             raise RuntimeError("Nothing to save — index is not initialized.")
 
         os.makedirs(path, exist_ok=True)
-        faiss.write_index(self.index, os.path.join(path, "embeddings.index"))
-
-        # Persist metadata and minimal config
-        payload = {
-            "metadata": self.metadata,
-            "config": {
+        # Write to a temp file and rename: processes that memory-mapped the previous file keep
+        # reading its (unlinked) inode instead of seeing it truncated and rewritten underneath them
+        index_file = os.path.join(path, "embeddings.index")
+        faiss.write_index(self.index, index_file + ".tmp")
+        os.replace(index_file + ".tmp", index_file)
+
+        # Persist records, page links and minimal config
+        store = self._writable_store()
+        store.set_info(
+            "config",
+            {
                 "index_type": self._index_type,
                 "ivf_nlist": self._ivf_nlist,
                 "pq_m": self._pq_m,
@@ -318,63 +698,155 @@ class FaissDatabase(VectorDatabase):
                 "hnsw_M": self._hnsw_M,
                 "hnsw_efSearch": self._hnsw_efSearch,
                 "hnsw_efConstruction": self._hnsw_efConstruction,
+                "ivf_nprobe": self._ivf_nprobe,
+                "dim": self.dim,
                 "index_version": INDEX_VERSION,
             },
-        }
-        with open(os.path.join(path, self._METADATA_FILENAME), "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
+        )
+        store.set_info("tombstones", sorted(self._tombstones))
+        store.save(os.path.join(path, self._METADATA_FILENAME))
+
+        # A migrated v1 index still has its JSON metadata, and a previously sharded index its
+        # shard manifest, both stale now
+        for stale in (self._JSON_METADATA_FILENAME, SHARDS_FILENAME):
+            stale_file = os.path.join(path, stale)
+            if os.path.exists(stale_file):
+                os.remove(stale_file)
+
+    def load(self, path: str, expected_dim: Optional[int] = None, mmap: Optional[bool] = None) -> None:
+        """
+        Load the index and metadata saved in *path*. With *expected_dim*, an index built for a
+        different embedding size (another model or ``embedding_dimensions``) is rejected.
+        *mmap* overrides the instance's ``mmap`` setting; a mapped index is read-only.
+        """
+        if os.path.exists(os.path.join(path, SHARDS_FILENAME)):
+            raise RuntimeError(
+                f"Index at {path} is sharded; load it with ShardedFaissDatabase (index_shards > 1) "
+                "or re-run a full ingest to rebuild it as a single index."
+            )
+        use_mmap = self.mmap if mmap is None else mmap
+        index_file = os.path.join(path, "embeddings.index")
+        index = None
+        if use_mmap:
+            try:
+                index = faiss.read_index(index_file, _MMAP_FLAGS)
+            except RuntimeError as e:
+                logger.warning(f"Memory-mapped load of {index_file} failed, reading it into memory: {e}")
+                use_mmap = False
+        if index is None:
+            index = faiss.read_index(index_file)
+        if expected_dim is not None and index.d != expected_dim:
+            raise RuntimeError(
+                f"Index at {path} holds {index.d}-dimensional vectors but the embedder produces "
+                f"{expected_dim}-dimensional ones. Re-run a full ingest after changing the embedding model "
+                "or embedding_dimensions."
+            )
+        self.index = index
+        self.read_only = use_mmap
 
-    def load(self, path: str) -> None:
-        self.index = faiss.read_index(os.path.join(path, "embeddings.index"))
         metadata_path = os.path.join(path, self._METADATA_FILENAME)
+        json_metadata_path = os.path.join(path, self._JSON_METADATA_FILENAME)
         legacy_metadata_path = os.path.join(path, self._LEGACY_METADATA_FILENAME)
 
         if os.path.exists(metadata_path):
-            with open(metadata_path, "r", encoding="utf-8") as f:
-                payload = json.load(f)
+            # Opened lazily: nothing is decoded until a search hits it
+            self._replace_store(MetadataStore(metadata_path))
+            stat = os.stat(metadata_path)
+            self._store_file_key = (os.path.abspath(metadata_path), stat.st_mtime_ns, stat.st_size)
+            cfg = self._store.get_info("config", {})
+            stored_version = cfg.get("index_version")
+            if stored_version != INDEX_VERSION:
+                raise RuntimeError(
+                    f"Index format version mismatch: this Webly version requires format v{INDEX_VERSION}, "
+                    f"but the loaded index was built with format v{stored_version}. "
+                    "Delete the index directory and run a full ingest to rebuild the index."
+                )
+        elif os.path.exists(json_metadata_path):
+            cfg = self._migrate_json_metadata(path)
         elif os.path.exists(legacy_metadata_path):
             raise RuntimeError(
                 "Legacy metadata.meta detected. Rebuild the index with this Webly version to migrate "
-                "to the safe JSON metadata format."
+                "to the safe metadata format."
             )
         else:
             raise FileNotFoundError(f"Missing metadata file at {metadata_path}")
 
+        self._index_type = cfg.get("index_type", "flat")
+        self._ivf_nlist = cfg.get("ivf_nlist", self._ivf_nlist)
+        self._pq_m = cfg.get("pq_m", self._pq_m)
+        self._pq_nbits = cfg.get("pq_nbits", self._pq_nbits)
+        self._hnsw_M = cfg.get("hnsw_M", self._hnsw_M)
+        self._hnsw_efSearch = cfg.get("hnsw_efSearch", self._hnsw_efSearch)
+        self._hnsw_efConstruction = cfg.get("hnsw_efConstruction", self._hnsw_efConstruction)
+        self._ivf_nprobe = cfg.get("ivf_nprobe", self._ivf_nprobe)
+        self._apply_search_params()
+        self._set_tombstones(self._store.get_info("tombstones", []))
+
+        # Dim is embedded in the FAISS index already
+        try:
+            self.dim = self.index.d
+        except Exception as e:
+            logger.debug(f"Could not read index dimension from index.d: {e}")
+
+    def _migrate_json_metadata(self, path: str) -> Dict:
+        """
+        Read a format v1 ``metadata.json`` into a fresh record store and write it out as
+        ``metadata.db`` next to it (best effort). Returns the stored index config.
+        """
+        json_metadata_path = os.path.join(path, self._JSON_METADATA_FILENAME)
+        with open(json_metadata_path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+
         # Backward compatibility: handle old format (list only)
         if isinstance(payload, dict) and "metadata" in payload:
-            self.metadata = payload["metadata"]
+            records = payload["metadata"]
+            # Indexes built before the page-level link table keep links inline in each record
+            page_links = payload.get("page_links") or {}
             cfg = payload.get("config", {})
-
-            # Version check
-            stored_version = cfg.get("index_version", None)
-            if stored_version is None:
-                logger.warning(
-                    "Index has no 'index_version' field — built before versioning was introduced. "
-                    "Consider rebuilding the index. Loading will proceed but may behave unexpectedly."
-                )
-            elif stored_version != INDEX_VERSION:
-                raise RuntimeError(
-                    f"Index format version mismatch: this Webly version requires format v{INDEX_VERSION}, "
-                    f"but the loaded index was built with format v{stored_version}. "
-                    "Delete the index directory and run a full ingest to rebuild the index."
-                )
-
-            self._index_type = cfg.get("index_type", "flat")
-            self._ivf_nlist = cfg.get("ivf_nlist", self._ivf_nlist)
-            self._pq_m = cfg.get("pq_m", self._pq_m)
-            self._pq_nbits = cfg.get("pq_nbits", self._pq_nbits)
-            self._hnsw_M = cfg.get("hnsw_M", self._hnsw_M)
-            self._hnsw_efSearch = cfg.get("hnsw_efSearch", self._hnsw_efSearch)
-            self._hnsw_efConstruction = cfg.get("hnsw_efConstruction", self._hnsw_efConstruction)
         else:
-            # Older versions stored only the list
-            self.metadata = payload
+            records, page_links, cfg = payload, {}, {}
 
-        # Rebuild maps deterministically from metadata (uses stored _key if present)
-        self._rebuild_maps_from_metadata()
+        stored_version = cfg.get("index_version", None)
+        if stored_version is None:
+            logger.warning(
+                "Index has no 'index_version' field — built before versioning was introduced. "
+                "Consider rebuilding the index. Loading will proceed but may behave unexpectedly."
+            )
+        elif stored_version != 1:
+            raise RuntimeError(
+                f"Index format version mismatch: this Webly version requires format v{INDEX_VERSION}, "
+                f"but the loaded index was built with format v{stored_version}. "
+                "Delete the index directory and run a full ingest to rebuild the index."
+            )
+
+        # Keys and ids are derived exactly as before (stored _key first), so FAISS ids still match
+        store = MetadataStore()
+        rows = []
+        seen: Dict[int, str] = {}
+        collisions: List[Tuple[str, str]] = []
+        for pos, rec in enumerate(records):
+            key = self._key_for_idx(rec, pos)
+            fid = int(self._id64_from_key(key))
+            if fid in seen:
+                collisions.append((seen[fid], key))
+            seen[fid] = key
+            rows.append((fid, key, self._page_url(rec), rec))
+        if collisions:
+            # The store holds one record per FAISS id; v1 kept every record of a repeated key
+            logger.warning(
+                f"{json_metadata_path} has {len(collisions)} record(s) sharing a FAISS id with an earlier "
+                f"record (e.g. keys {collisions[0][0]!r} and {collisions[0][1]!r}); only the last record "
+                "per id is migrated. Run a full ingest to rebuild the index without duplicates."
+            )
+        store.put_many(rows)
+        store.set_page_links(page_links)
+        cfg = {**cfg, "index_version": INDEX_VERSION}
+        store.set_info("config", cfg)
+        self._replace_store(store)
 
-        # Dim is embedded in the FAISS index already
         try:
-            self.dim = self.index.d
-        except Exception as e:
-            logger.debug(f"Could not read index dimension from index.d: {e}")
+            store.save(os.path.join(path, self._METADATA_FILENAME))
+            logger.info(f"Migrated {json_metadata_path} to {self._METADATA_FILENAME} (format v{INDEX_VERSION})")
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Could not write migrated metadata store to {path}; using it in memory: {e}")
+        return cfg
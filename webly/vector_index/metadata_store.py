@@ -0,0 +1,279 @@
+"""
+SQLite record store for ``FaissDatabase``.
+
+One row per FAISS id holds the record as JSON, with its stable key, page URL
+and the ``SearchFilter`` attributes (URL path, top-level section, crawl time)
+in indexed columns, so ``search`` decodes only the hits it returns, and page
+deletes and filters are index lookups instead of scans.  The page link table and
+the index config live in the same file (``metadata.db``).
+
+A store is either writable and in memory (a new or modified index) or a
+read-only view of a saved file.  Saved files are never modified in place:
+``save()`` writes a copy and renames it over the old one, so readers open
+them with SQLite's ``immutable`` flag (no locking, nothing read up front) and
+keep a consistent view while an ingest replaces the file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import quote, urlparse
+
+from .search_filter import SearchFilter
+
+# Stay well below SQLite's bound-parameter limit on older builds
+_MAX_SQL_PARAMS = 500
+# Rows decoded per query while iterating the whole store
+_ITER_PAGE_SIZE = 1000
+# Upper bound for "starts with" range scans on indexed text columns
+_PREFIX_END = "\U0010ffff"
+
+
+def _filter_columns(record: Dict[str, Any], page_url: Optional[str]) -> Tuple[Optional[str], ...]:
+    _, _, section, crawled_at = SearchFilter.record_attributes(record)
+    page_path = (urlparse(page_url).path or "/") if page_url else None
+    return page_path, section, crawled_at
+
+
+class MetadataStore:
+    """Thread-safe SQLite store of FAISS records, page links and index config."""
+
+    _CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS records (
+        seq      INTEGER PRIMARY KEY,
+        fid      INTEGER NOT NULL UNIQUE,
+        key      TEXT NOT NULL,
+        page_url   TEXT,
+        page_path  TEXT,
+        section    TEXT,
+        crawled_at TEXT,
+        data       TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS records_key ON records (key);
+    CREATE INDEX IF NOT EXISTS records_page_url ON records (page_url);
+    CREATE INDEX IF NOT EXISTS records_page_path ON records (page_path);
+    CREATE INDEX IF NOT EXISTS records_section ON records (section);
+    CREATE INDEX IF NOT EXISTS records_crawled_at ON records (crawled_at);
+    CREATE TABLE IF NOT EXISTS page_links (
+        page_url TEXT PRIMARY KEY,
+        data     TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS info (
+        name  TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        """
+        Args:
+            db_path: Saved ``metadata.db`` to open read-only; None creates an empty writable store
+                in memory.
+        """
+        self._lock = threading.Lock()
+        self.read_only = db_path is not None
+        if db_path is None:
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+            self._conn.executescript(self._CREATE_SQL)
+            self._conn.commit()
+        else:
+            if not os.path.exists(db_path):
+                raise FileNotFoundError(f"Missing metadata store at {db_path}")
+            uri = f"file:{quote(os.path.abspath(db_path))}?immutable=1"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def _require_writable(self) -> None:
+        if self.read_only:
+            raise RuntimeError("Metadata store is a read-only view of a saved file; use writable_copy().")
+
+    def writable_copy(self) -> "MetadataStore":
+        """Return an in-memory writable copy of this store; this one stays open until ``close()``."""
+        copy = MetadataStore()
+        with self._lock:
+            self._conn.backup(copy._conn)
+        return copy
+
+    def save(self, db_path: str) -> None:
+        """Write the store to *db_path*, atomically replacing any existing file."""
+        tmp = db_path + ".tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        dst = sqlite3.connect(tmp)
+        try:
+            with self._lock:
+                self._conn.backup(dst)
+        finally:
+            dst.close()
+        os.replace(tmp, db_path)
+
+    # ---------------- Records ----------------
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def put_many(self, rows: Iterable[Tuple[int, str, Optional[str], Dict[str, Any]]]) -> None:
+        """Insert ``(fid, key, page_url, record)`` rows; an existing fid is replaced."""
+        self._require_writable()
+        params = [
+            (int(fid), key, page_url, *_filter_columns(record, page_url), json.dumps(record, ensure_ascii=False))
+            for fid, key, page_url, record in rows
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records (fid, key, page_url, page_path, section, crawled_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                params,
+            )
+            self._conn.commit()
+
+    def replace(self, fid: int, record: Dict[str, Any], page_url: Optional[str] = None) -> None:
+        """Replace the record stored under *fid*, keeping its key and position."""
+        self._require_writable()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE records SET data = ?, page_url = ?, page_path = ?, section = ?, crawled_at = ? WHERE fid = ?",
+                (json.dumps(record, ensure_ascii=False), page_url, *_filter_columns(record, page_url), int(fid)),
+            )
+            self._conn.commit()
+
+    def get(self, fid: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM records WHERE fid = ?", (int(fid),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, fids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Return ``{fid: record}`` for the fids that exist; only those rows are decoded."""
+        fids = list(dict.fromkeys(int(fid) for fid in fids))
+        found: Dict[int, Dict[str, Any]] = {}
+        with self._lock:
+            for start in range(0, len(fids), _MAX_SQL_PARAMS):
+                batch = fids[start : start + _MAX_SQL_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT fid, data FROM records WHERE fid IN ({placeholders})", batch
+                ).fetchall()
+                for fid, data in rows:
+                    found[fid] = json.loads(data)
+        return found
+
+    def fid_for_key(self, key: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute("SELECT fid FROM records WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def fids_for_page_urls(self, page_urls: Iterable[str]) -> List[int]:
+        urls = list(dict.fromkeys(page_urls))
+        fids: List[int] = []
+        with self._lock:
+            for start in range(0, len(urls), _MAX_SQL_PARAMS):
+                batch = urls[start : start + _MAX_SQL_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT fid FROM records WHERE page_url IN ({placeholders}) ORDER BY seq", batch
+                ).fetchall()
+                fids.extend(row[0] for row in rows)
+        return fids
+
+    def fids_matching(self, search_filter: SearchFilter) -> List[int]:
+        """FAISS ids of the records matching *search_filter*, via the indexed filter columns."""
+        clauses: List[str] = []
+        params: List[str] = []
+        if search_filter.url_prefix:
+            column = "page_path" if search_filter.url_prefix.startswith("/") else "page_url"
+            clauses.append(f"{column} >= ? AND {column} < ?")
+            params += [search_filter.url_prefix, search_filter.url_prefix + _PREFIX_END]
+        if search_filter.section:
+            clauses.append("section = ?")
+            params.append(search_filter.section)
+        if search_filter.crawled_after:
+            clauses.append("crawled_at >= ?")
+            params.append(search_filter.crawled_after)
+        if search_filter.crawled_before:
+            clauses.append("crawled_at < ?")
+            params.append(search_filter.crawled_before)
+        where = " AND ".join(clauses) or "1"
+        with self._lock:
+            return [row[0] for row in self._conn.execute(f"SELECT fid FROM records WHERE {where}", params)]
+
+    def existing_fids(self, fids: Iterable[int]) -> Set[int]:
+        """Return the subset of *fids* that have a row."""
+        fids = list(dict.fromkeys(int(fid) for fid in fids))
+        found: Set[int] = set()
+        with self._lock:
+            for start in range(0, len(fids), _MAX_SQL_PARAMS):
+                batch = fids[start : start + _MAX_SQL_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(f"SELECT fid FROM records WHERE fid IN ({placeholders})", batch)
+                found.update(row[0] for row in rows)
+        return found
+
+    def delete_many(self, fids: Iterable[int]) -> int:
+        """Delete the rows of *fids*; returns how many existed."""
+        self._require_writable()
+        fids = list(dict.fromkeys(int(fid) for fid in fids))
+        deleted = 0
+        with self._lock:
+            for start in range(0, len(fids), _MAX_SQL_PARAMS):
+                batch = fids[start : start + _MAX_SQL_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                deleted += self._conn.execute(f"DELETE FROM records WHERE fid IN ({placeholders})", batch).rowcount
+            self._conn.commit()
+        return deleted
+
+    def iter_records(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield ``(fid, record)`` in insertion order, a page of rows at a time."""
+        last_seq = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT seq, fid, data FROM records WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (last_seq, _ITER_PAGE_SIZE),
+                ).fetchall()
+            if not rows:
+                return
+            for seq, fid, data in rows:
+                yield fid, json.loads(data)
+            last_seq = rows[-1][0]
+
+    # ---------------- Page links / info ----------------
+
+    def set_page_links(self, page_links: Dict[str, Dict]) -> None:
+        """Replace the page link table."""
+        self._require_writable()
+        params = [(url, json.dumps(links, ensure_ascii=False)) for url, links in (page_links or {}).items()]
+        with self._lock:
+            self._conn.execute("DELETE FROM page_links")
+            self._conn.executemany("INSERT INTO page_links (page_url, data) VALUES (?, ?)", params)
+            self._conn.commit()
+
+    def all_page_links(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT page_url, data FROM page_links").fetchall()
+        return {url: json.loads(data) for url, data in rows}
+
+    def get_page_links(self, page_url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM page_links WHERE page_url = ?", (page_url,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_info(self, name: str, value: Any) -> None:
+        self._require_writable()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO info (name, value) VALUES (?, ?)", (name, json.dumps(value))
+            )
+            self._conn.commit()
+
+    def get_info(self, name: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM info WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
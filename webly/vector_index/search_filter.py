@@ -0,0 +1,73 @@
+"""
+Metadata filters for vector search.
+
+A ``SearchFilter`` scopes a search to records by page URL (or URL path) prefix, top-level section
+and crawl date. ``FaissDatabase`` resolves it against indexed columns of its record store into a
+FAISS ``IDSelector``, so a selective filter does not over-fetch and post-filter; ``matches`` is the
+same test in Python for backends and BM25 hits that cannot push it down.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    """
+    Every field that is set must match (AND). Fields:
+
+    - ``url_prefix``: page URL prefix (``https://docs.example.com/api/``), or a URL path prefix when it
+      starts with ``/`` (``/api/``)
+    - ``section``: top-level heading of the record's ``hierarchy`` (its first element)
+    - ``crawled_after`` / ``crawled_before``: ISO-8601 bounds on ``metadata.crawled_at``, compared as
+      strings; ``crawled_after`` is inclusive, ``crawled_before`` exclusive (``"2026-04-01"`` works as
+      a date). Records without a crawl time never match a date bound.
+    """
+
+    url_prefix: Optional[str] = None
+    section: Optional[str] = None
+    crawled_after: Optional[str] = None
+    crawled_before: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Mapping[str, Any]]) -> "SearchFilter":
+        raw = raw or {}
+        known = {f.name for f in fields(cls)}
+        unknown = set(raw) - known
+        if unknown:
+            raise ValueError(f"Unknown search filter field(s): {', '.join(sorted(unknown))}")
+        return cls(**{name: (str(value) if value else None) for name, value in raw.items()})
+
+    def to_dict(self) -> Dict[str, str]:
+        return {f.name: getattr(self, f.name) for f in fields(self) if getattr(self, f.name)}
+
+    def is_empty(self) -> bool:
+        return not self.to_dict()
+
+    @staticmethod
+    def record_attributes(record: Mapping[str, Any]) -> Tuple[Optional[str], ...]:
+        """``(page_url, page_path, section, crawled_at)`` of a stored record; missing values are None."""
+        metadata = record.get("metadata") or {}
+        page_url = metadata.get("page_url") or record.get("url") or None
+        page_path = (urlparse(page_url).path or "/") if page_url else None
+        hierarchy = record.get("hierarchy") or metadata.get("hierarchy") or []
+        section = hierarchy[0] if hierarchy else None
+        crawled_at = metadata.get("crawled_at") or record.get("crawled_at") or None
+        return page_url, page_path, section, crawled_at
+
+    def matches(self, record: Mapping[str, Any]) -> bool:
+        page_url, page_path, section, crawled_at = self.record_attributes(record)
+        if self.url_prefix:
+            target = page_path if self.url_prefix.startswith("/") else page_url
+            if not target or not target.startswith(self.url_prefix):
+                return False
+        if self.section and section != self.section:
+            return False
+        if self.crawled_after and (not crawled_at or crawled_at < self.crawled_after):
+            return False
+        if self.crawled_before and (not crawled_at or crawled_at >= self.crawled_before):
+            return False
+        return True
@@ -0,0 +1,89 @@
+"""
+Lightweight search results.
+
+A ``SearchHit`` carries what differs per hit (FAISS id, score, retrieval origin and rank) and a
+reference to the stored record instead of a copy of it. Hits on the same record, within one search
+or across searches, share that record, so it must be treated as read-only.
+
+Hits read like the record dicts ``search`` returns (``hit["text"]``, ``hit.get("score")``), and
+``setdefault`` / item assignment annotate the hit without touching the shared record, so retrieval
+code can rank and dedupe them unchanged. ``to_dict()`` materializes a plain record once a hit makes
+it into the final context.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional
+
+# Keys served by the hit's own slots instead of the record
+_SLOT_KEYS = {"id": "fid", "score": "score", "_origin": "origin", "_meta_rank": "rank"}
+
+
+class SearchHit(Mapping):
+    __slots__ = ("fid", "score", "origin", "rank", "record", "_extra")
+
+    def __init__(
+        self,
+        record: Mapping[str, Any],
+        fid: Optional[int] = None,
+        score: Optional[float] = None,
+        origin: Optional[str] = None,
+        rank: Optional[int] = None,
+    ):
+        self.record = record
+        self.fid = fid
+        self.score = score
+        self.origin = origin
+        self.rank = rank
+        self._extra: Optional[Dict[str, Any]] = None
+
+    def _own(self) -> Dict[str, Any]:
+        own = {key: getattr(self, slot) for key, slot in _SLOT_KEYS.items() if getattr(self, slot) is not None}
+        if self._extra:
+            own.update(self._extra)
+        return own
+
+    def __getitem__(self, key: str) -> Any:
+        slot = _SLOT_KEYS.get(key)
+        if slot is not None:
+            value = getattr(self, slot)
+            if value is not None:
+                return value
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        return self.record[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        slot = _SLOT_KEYS.get(key)
+        if slot is not None:
+            setattr(self, slot, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def __iter__(self) -> Iterator[str]:
+        own = self._own()
+        yield from own
+        for key in self.record:
+            if key not in own:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self.record.keys() | self._own().keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """A plain record dict: a shallow copy of the stored record plus this hit's fields."""
+        record = dict(self.record)
+        record.update(self._own())
+        return record
+
+    def __repr__(self) -> str:
+        return f"SearchHit(fid={self.fid!r}, score={self.score!r}, origin={self.origin!r}, rank={self.rank!r})"
@@ -0,0 +1,406 @@
+"""
+Hash-partitioned FAISS index for projects with millions of chunks.
+
+``ShardedFaissDatabase`` spreads records over N ``FaissDatabase`` shards by a hash of their page
+URL, so every segment of a page lives in one shard. Each shard is a complete index (own FAISS file,
+record store, tombstones and page links) saved under ``shard_NNN/`` next to a ``shards.json``
+manifest. Queries fan out to all shards on a thread pool (FAISS releases the GIL while searching)
+and the per-shard top-k lists are merged by score.
+
+Shards are rebuilt independently: ``save()`` rewrites only the shards that changed since they were
+loaded or last saved, so an incremental re-index of a few pages leaves the other shard files (and
+processes that memory-mapped them) alone, and ``rebuild_shard()`` replaces one shard's index from
+its records without touching the rest.
+
+A saved index keeps its shard count until the next ``create()`` (a full ingest), which uses the
+configured count. A single shard is saved in the plain ``FaissDatabase`` layout, and a plain index
+loads as one shard, so a project can switch between sharded and unsharded with a full ingest.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .faiss_db import INDEX_VERSION, SHARDS_FILENAME, FaissDatabase
+from .search_filter import SearchFilter
+from .search_hit import SearchHit
+from .vector_db import VectorDatabase
+
+logger = logging.getLogger(__name__)
+
+_SHARD_DIR_FORMAT = "shard_{:03d}"
+
+
+class ShardedFaissDatabase(VectorDatabase):
+    """
+    ``FaissDatabase`` API over *num_shards* independent shards (see module docstring).
+    Ids are the same stable 64-bit key hashes as in an unsharded index.
+    """
+
+    stores_page_links = True
+
+    def __init__(
+        self,
+        num_shards: int = 4,
+        index_path: str = None,
+        mmap: bool = False,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        search_threads: int = 0,
+    ):
+        """
+        Args:
+            num_shards: Shards for a newly created index; a loaded index keeps its saved count
+                (``num_shards`` is the current count, ``configured_shards`` the one ``create()`` uses).
+            index_path: Load a saved sharded index from this directory.
+            mmap, nprobe, ef_search: Passed to every shard (see ``FaissDatabase``).
+            search_threads: Fan-out threads; 0 uses one per shard, capped at the CPU count.
+        """
+        if int(num_shards) < 1:
+            raise ValueError(f"num_shards must be at least 1, got {num_shards}")
+        self.configured_shards = int(num_shards)
+        self.num_shards = self.configured_shards
+        self.mmap = mmap
+        self._shard_kwargs = {"mmap": mmap, "nprobe": nprobe, "ef_search": ef_search}
+        self._search_threads = int(search_threads)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.shards: List[FaissDatabase] = []
+        # Shards modified since they were loaded or saved; save() writes only these
+        self._dirty: set = set()
+        self._saved_path: Optional[str] = None
+        self.dim: Optional[int] = None
+
+        if index_path:
+            self.load(index_path)
+
+    # ---------------- Partitioning ----------------
+
+    @staticmethod
+    def shard_for(page_url: str, num_shards: int) -> int:
+        """Shard of *page_url*: a stable hash, so a page's segments always land together."""
+        digest = hashlib.blake2b((page_url or "").encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") % num_shards
+
+    def _shard_of_record(self, rec: Dict, idx: int) -> int:
+        return self.shard_for(FaissDatabase._page_url(rec) or FaissDatabase._key_for_idx(rec, idx), self.num_shards)
+
+    def _group_urls(self, page_urls: Iterable[str]) -> Dict[int, List[str]]:
+        groups: Dict[int, List[str]] = {}
+        for url in page_urls or []:
+            groups.setdefault(self.shard_for(url, self.num_shards), []).append(url)
+        return groups
+
+    @property
+    def index(self):
+        """Shard 0's FAISS index; None until the shards are created or loaded."""
+        return self.shards[0].index if self.shards else None
+
+    def _require_shards(self) -> None:
+        if not self.shards:
+            raise RuntimeError("Index not initialized.")
+
+    def _map(self, fn, shards: List[FaissDatabase]) -> list:
+        """Run *fn* on each shard in parallel, results in shard order."""
+        if len(shards) <= 1:
+            return [fn(shard) for shard in shards]
+        if self._executor is None:
+            workers = self._search_threads or min(self.num_shards, os.cpu_count() or 1)
+            self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="faiss-shard")
+        return list(self._executor.map(fn, shards))
+
+    # ---------------- Build ----------------
+
+    def create(self, dim: int, index_type: str = "flat", expected_count: Optional[int] = None, **options) -> None:
+        """Create ``configured_shards`` empty shards; *expected_count* is split evenly between them."""
+        self.num_shards = self.configured_shards
+        self._executor = None
+        per_shard = -(-expected_count // self.num_shards) if expected_count else expected_count
+        self.shards = []
+        for _ in range(self.num_shards):
+            shard = FaissDatabase(**self._shard_kwargs)
+            shard.create(dim=dim, index_type=index_type, expected_count=per_shard, **options)
+            self.shards.append(shard)
+        self.dim = dim
+        self._dirty = set(range(self.num_shards))
+
+    @property
+    def is_trained(self) -> bool:
+        return all(shard.is_trained for shard in self.shards)
+
+    def training_size(self) -> int:
+        return max((shard.training_size() for shard in self.shards), default=0)
+
+    def train(self, vectors) -> None:
+        """Train every untrained shard on the same sample, in parallel."""
+        self._require_shards()
+        self._map(lambda shard: shard.train(vectors), [s for s in self.shards if not s.is_trained])
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+        for shard in self.shards:
+            shard.set_search_params(nprobe=nprobe, ef_search=ef_search)
+
+    def add(self, records: List[Dict]) -> None:
+        self._require_shards()
+        groups: Dict[int, List[Dict]] = {}
+        for i, rec in enumerate(records or []):
+            groups.setdefault(self._shard_of_record(rec, i), []).append(rec)
+        for shard_no, group in groups.items():
+            self.shards[shard_no].add(group)
+            self._dirty.add(shard_no)
+
+    # ---------------- Search ----------------
+
+    def search(
+        self, query_embedding: List[float], top_k: int = 5, search_filter: Optional[SearchFilter] = None
+    ) -> List[Dict]:
+        return self.search_batch([query_embedding], top_k=top_k, search_filter=search_filter)[0]
+
+    def search_batch(
+        self, query_embeddings, top_k: int = 5, search_filter: Optional[SearchFilter] = None
+    ) -> List[List[Dict]]:
+        return [[hit.to_dict() for hit in hits] for hits in self.search_hits(query_embeddings, top_k, search_filter)]
+
+    def search_hits(
+        self, query_embeddings, top_k: int = 5, search_filter: Optional[SearchFilter] = None
+    ) -> List[List[SearchHit]]:
+        """Search all shards in parallel and merge each query's hits into one top-*k* by score."""
+        self._require_shards()
+        if len(query_embeddings) == 0:
+            return []
+        queries = np.asarray(query_embeddings, dtype="float32")
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        per_shard = self._map(lambda shard: shard.search_hits(queries, top_k, search_filter), self.shards)
+        return [
+            heapq.nlargest(top_k, (hit for shard_hits in per_shard for hit in shard_hits[q]), key=lambda h: h.score)
+            for q in range(len(queries))
+        ]
+
+    @property
+    def metadata(self) -> List[Dict]:
+        """All records, shard by shard. Decodes every store."""
+        return [rec for shard in self.shards for rec in shard.metadata]
+
+    def iter_records(self) -> Iterator[Tuple[int, Dict]]:
+        """Yield ``(fid, record)`` shard by shard, a page of store rows at a time."""
+        for shard in self.shards:
+            yield from shard.iter_records()
+
+    @property
+    def corpus_key(self) -> Optional[Tuple]:
+        """The shards' ``corpus_key``s, or None if any shard is new or modified."""
+        keys = tuple(shard.corpus_key for shard in self.shards)
+        return keys if keys and all(key is not None for key in keys) else None
+
+    # ---------------- Page links / lookups ----------------
+
+    def set_page_links(self, page_links: Dict[str, Dict]) -> None:
+        self._require_shards()
+        groups: Dict[int, Dict[str, Dict]] = {shard_no: {} for shard_no in range(self.num_shards)}
+        for url, links in (page_links or {}).items():
+            groups[self.shard_for(url, self.num_shards)][url] = links
+        for shard_no, links in groups.items():
+            if self.shards[shard_no].set_page_links(links):
+                self._dirty.add(shard_no)
+
+    def get_page_links(self, page_url: str) -> Dict:
+        if not self.shards:
+            return {}
+        return self.shards[self.shard_for(page_url, self.num_shards)].get_page_links(page_url)
+
+    def get_id_by_key(self, key: str) -> int:
+        for shard in self.shards:
+            fid = shard.get_id_by_key(key)
+            if fid != -1:
+                return fid
+        return -1
+
+    def ids_for_page_urls(self, page_urls) -> List[int]:
+        ids: List[int] = []
+        for shard_no, urls in self._group_urls(page_urls).items():
+            ids.extend(self.shards[shard_no].ids_for_page_urls(urls))
+        return ids
+
+    # ---------------- Delete / update ----------------
+
+    def delete(self, ids: List[int]) -> None:
+        self.delete_many(ids)
+
+    def delete_many(self, ids) -> int:
+        """
+        Delete ids from whichever shards hold them. Ids carry no page URL to route by, so each shard
+        looks them up in its store; shards holding none of them are left untouched (and a loaded
+        shard's store is not copied). Prefer ``delete_by_page_url``, which goes to the owning shards.
+        """
+        self._require_shards()
+        ids = list(ids or [])
+        if not ids:
+            return 0
+        deleted = 0
+        for shard_no, shard in enumerate(self.shards):
+            count = shard.delete_many(ids)
+            if count:
+                deleted += count
+                self._dirty.add(shard_no)
+        return deleted
+
+    def delete_by_page_url(self, page_urls) -> int:
+        self._require_shards()
+        deleted = 0
+        for shard_no, urls in self._group_urls(page_urls).items():
+            count = self.shards[shard_no].delete_by_page_url(urls)
+            if count:
+                deleted += count
+                self._dirty.add(shard_no)
+        return deleted
+
+    def update(self, id: int, new_record: Dict) -> None:
+        self._require_shards()
+        for shard_no, shard in enumerate(self.shards):
+            if shard.has_id(id):
+                shard.update(id, new_record)
+                self._dirty.add(shard_no)
+                return
+        raise KeyError(f"No record found for id: {id}")
+
+    def rebuild_shard(self, shard_no: int, records: List[Dict]) -> None:
+        """
+        Replace shard *shard_no* with a fresh index of the same kind holding *records* (with
+        embeddings), e.g. to re-index one part of a site from scratch. The shard keeps its page
+        links; the other shards are not touched and only this one is written by the next ``save()``.
+        """
+        self._require_shards()
+        if not 0 <= shard_no < self.num_shards:
+            raise IndexError(f"Shard {shard_no} out of range (index has {self.num_shards} shards)")
+        misrouted = [i for i, rec in enumerate(records) if self._shard_of_record(rec, i) != shard_no]
+        if misrouted:
+            raise ValueError(f"{len(misrouted)} record(s) belong to other shards than shard {shard_no}")
+
+        old = self.shards[shard_no]
+        shard = FaissDatabase(**self._shard_kwargs)
+        shard.create(dim=self.dim, expected_count=len(records), **old.index_options())
+        if not shard.is_trained:
+            vectors = [rec["embedding"] for rec in records if rec.get("embedding") is not None]
+            shard.train(vectors[: shard.training_size() or len(vectors)])
+        shard.add(records)
+        shard.set_page_links(old.get_all_page_links())
+        self.shards[shard_no] = shard
+        self._dirty.add(shard_no)
+
+    def compact(self) -> int:
+        removed = 0
+        for shard_no, shard in enumerate(self.shards):
+            count = shard.compact()
+            if count:
+                removed += count
+                self._dirty.add(shard_no)
+        return removed
+
+    # ---------------- Persistence ----------------
+
+    @staticmethod
+    def _remove_shard_dirs(path: str, keep: int) -> None:
+        """Remove ``shard_NNN/`` directories under *path* numbered *keep* and above."""
+        for name in os.listdir(path):
+            suffix = name[len("shard_") :]
+            if name.startswith("shard_") and suffix.isdigit() and int(suffix) >= keep:
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+    def save(self, path: str) -> None:
+        """
+        Write the shards that changed (all of them into a new *path*), then the shard manifest. A
+        single shard is saved in the plain ``FaissDatabase`` layout instead.
+        """
+        self._require_shards()
+        os.makedirs(path, exist_ok=True)
+        same_place = self._saved_path is not None and os.path.abspath(path) == os.path.abspath(self._saved_path)
+        if self.num_shards == 1:
+            if not (same_place and not self._dirty and os.path.exists(os.path.join(path, "embeddings.index"))):
+                # Also drops a stale shards.json; stale shard directories go below
+                self.shards[0].save(path)
+            self._remove_shard_dirs(path, keep=0)
+            self._saved_path = path
+            self._dirty = set()
+            return
+
+        for shard_no, shard in enumerate(self.shards):
+            shard_dir = os.path.join(path, _SHARD_DIR_FORMAT.format(shard_no))
+            if same_place and shard_no not in self._dirty and os.path.isdir(shard_dir):
+                continue
+            shard.save(shard_dir)
+        logger.info(
+            f"Saved sharded index to {path}: {len(self._dirty) if same_place else self.num_shards} "
+            f"of {self.num_shards} shards written"
+        )
+
+        manifest = {"num_shards": self.num_shards, "dim": self.dim, "index_version": INDEX_VERSION}
+        manifest_file = os.path.join(path, SHARDS_FILENAME)
+        with open(manifest_file + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(manifest_file + ".tmp", manifest_file)
+
+        # An unsharded index, or shards beyond the current count, previously saved here are stale now
+        for stale in ("embeddings.index", FaissDatabase._METADATA_FILENAME, FaissDatabase._JSON_METADATA_FILENAME):
+            stale_file = os.path.join(path, stale)
+            if os.path.exists(stale_file):
+                os.remove(stale_file)
+        self._remove_shard_dirs(path, keep=self.num_shards)
+        self._saved_path = path
+        self._dirty = set()
+
+    def load(self, path: str, expected_dim: Optional[int] = None, mmap: Optional[bool] = None) -> None:
+        """
+        Load every shard listed in ``shards.json`` under *path* (in parallel), or a plain
+        ``FaissDatabase`` index saved there as a single shard.
+        """
+        manifest_file = os.path.join(path, SHARDS_FILENAME)
+        if not os.path.exists(manifest_file):
+            shard = FaissDatabase(**self._shard_kwargs)
+            shard.load(path, expected_dim=expected_dim, mmap=mmap)
+            if self.configured_shards != 1:
+                logger.info(f"Loaded unsharded index from {path}; index_shards applies from the next full ingest")
+            self.shards = [shard]
+            self.num_shards = 1
+            self._executor = None
+            self.dim = shard.dim
+            self._saved_path = path
+            self._dirty = set()
+            return
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("index_version") != INDEX_VERSION:
+            raise RuntimeError(
+                f"Index format version mismatch: this Webly version requires format v{INDEX_VERSION}, "
+                f"but the loaded index was built with format v{manifest.get('index_version')}. "
+                "Delete the index directory and run a full ingest to rebuild the index."
+            )
+
+        num_shards = int(manifest["num_shards"])
+        if num_shards != self.configured_shards:
+            logger.info(
+                f"Loading {num_shards} shards from {path}; the configured {self.configured_shards} "
+                "apply from the next full ingest"
+            )
+        self.num_shards = num_shards
+        self._executor = None
+
+        def _load(shard_no: int) -> FaissDatabase:
+            shard = FaissDatabase(**self._shard_kwargs)
+            shard.load(os.path.join(path, _SHARD_DIR_FORMAT.format(shard_no)), expected_dim=expected_dim, mmap=mmap)
+            return shard
+
+        with ThreadPoolExecutor(max_workers=min(num_shards, os.cpu_count() or 1)) as pool:
+            self.shards = list(pool.map(_load, range(num_shards)))
+        self.dim = self.shards[0].dim if self.shards else manifest.get("dim")
+        self._saved_path = path
+        self._dirty = set()
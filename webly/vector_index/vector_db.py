@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence
+
+from .search_filter import SearchFilter
 
 # Base interface for vector DB backends, so additional implementations can
 # be added without changing pipeline code.
@@ -9,8 +11,14 @@ class VectorDatabase(ABC):
     """
     Abstract base class for a vector database backend.
     Implementations must define how vectors are added, searched, saved, and loaded.
+
+    Backends that set ``stores_page_links = True`` keep page-level link data
+    (``outgoing_links`` / ``incoming_links``) once per ``page_url`` via
+    ``set_page_links``/``get_page_links`` instead of inside every record's metadata.
     """
 
+    stores_page_links: bool = False
+
     @abstractmethod
     def create(self, dim: int, index_type: str = "flat") -> None:
         """
@@ -33,6 +41,23 @@ class VectorDatabase(ABC):
         """
         pass
 
+    def search_batch(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        top_k: int = 5,
+        search_filter: Optional[SearchFilter] = None,
+    ) -> List[List[Dict]]:
+        """
+        Search several query embeddings at once and return one result list per query, in order.
+        The default calls ``search`` per query and applies *search_filter* to its hits, which can
+        return fewer than *top_k* results; backends override it to search one query matrix and
+        filter inside the index.
+        """
+        results = [self.search(list(query), top_k=top_k) for query in query_embeddings]
+        if search_filter is None or search_filter.is_empty():
+            return results
+        return [[rec for rec in hits if search_filter.matches(rec)] for hits in results]
+
     @abstractmethod
     def delete(self, ids: List[str]) -> None:
         """
@@ -60,3 +85,17 @@ class VectorDatabase(ABC):
         Load the vector index and metadata from disk.
         """
         pass
+
+    def set_page_links(self, page_links: Dict[str, Dict]) -> None:
+        """
+        Replace the page-level link table ({page_url: {"outgoing_links": [...], "incoming_links": [...]}}).
+        A no-op by default: backends without a link table keep links in record metadata, and the
+        pipeline only calls this when ``stores_page_links`` is True.
+        """
+        return None
+
+    def get_page_links(self, page_url: str) -> Dict:
+        """
+        Return the link data stored for *page_url*, or an empty dict.
+        """
+        return {}